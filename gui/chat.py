@@ -6,6 +6,7 @@ import json
 from threading import Thread
 import traceback
 import os
+import time
 import uuid
 import re
 from pygments.formatters import HtmlFormatter               
@@ -27,6 +28,7 @@ except ImportError:
         "api_url": "http://localhost:11434", "selected_model": "",
         "include_output": False, "include_code": False
     }}
+from .ollama_stream import OllamaStream
 class MarkdownDisplayChat(tk.Frame):
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
@@ -62,9 +64,15 @@ class MarkdownDisplayChat(tk.Frame):
                 self.html_label.config(state="disabled")
             except tk.TclError: pass
 class ChatPanel(tk.Frame):
+    STREAM_POLL_MS = 30
+    RENDER_MIN_S = 0.1   # intervallo minimo tra due ridisegni della risposta in arrivo
     def __init__(self, master, main_app_ref=None):
         super().__init__(master)
         self.main_app_ref = main_app_ref
+        self._stream = None
+        self._reply_text = None   # risposta in arrivo, mostrata in coda alla cronologia
+        self._render_due = 0.0
+        self._html_rows = {}      # (tema, ruolo, testo) -> HTML del messaggio gia' convertito
         chat_config_loaded = {}
         if self.main_app_ref and hasattr(self.main_app_ref, 'config'):
             chat_config_loaded = self.main_app_ref.config.get('chat_ai_config', {})
@@ -127,6 +135,7 @@ class ChatPanel(tk.Frame):
         self.entry.bind("<Return>", self._on_enter); self.entry.bind("<Shift-Return>", lambda e: "break")
         self.send_btn = ttk.Button(input_frame, text="Send", command=self._send_message_ui)
         self.send_btn.grid(row=0, column=1, padx=(5,0), sticky="ns")
+        self.entry.bind("<Escape>", lambda e: self._cancel_ai_reply())
         if self.winfo_exists(): self.after(100, self._fetch_models)                           
     def _on_main_tab_changed_for_chat_label(self, event=None):
         if self.winfo_exists(): self.after_idle(self._update_code_check_label_text_only)
@@ -177,16 +186,17 @@ class ChatPanel(tk.Frame):
         self.model_combo.config(state="readonly")
     def freeze_interface(self):
         if not self.winfo_exists(): return
-        for widget in [self.send_btn, self.entry, self.url_entry, self.model_combo, self.refresh_models_btn]:
+        for widget in [self.entry, self.url_entry, self.model_combo, self.refresh_models_btn]:
             try: widget.config(state="disabled")
             except tk.TclError: pass                       
-        if self.send_btn.winfo_exists(): self.send_btn.config(text="Waiting...")
+        # Durante la generazione il pulsante interrompe la risposta
+        if self.send_btn.winfo_exists(): self.send_btn.config(text="Stop", command=self._cancel_ai_reply)
     def unfreeze_interface(self):
         if not self.winfo_exists(): return
         for widget in [self.entry, self.url_entry, self.refresh_models_btn]:
             try: widget.config(state="normal")
             except tk.TclError: pass
-        if self.send_btn.winfo_exists(): self.send_btn.config(state="normal", text="Send")
+        if self.send_btn.winfo_exists(): self.send_btn.config(state="normal", text="Send", command=self._send_message_ui)
         if self.model_combo.winfo_exists(): self.model_combo.config(state="readonly")
     def _on_enter(self, event):
         if not (event.state & 0x0001): self._send_message_ui(); return "break"
@@ -229,43 +239,35 @@ class ChatPanel(tk.Frame):
         self.chat_history.append({"role": "user", "content": full_msg})
         self._add_to_display("user", msg)
         self.freeze_interface()
-        Thread(target=self._run_ai_reply_thread, daemon=True).start()
-    def _run_ai_reply_thread(self):
-        ai_r, err_r = None, None
-        try:
-            tmp_c = "".join(list(self._chat_stream_api()))
-            ai_r = tmp_c
-        except Exception as e: err_r = f"Chat API Error: {e}\n{traceback.format_exc()}"
-        if self.winfo_exists(): self.after(0, self._handle_ai_reply_result, ai_r, err_r)
-    def _handle_ai_reply_result(self, ai_content, error_msg):
-        if not self.winfo_exists(): return
-        if error_msg:
-            self.chat_history.append({"role": "error", "content": error_msg})
-            self._add_to_display("error", error_msg)
-        elif ai_content is not None:
-            self.chat_history.append({"role": "assistant", "content": ai_content})
-            self._add_to_display("assistant", ai_content)
+        self._reply_text = ""
+        self._render_due = 0.0
+        self._stream = self._chat_stream_api().start()
+        self.after(self.STREAM_POLL_MS, self._poll_ai_reply)
+    def _poll_ai_reply(self):
+        stream = self._stream
+        if stream is None or not self.winfo_exists(): return
+        text, finished, error = stream.poll()
+        if text: self._reply_text += text
+        if finished:
+            self._finish_ai_reply(error, stream.cancelled)
+            return
+        now = time.perf_counter()
+        if text and now >= self._render_due:
+            self._add_to_display("assistant", None)
+            self._render_due = now + max(self.RENDER_MIN_S, 4 * (time.perf_counter() - now))
+        self.after(self.STREAM_POLL_MS, self._poll_ai_reply)
+    def _finish_ai_reply(self, error_msg, cancelled):
+        reply, self._reply_text, self._stream = self._reply_text, None, None
+        if reply: self.chat_history.append({"role": "assistant", "content": reply})
+        # Solo per la chat a video: il ruolo non e' in CHAT_ROLES, al modello arriva la risposta parziale
+        if cancelled: self.chat_history.append({"role": "stopped", "content": "*[Generation stopped]*"})
+        if error_msg: self.chat_history.append({"role": "error", "content": error_msg})
+        self._add_to_display(None, None)
         self.unfreeze_interface()
+    def _cancel_ai_reply(self):
+        if self._stream is not None: self._stream.cancel()
     def _chat_stream_api(self):
-        payload = {"model": self.selected_model.get(), "messages": self.chat_history, "stream": False}
-        data_ = json.dumps(payload).encode("utf-8")
-        api_url_val = self.api_url.get()
-        api_full_url = urllib.parse.urljoin(api_url_val, "/api/chat" if api_url_val.endswith('/') else "/api/chat")
-        req = urllib.request.Request(api_full_url, data=data_, headers={"Content-Type": "application/json"}, method="POST")
-        try:
-            with urllib.request.urlopen(req, timeout=120) as resp:
-                resp_data = json.loads(resp.read().decode())
-                if "message" in resp_data and "content" in resp_data["message"]: yield resp_data["message"]["content"]
-                elif "error" in resp_data: yield f"[API Err ({api_full_url}): {resp_data['error']}]"
-                else: yield f"[API Err ({api_full_url}): Bad format]"
-        except urllib.error.HTTPError as e:
-            body = e.read().decode(); jerr = {}
-            try: jerr = json.loads(body)
-            except json.JSONDecodeError: jerr = {"error": body}
-            yield f"[API HTTP Err ({api_full_url}): {e.code} - {jerr.get('error', 'Unknown')}]"
-        except urllib.error.URLError as e: yield f"[API URL Err ({api_full_url}): {e.reason}]"
-        except TimeoutError: yield f"[API Err ({api_full_url}): Timeout (120s)]"
-        except Exception as e: yield f"[Chat Err ({api_full_url}): {e}]"
+        return OllamaStream(self.api_url.get(), self.selected_model.get(), self.chat_history)
     def _add_to_display(self, role, content):
         if not self.winfo_exists(): return
         if role is None and content is None:                      
@@ -280,13 +282,24 @@ class ChatPanel(tk.Frame):
                 ctx_marker = "Based on the context above, answer the following:\n\n"
                 if ctx_marker in original_user_msg: original_user_msg = original_user_msg.split(ctx_marker, 1)[-1]
                 display_history.append({"role": "user", "content": original_user_msg})
+            elif msg_hist["role"] == "stopped":
+                if display_history and display_history[-1]["role"] == "assistant":
+                    display_history[-1] = {"role": "assistant", "content": f"{display_history[-1]['content']}\n\n{msg_hist['content']}"}
+                else: display_history.append({"role": "assistant", "content": msg_hist["content"]})
             else: display_history.append(msg_hist)
+        if self._reply_text: display_history.append({"role": "assistant", "content": self._reply_text})
         current_theme_name = self.main_app_ref.current_theme_name if self.main_app_ref else "light"
         active_palette = APP_THEMES.get(current_theme_name, APP_THEMES["light"])
         user_bg = active_palette.get("console_fg", "#e0e0e0"); user_fg = active_palette.get("console_bg", "#1e1e1e")
         ai_bg = active_palette.get("gutter_bg", "#f5f5f5"); ai_fg = active_palette.get("gutter_fg", "#333333")
         err_bg = active_palette.get("breakpoint_line_editor_bg", "#ffdddd"); err_fg = active_palette.get("syntax",{}).get('string', "#a31515")
+        html_rows = {}
         for msg in display_history:
+            key = (current_theme_name, msg["role"], msg["content"])
+            balloon = self._html_rows.get(key)
+            if balloon is not None:
+                rows_html.append(balloon); html_rows[key] = balloon
+                continue
             cr, bg, fg = msg["role"], (user_bg if msg["role"] == "user" else (err_bg if msg["role"] == "error" else ai_bg)),\
                          (user_fg if msg["role"] == "user" else (err_fg if msg["role"] == "error" else ai_fg))
             html_row = self.convert_message_to_html(msg["content"], role=cr)
@@ -295,7 +308,8 @@ class ChatPanel(tk.Frame):
                            <td style="width:{'80%' if cr != 'user' else '20%'};{'padding-right:5px;' if cr != 'user' else ''} {td_style if cr != 'user' else ''}">{html_row if cr != 'user' else ''}</td>
                            <td style="width:{'20%' if cr != 'user' else '80%'};{'padding-left:5px;' if cr == 'user' else ''} {td_style if cr == 'user' else ''}">{html_row if cr == 'user' else ''}</td>
                          </tr></table>"""
-            rows_html.append(balloon)
+            rows_html.append(balloon); html_rows[key] = balloon
+        self._html_rows = html_rows
         py_style = 'monokai' if current_theme_name == "dark" else 'default'
         body_bg_chat = active_palette.get('app_bg', 'white'); body_fg_chat = active_palette.get('editor_fg', 'black')
         py_css = HtmlFormatter(style=py_style, noclasses=True).get_style_defs('.highlight')
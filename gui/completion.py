@@ -0,0 +1,122 @@
+import bisect
+import re
+from gui.syntax import KEYWORDS, BUILTINS
+
+_WORD_RE = re.compile(r'\b([a-zA-Z_]\w*)\b')
+
+def line_words(text):
+    """Parole candidate al completamento in una riga (identificatori di almeno 2 caratteri)."""
+    return tuple({word for word in _WORD_RE.findall(text) if len(word) > 1})
+
+class WordIndex:
+    """
+    Words of every open document plus a fixed base vocabulary, as one sorted list for
+    bisect prefix queries. Document words are reference-counted by the lines that contain
+    them, so a word leaves the index when its last line is edited away or its tab closes.
+    """
+    BULK = 64   # oltre questa soglia si riordina invece di inserire uno per uno
+    def __init__(self, base_words=()):
+        self._base = frozenset(base_words)
+        self._counts = {}
+        self._sorted = sorted(self._base)
+    def __len__(self):
+        return len(self._sorted)
+    def add(self, words):
+        counts, base = self._counts, self._base
+        new = []
+        for word in words:
+            n = counts.get(word, 0)
+            counts[word] = n + 1
+            if n == 0 and word not in base: new.append(word)
+        if len(new) > self.BULK:
+            self._sorted.extend(new); self._sorted.sort()
+        else:
+            for word in new: bisect.insort(self._sorted, word)
+    def discard(self, words):
+        counts, base = self._counts, self._base
+        gone = []
+        for word in words:
+            n = counts.get(word, 0) - 1
+            if n > 0: counts[word] = n
+            elif n == 0:
+                del counts[word]
+                if word not in base: gone.append(word)
+        if len(gone) > self.BULK:
+            gone = set(gone)
+            self._sorted = [word for word in self._sorted if word not in gone]
+        else:
+            for word in gone:
+                i = bisect.bisect_left(self._sorted, word)
+                if i < len(self._sorted) and self._sorted[i] == word: del self._sorted[i]
+    def complete(self, prefix, limit=200):
+        """Parole che iniziano con prefix (esclusa prefix stessa), in ordine, al massimo limit."""
+        return prefix_matches(self._sorted, prefix, limit)
+
+def prefix_matches(sorted_names, prefix, limit=200, hide_private=False):
+    """
+    Nomi di una lista ordinata che iniziano con prefix (esclusa prefix stessa), al massimo limit.
+    hide_private: salta i nomi '_...' se prefix non inizia con '_'.
+    """
+    i = bisect.bisect_left(sorted_names, prefix)
+    skip_private = hide_private and not prefix.startswith('_')
+    result = []
+    while i < len(sorted_names) and len(result) < limit and sorted_names[i].startswith(prefix):
+        name = sorted_names[i]
+        if name != prefix and not (skip_private and name.startswith('_')): result.append(name)
+        i += 1
+    return result
+
+_shared_index = None
+
+def shared_word_index():
+    """Indice condiviso da tutte le tab, con keyword e builtin come vocabolario di base."""
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = WordIndex(KEYWORDS | BUILTINS)
+    return _shared_index
+
+class DocumentWords:
+    """
+    Per-line word sets of one editor feeding a shared WordIndex. Edits only mark lines
+    (same (line, delta) notifications as the highlighter); refresh() re-reads marked lines.
+    """
+    CHUNK_LINES = 2000
+    def __init__(self, index, line_count=1):
+        self.index = index
+        self._lines = [()] + [None] * line_count   # _lines[i]: parole della riga i, None = da rileggere
+    @property
+    def pending(self):
+        return None in self._lines
+    def on_edit(self, line, delta):
+        lines = self._lines
+        line = max(1, min(line, len(lines) - 1))
+        if delta > 0:
+            lines[line + 1:line + 1] = [None] * delta
+        elif delta < 0:
+            for words in lines[line + 1:line + 1 - delta]:
+                if words: self.index.discard(words)
+            del lines[line + 1:line + 1 - delta]
+        if lines[line]: self.index.discard(lines[line])
+        lines[line] = None
+    def refresh(self, get_lines, line_count):
+        """get_lines(first, last) -> testo delle righe; line_count serve a riallinearsi se serve."""
+        lines = self._lines
+        if len(lines) - 1 != line_count:
+            self.close(); lines = self._lines = [()] + [None] * line_count
+        i = 1
+        while True:
+            try: i = lines.index(None, i)
+            except ValueError: return
+            end = i
+            while end - i < self.CHUNK_LINES - 1 and end + 1 < len(lines) and lines[end + 1] is None: end += 1
+            added = []
+            for n, text in enumerate(get_lines(i, end), i):
+                words = line_words(text)
+                lines[n] = words
+                added.extend(words)
+            self.index.add(added)
+            i = end + 1
+    def close(self):
+        for words in self._lines:
+            if words: self.index.discard(words)
+        self._lines = [()]
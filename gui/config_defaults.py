@@ -2,8 +2,8 @@ DEFAULT_CONFIG = {
     "geometry": "800x600",
     "main_window_position": None,
     "open_files": [],
+    "active_file": None,
     "pane_states": {"main": [594], "main_0": [385], "main_1": [278], "left": [385], "right": [278]},
-    "breakpoints": [],
     "run_configs": {},
     "debug_exec_dialog_config": {
         "geometry": "600x450",
@@ -12,6 +12,20 @@ DEFAULT_CONFIG = {
     },
     "theme": "light",
     "editor_font_size": 11,
+    "icons_network_refresh": False,
+    "debugger_engine": "auto",
+    "repr_limits": {
+        "max_chars": 200,
+        "max_depth": 3,
+        "max_elements": 20,
+        "time_budget_ms": 100
+    },
+    "watch_timeout_ms": 500,
+    "output_transport": "pipe",
+    "output_ring_kb": 4096,
+    "console_max_lines": 10000,
+    "console_spool": True,
+    "console_spool_keep": 3,
     "chat_ai_config": {
         "api_url": "http://localhost:11434",
         "selected_model": "",
@@ -0,0 +1,135 @@
+import copy
+import json
+import os
+import queue
+import threading
+
+def merge_defaults(defaults, loaded):
+    """
+    loaded completato con i default mancanti, in un solo passaggio: i valori caricati si
+    usano cosi' come sono, si copiano solo i default che servono. Le chiavi sconosciute restano.
+    """
+    for key, default in defaults.items():
+        if key not in loaded:
+            loaded[key] = copy.deepcopy(default)
+        elif isinstance(default, dict) and isinstance(loaded[key], dict):
+            merge_defaults(default, loaded[key])
+    return loaded
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f: f.write(text)
+    os.replace(tmp, path)
+
+class ConfigStore:
+    """
+    The settings file plus a separate breakpoints file ({file: [lines]}, compact JSON), each
+    written atomically (temp file + os.replace) and only when its serialised text changed, so
+    toggling a breakpoint does not rewrite the settings and vice versa. schedule() coalesces
+    changes into one save DEBOUNCE_MS later; collect() runs on the Tk thread to bring the dict
+    up to date, serialisation happens there too (the dicts are not thread-safe) and the file
+    writes go to a worker thread. flush() saves synchronously, for exit.
+    """
+    DEBOUNCE_MS = 1000
+    def __init__(self, path, defaults, breakpoints_path=None):
+        self.path = path
+        self.defaults = defaults
+        self.breakpoints_path = breakpoints_path or os.path.join(os.path.dirname(path), "breakpoints.json")
+        self.config = {}
+        self.breakpoints = {}     # percorso normalizzato -> righe ordinate
+        self._written = {}        # percorso file -> ultimo testo scritto (o letto)
+        self._root = None
+        self._collect = None
+        self._save_job = None
+        self._writes = queue.Queue()
+        self._worker = None
+    def load(self):
+        config, text = None, None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f: text = f.read()
+            config = json.loads(text)
+        except (OSError, ValueError): pass
+        if not isinstance(config, dict): config, text = {}, None
+        legacy_bps = config.pop('breakpoints', None)
+        self.config = merge_defaults(self.defaults, config)
+        # Il file si riscrive alla prima modifica, oppure subito se conteneva ancora i breakpoint
+        if text is not None and legacy_bps is None: self._written[self.path] = self._dumps(self.config)
+        self.breakpoints = {}
+        try:
+            with open(self.breakpoints_path, 'r', encoding='utf-8') as f: text = f.read()
+            stored = json.loads(text)
+            if isinstance(stored, dict):
+                self._written[self.breakpoints_path] = text
+                for path, lines in stored.items(): self._set_lines(path, lines)
+        except (OSError, ValueError): pass
+        if not self.breakpoints and isinstance(legacy_bps, list):
+            # Formato precedente: lista [file, riga] dentro il file di configurazione
+            by_file = {}
+            for item in legacy_bps:
+                try: path, line = item
+                except (TypeError, ValueError): continue
+                by_file.setdefault(path, []).append(line)
+            for path, lines in by_file.items(): self._set_lines(path, lines)
+        return self.config
+    @staticmethod
+    def normalize(path):
+        return os.path.normcase(os.path.abspath(str(path)))
+    def _set_lines(self, path, lines):
+        try: key = self.normalize(path)
+        except (TypeError, ValueError): return
+        lines = sorted({ln for ln in lines if isinstance(ln, int) and ln > 0}) if isinstance(lines, list) else []
+        if lines: self.breakpoints[key] = lines
+        else: self.breakpoints.pop(key, None)
+    def breakpoints_for(self, path):
+        return list(self.breakpoints.get(self.normalize(path), ()))
+    def set_breakpoints(self, pairs):
+        """Sostituisce tutti i breakpoint con le coppie (file, riga) date."""
+        by_file = {}
+        for path, line in pairs: by_file.setdefault(path, []).append(line)
+        self.breakpoints = {}
+        for path, lines in by_file.items(): self._set_lines(path, lines)
+    def bind(self, root, collect):
+        """collect(): aggiorna config e breakpoint dallo stato dell'applicazione, sul thread Tk."""
+        self._root, self._collect = root, collect
+    def schedule(self):
+        if self._root is None or self._save_job is not None: return
+        try: self._save_job = self._root.after(self.DEBOUNCE_MS, self._save_later)
+        except Exception: self._save_job = None
+    def _save_later(self):
+        self._save_job = None
+        for job in self._snapshot(): self._writes.put(job)
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._write_loop, name="ConfigStore", daemon=True)
+            self._worker.start()
+    def flush(self):
+        if self._save_job is not None:
+            try: self._root.after_cancel(self._save_job)
+            except Exception: pass
+            self._save_job = None
+        self._writes.join()   # prima le scritture gia' accodate, poi lo stato finale
+        for path, text in self._snapshot():
+            try: _write_atomic(path, text)
+            except OSError: pass
+    def _snapshot(self):
+        if self._collect is not None:
+            try: self._collect()
+            except Exception: pass
+        jobs = []
+        for path, data in ((self.path, self.config), (self.breakpoints_path, self.breakpoints)):
+            try: text = self._dumps(data)
+            except (TypeError, ValueError): continue
+            if self._written.get(path) == text: continue
+            self._written[path] = text
+            jobs.append((path, text))
+        return jobs
+    def _dumps(self, data):
+        if data is self.breakpoints: return json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    def _write_loop(self):
+        while True:
+            path, text = self._writes.get()
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                _write_atomic(path, text)
+            except OSError: self._written.pop(path, None)   # si ritenta al prossimo salvataggio
+            finally: self._writes.task_done()
@@ -1,13 +1,111 @@
 import tkinter as tk
 from tkinter import ttk
 import queue                                           
+import os
+import tempfile
+from array import array
+from collections import deque
+from tkinter import simpledialog
+
+class ConsoleSpool:
+    """
+    Full copy of a session's output in an append-only temp file.
+    The line index is sparse (one byte offset every BLOCK lines), so memory stays
+    flat however long the session runs.
+    """
+    BLOCK = 256
+    def __init__(self, directory=None):
+        fd, self.path = tempfile.mkstemp(prefix='pydbg-console-', suffix='.log', dir=directory)
+        self._file = os.fdopen(fd, 'w+b')
+        self._offsets = array('Q', [0])   # offset della riga k * BLOCK
+        self.line_count = 0               # righe complete
+        self.size = 0
+        self._dirty = False
+    def append(self, text):
+        data = text.encode('utf-8', 'replace')
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        self._dirty = True
+        base, self.size = self.size, self.size + len(data)
+        start = 0
+        while True:
+            need = self.BLOCK - self.line_count % self.BLOCK
+            found = data.count(b'\n', start)
+            if found < need:
+                self.line_count += found
+                return
+            # Inizio della riga che apre un nuovo blocco: dopo il need-esimo '\n'
+            start = len(data) - len(data[start:].split(b'\n', need)[-1])
+            self.line_count += need
+            self._offsets.append(base + start)
+    def _seek_line(self, line):
+        if self._dirty:
+            self._file.flush(); self._dirty = False
+        block = min(line // self.BLOCK, len(self._offsets) - 1)
+        self._file.seek(self._offsets[block])
+        for _ in range(line - block * self.BLOCK):
+            self._file.readline()
+    def read_lines(self, start, count):
+        """Righe [start, start+count); l'ultima riga incompleta e' inclusa se si arriva in fondo."""
+        self._seek_line(start)
+        lines = []
+        for _ in range(count):
+            line = self._file.readline()
+            if not line: break
+            lines.append(line)
+        return b''.join(lines).decode('utf-8', 'replace')
+    def search(self, needle, start_line=0, max_lines=None):
+        """
+        Cerca needle dalla riga start_line, leggendone al massimo max_lines.
+        Restituisce (riga trovata, None), (None, riga da cui proseguire) oppure (None, None) a fine file.
+        """
+        needle = needle.encode('utf-8', 'replace')
+        self._seek_line(start_line)
+        line_no = start_line
+        for line in iter(self._file.readline, b''):
+            if needle in line: return line_no, None
+            line_no += 1
+            if max_lines is not None and line_no - start_line >= max_lines: return None, line_no
+        return None, None
+    def close(self, delete=True):
+        try:
+            self._file.close()
+            if delete: os.remove(self.path)
+        except OSError: pass
+
 class ConsolePanel(tk.Frame):
     """
     Panel for displaying script output and handling stdin requests.
+    Output is buffered and inserted once per idle cycle; the Text keeps at most
+    max_lines lines (oldest dropped in chunks). With spool=True everything is also
+    written to a ConsoleSpool and paged back in when scrolling past the window or searching;
+    the spool is searched SEARCH_CHUNK lines per idle callback, so the UI stays responsive.
+    clear() starts a new spool and keeps the previous keep_spools files on disk (old_spools)
+    for post-mortem inspection; they are deleted with the panel.
     """
-    def __init__(self, master, app_ref=None):                                 
+    SEARCH_CHUNK = 20000   # righe dello spool lette per ogni passo di find()
+    def __init__(self, master, app_ref=None, max_lines=10000, spool=True, keep_spools=3):                                 
         super().__init__(master)
         self.app_ref = app_ref                                                
+        self.max_lines = max(100, int(max_lines))
+        # Le righe vecchie vengono tolte a blocchi: un delete ogni trim_chunk righe, non ad ogni write
+        self.trim_chunk = max(100, self.max_lines // 10)
+        self._pending = deque()      # testi in attesa del prossimo idle
+        self._pending_lines = 0
+        self._pending_skipped = None # righe in attesa scartate (None = nessuna): al flush il widget riparte da capo
+        self._flush_scheduled = None
+        # Finestra sullo spool: riga dello spool mostrata in cima e se si sta seguendo la coda
+        self._spool_enabled = bool(spool)
+        self.spool = None
+        self.keep_spools = max(0, int(keep_spools))
+        self.old_spools = deque()    # percorsi degli spool delle sessioni precedenti, il piu' recente in fondo
+        self.page_lines = max(100, self.max_lines // 10)
+        self._first_line = 0
+        self._live = True
+        self._page_scheduled = None
+        self._last_found = -1
+        self._search = None          # ricerca in corso nello spool: [testo, prossima riga, ripartire da 0]
+        self._search_job = None
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
         self.scrollbar = ttk.Scrollbar(self, orient='vertical')
@@ -17,7 +115,7 @@ class ConsolePanel(tk.Frame):
             fg='lightgrey',
             insertbackground='white',                      
             wrap='word',
-            yscrollcommand=self.scrollbar.set,
+            yscrollcommand=self._on_yscroll,
             undo=False,
             state='disabled',                 
         )
@@ -32,6 +130,8 @@ class ConsolePanel(tk.Frame):
         self.text.bind('<Button-3>', self._show_context_menu)
         self.text.bind('<Control-a>', self._select_all)                  
         self.text.bind('<Control-c>', self._copy_selection)              
+        self.text.bind('<Control-f>', self._ask_find)
+        self.text.tag_configure('found', background='#5a5a00')
     def _show_context_menu(self, event):
         try:
              has_selection = bool(self.text.tag_ranges(tk.SEL))
@@ -48,16 +148,190 @@ class ConsolePanel(tk.Frame):
         self.text.see(tk.INSERT)
         return "break"                          
     def write(self, msg: str):
-        """Appends output message to the console."""
-        if not self.winfo_exists(): return
+        """Appends output message to the console (batched: inserted at the next idle cycle)."""
+        if not msg: return
+        if self._spool_enabled:
+            if self.spool is None:
+                try: self.spool = ConsoleSpool()
+                except OSError: self._spool_enabled = False
+            if self.spool is not None: self.spool.append(msg)
+        # Mentre si guarda lo storico l'output va solo nello spool (ricaricato tornando in fondo)
+        if not self._live: return
+        self._pending.append(msg)
+        self._pending_lines += msg.count('\n')
+        # Piu' righe in attesa di quante ne verrebbero mostrate: le piu' vecchie sono gia' da scartare,
+        # e con loro tutto il contenuto attuale del widget (altrimenti resterebbe un buco nel mezzo)
+        while self._pending_lines > self.max_lines and len(self._pending) > 1:
+            dropped = self._pending.popleft().count('\n')
+            self._pending_lines -= dropped
+            self._pending_skipped = (self._pending_skipped or 0) + dropped   # anche 0: riga incompleta
+        if self._flush_scheduled is None:
+            try: self._flush_scheduled = self.after_idle(self._flush_pending)
+            except tk.TclError: pass
+    def _flush_pending(self):
+        self._flush_scheduled = None
+        if not self._pending or not self.winfo_exists(): return
+        text = ''.join(self._pending)
+        skipped = self._pending_skipped
+        self._pending.clear(); self._pending_lines = 0; self._pending_skipped = None
         try:
+            # Autoscroll solo se l'utente e' gia' in fondo
+            at_bottom = self.text.yview()[1] >= 0.999
             self.text.config(state='normal')
-            self.text.insert(tk.END, msg)
-            self.text.see(tk.END)
-            self.text.config(state='disabled')                              
+            if skipped is not None:
+                self.text.delete('1.0', tk.END)
+                if self.spool is not None:
+                    # Coda esatta dallo spool: le righe saltate restano raggiungibili scorrendo in su
+                    self._first_line = max(0, self.spool.line_count - self.max_lines)
+                    text = self.spool.read_lines(self._first_line, self.spool.line_count + 1 - self._first_line)
+                else:
+                    text = f"[{skipped} lines skipped]\n{text}"
+            self.text.insert(tk.END, text)
+            self._trim()
+            self.text.config(state='disabled')
+            if at_bottom: self.text.see(tk.END)
+        except tk.TclError: pass
+    def _line_count(self):
+        return int(self.text.index('end-1c').split('.')[0])
+    def _trim(self):
+        line_count = self._line_count()
+        if line_count > self.max_lines + self.trim_chunk:
+            removed = line_count - self.max_lines
+            self.text.delete('1.0', f'{removed + 1}.0')
+            # _first_line segue le righe davvero tolte: non si ricava dal numero di righe del widget
+            self._first_line += removed
+
+    # --- paging dallo spool ---
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.spool is None or self._page_scheduled is not None: return
+        if float(first) <= 0.0 and self._first_line > 0:
+            self._page_scheduled = self.after_idle(self._page_older)
+        elif not self._live and float(last) >= 1.0:
+            self._page_scheduled = self.after_idle(self._page_newer)
+    def _page_older(self):
+        self._page_scheduled = None
+        if self.spool is None or self._first_line <= 0: return
+        self._flush_pending()
+        start = max(0, self._first_line - self.page_lines)
+        text = self.spool.read_lines(start, self._first_line - start)
+        if not text: return
+        added = self._first_line - start
+        try:
+            self.text.config(state='normal')
+            self.text.insert('1.0', text)
+            self._first_line = start
+            # Si sta leggendo lo storico: l'output nuovo resta nello spool (altrimenti _trim toglierebbe
+            # proprio le righe appena caricate) e si ricarica con _page_newer tornando in fondo
+            self._live = False
+            if self._line_count() - 1 > self.max_lines + self.trim_chunk:
+                self.text.delete(f'{self.max_lines + 1}.0', tk.END)
+            else:
+                # _page_newer riparte dalla prima riga non mostrata: niente riga incompleta in fondo
+                last = self.text.index('end-1c')
+                if not last.endswith('.0'): self.text.delete(f'{last} linestart', tk.END)
+            self.text.config(state='disabled')
+            self.text.yview(f'{added + 1}.0')
+        except tk.TclError: pass
+    def _page_newer(self):
+        self._page_scheduled = None
+        if self.spool is None or self._live: return
+        start = self._first_line + self._line_count() - 1
+        text = self.spool.read_lines(start, self.page_lines)
+        try:
+            self.text.config(state='normal')
+            self.text.insert(tk.END, text)
+            if start + self.page_lines >= self.spool.line_count:
+                self._live = True   # raggiunta la coda (inclusa l'eventuale riga incompleta)
+            line_count = self._line_count()
+            if line_count > self.max_lines + self.trim_chunk:
+                removed = line_count - self.max_lines
+                self.text.delete('1.0', f'{removed + 1}.0')
+                self._first_line += removed
+            self.text.config(state='disabled')
+        except tk.TclError: pass
+    def _show_spool_line(self, line):
+        shown = self._line_count() - 1
+        if not (self._first_line <= line < self._first_line + shown):
+            # Riga fuori dalla finestra: ricarica max_lines righe attorno
+            self._flush_pending()
+            first = max(0, line - self.max_lines // 2)
+            text = self.spool.read_lines(first, self.max_lines)
+            self.text.config(state='normal')
+            self.text.delete('1.0', tk.END)
+            self.text.insert('1.0', text)
+            self.text.config(state='disabled')
+            self._first_line = first
+            self._live = first + self.max_lines >= self.spool.line_count
+        index = f'{line - self._first_line + 1}.0'
+        self.text.tag_remove('found', '1.0', tk.END)
+        self.text.tag_add('found', index, f'{index} lineend')
+        self.text.see(index)
+    def find(self, needle):
+        """Finds the next occurrence of needle, including output no longer kept in the widget."""
+        if not needle: return False
+        if self.spool is None:
+            index = self.text.search(needle, 'found.last' if self.text.tag_ranges('found') else '1.0', stopindex=tk.END)
+            if not index: return False
+            self.text.tag_remove('found', '1.0', tk.END)
+            self.text.tag_add('found', index, f'{index}+{len(needle)}c')
+            self.text.see(index)
+            return True
+        # Nello spool a passi: True = ricerca avviata, il risultato arriva con _search_step
+        self._cancel_search()
+        start = self._last_found + 1
+        self._search = [needle, start, start > 0]
+        self._search_job = self.after_idle(self._search_step)
+        return True
+    def _search_step(self):
+        self._search_job = None
+        if self._search is None or self.spool is None: return
+        needle, start, wrap = self._search
+        line, next_line = self.spool.search(needle, start, self.SEARCH_CHUNK)
+        if line is None and next_line is None and wrap:
+            next_line, wrap = 0, False   # fine file: si riparte dall'inizio una volta
+        if line is None and next_line is not None:
+            self._search = [needle, next_line, wrap]
+            try: self._search_job = self.after_idle(self._search_step)
+            except tk.TclError: self._search = None
+            return
+        self._search = None
+        if line is None:
+            self.bell(); return
+        self._last_found = line
+        try: self._show_spool_line(line)
         except tk.TclError: pass
+    def _cancel_search(self):
+        self._search = None
+        if self._search_job is not None:
+            try: self.after_cancel(self._search_job)
+            except tk.TclError: pass
+            self._search_job = None
+    def _ask_find(self, event=None):
+        needle = simpledialog.askstring("Find in Output", "Text:", parent=self)
+        if needle: self.find(needle)
+        return "break"
+    def destroy(self):
+        self._cancel_search()
+        if self.spool is not None:
+            self.spool.close(); self.spool = None
+        while self.old_spools:
+            try: os.remove(self.old_spools.popleft())
+            except OSError: pass
+        super().destroy()
+
     def clear(self):
-        """Clears the console."""
+        """Clears the console and starts a new spool file; the previous one stays on disk (old_spools)."""
+        self._pending.clear(); self._pending_lines = 0; self._pending_skipped = None
+        self._cancel_search()
+        if self.spool is not None:
+            self.spool.close(delete=self.keep_spools == 0)
+            if self.keep_spools: self.old_spools.append(self.spool.path)
+            self.spool = None
+        while len(self.old_spools) > self.keep_spools:
+            try: os.remove(self.old_spools.popleft())
+            except OSError: pass
+        self._first_line = 0; self._live = True; self._last_found = -1
         if not self.winfo_exists(): return
         try:
             self.text.config(state='normal')
@@ -72,3 +346,37 @@ class ConsolePanel(tk.Frame):
         pass
     def _on_input_return(self, event):
         pass
+
+def _stress_benchmark(total_lines=1_000_000, chunk_lines=200):
+    """python -m gui.console [righe]: scrive total_lines righe e riporta latenza dei frame e RSS."""
+    import time, resource
+    root = tk.Tk()
+    panel = ConsolePanel(root)
+    panel.pack(fill='both', expand=True)
+    latencies = []
+    state = {'written': 0, 'last': time.perf_counter()}
+    def heartbeat():
+        now = time.perf_counter()
+        latencies.append(now - state['last'])
+        state['last'] = now
+        if state['written'] < total_lines or panel._pending: root.after(16, heartbeat)
+        else: root.quit()
+    def produce():
+        for _ in range(10):
+            n = min(chunk_lines, total_lines - state['written'])
+            if n <= 0: return
+            panel.write(''.join(f"line {state['written'] + i}\n" for i in range(n)))
+            state['written'] += n
+        root.after(1, produce)
+    t0 = time.perf_counter()
+    root.after(16, heartbeat); root.after(1, produce)
+    root.mainloop()
+    latencies.sort()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{total_lines} lines in {time.perf_counter() - t0:.2f}s; frame interval p50={latencies[len(latencies)//2]*1000:.1f} ms "
+          f"p99={latencies[int(len(latencies)*0.99)]*1000:.1f} ms max={latencies[-1]*1000:.1f} ms; max RSS {rss_mb:.0f} MB")
+    root.destroy()
+
+if __name__ == "__main__":
+    import sys
+    _stress_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
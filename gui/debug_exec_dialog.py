@@ -258,6 +258,7 @@ class DebugExecDialog(tk.Toplevel):
                         self.main_app_ref.config['debug_exec_dialog_config'] = updated_settings.copy()
                     self.main_app_ref.debug_exec_dialog_config = self.main_app_ref.config['debug_exec_dialog_config'].copy()
                     print(f"DebugExecDialog.on_close: Updated main_app_ref.debug_exec_dialog_config to: {self.main_app_ref.debug_exec_dialog_config}")
+                    if hasattr(self.main_app_ref, '_schedule_config_save'): self.main_app_ref._schedule_config_save()
                 except (tk.TclError, AttributeError) as e:
                     print(f"DebugExecDialog.on_close: Error getting/setting geometry/state for save: {e}")
                     traceback.print_exc()
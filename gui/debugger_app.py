@@ -5,6 +5,7 @@ import bdb
 from bdb import BdbQuit
 import time
 from multiprocessing import Process, Pipe
+from multiprocessing.connection import wait as wait_connections
 import tkinter as tk
 from tkinter import messagebox
 import tkinter.ttk as ttk
@@ -12,52 +13,258 @@ import io
 import builtins
 import threading
 import queue
+import itertools
+import weakref
 from functools import partial
 from gui.editor import CodeEditor
 from gui.console import ConsolePanel
-from gui.inspector import VariablesPanel
+from gui.inspector import VariablesPanel, VARIABLES_PAGE_SIZE
 from gui.stack import StackPanel
 from gui.custom_notebook import CustomNotebook
 from gui.input_dialog import InputDialog
+from gui.safe_repr import SafeRepr
+from gui.output_ring import OutputRing
 
-def _backend_process_main(script_path, child_cmd_conn, child_io_conn, breakpoints, script_args):
+# Classificazione dei code object usata da trace_dispatch (vedi _classify_code)
+CODE_LIBRARY = 0
+CODE_PROJECT = 1
+
+# sys.monitoring (PEP 669) esiste solo da Python 3.12
+HAS_SYS_MONITORING = hasattr(sys, 'monitoring')
+
+# Formato del messaggio 'pause_snapshot' (incrementare se cambiano i campi)
+PAUSE_SNAPSHOT_VERSION = 1
+
+def _backend_process_main(script_path, child_cmd_conn, child_io_conn, breakpoints, script_args, engine='auto', repr_limits=None, watch_timeout_ms=500, output_ring=None):
     # Funzione wrapper essenziale per il multiprocessing
     backend = DebuggerBackend(
         script_path_from_gui=script_path,
         cmd_conn=child_cmd_conn,
         io_conn=child_io_conn,
         breakpoints=breakpoints,
-        script_args=script_args
+        script_args=script_args,
+        engine=engine,
+        repr_limits=repr_limits,
+        watch_timeout_ms=watch_timeout_ms,
+        output_ring=output_ring
     )
     backend.start()
 
-class StdOutRedirect:
-    def __init__(self, conn):
+def _code_lines(code):
+    return frozenset(ln for _, _, ln in code.co_lines() if ln is not None)
+
+class BreakpointIndex:
+    """
+    Indice dei breakpoint per code object.
+    Per ogni file tiene i code object gia' eseguiti; `by_code` mappa id(code) alle righe
+    con breakpoint coperte dalla line table di quel code object (solo se non vuote).
+    I lettori (trace_dispatch, callback di sys.monitoring) non prendono lock: ogni
+    aggiornamento costruisce un nuovo dizionario e lo sostituisce in un solo assegnamento.
+    Le chiavi sono id(code) perche' l'hash di un code object e' calcolato sul contenuto
+    (costoso per i moduli grandi). I code object sono tenuti con weakref: quando uno viene
+    liberato le sue voci spariscono subito, prima che il suo id possa essere riutilizzato.
+    """
+    def __init__(self):
+        self.by_code = {}
+        self.lines_by_file = {}
+        self._codes_by_file = {}   # filename -> {id(code): weakref al code}
+        self._line_tables = {}     # id(code) -> frozenset delle righe del code object
+        # RLock: con sys.monitoring anche il codice eseguito qui dentro genera PY_START -> register()
+        self._lock = threading.RLock()
+
+    def register(self, code, filename):
+        with self._lock:
+            codes = self._codes_by_file.setdefault(filename, {})
+            ref = codes.get(id(code))
+            if ref is not None and ref() is code: return
+            codes[id(code)] = weakref.ref(code, partial(self._forget, filename, id(code)))
+            file_lines = self.lines_by_file.get(filename)
+            if file_lines:
+                hit = self._line_table(code) & file_lines
+                if hit:
+                    by_code = dict(self.by_code)
+                    by_code[id(code)] = hit
+                    self.by_code = by_code
+
+    def _forget(self, filename, key, ref):
+        # Callback della weakref: il code object e' stato liberato
+        with self._lock:
+            codes = self._codes_by_file.get(filename)
+            if codes is None or codes.get(key) is not ref: return
+            del codes[key]
+            if not codes: del self._codes_by_file[filename]
+            self._line_tables.pop(key, None)
+            if key in self.by_code:
+                by_code = dict(self.by_code)
+                del by_code[key]
+                self.by_code = by_code
+
+    def set_file_lines(self, filename, lines):
+        """Aggiorna i breakpoint di `filename` ricalcolando solo i suoi code object; li restituisce."""
+        with self._lock:
+            lines = frozenset(lines)
+            affected = [code for code in (ref() for ref in self._codes_by_file.get(filename, {}).values()) if code is not None]
+            tables = [(code, self._line_table(code)) for code in affected]
+            lines_by_file = dict(self.lines_by_file)
+            if lines: lines_by_file[filename] = lines
+            else: lines_by_file.pop(filename, None)
+            by_code = dict(self.by_code)
+            for code, table in tables:
+                hit = table & lines
+                if hit: by_code[id(code)] = hit
+                else: by_code.pop(id(code), None)
+            self.lines_by_file = lines_by_file
+            self.by_code = by_code
+            return affected
+
+    def _line_table(self, code):
+        table = self._line_tables.get(id(code))
+        if table is None:
+            table = self._line_tables[id(code)] = _code_lines(code)
+        return table
+
+class BufferedOutput:
+    """
+    Buffer condiviso da stdout e stderr del backend.
+    Le write consecutive sullo stesso stream vengono unite in un solo messaggio; l'ordine
+    tra stdout e stderr resta quello originale. Il buffer viene inviato quando supera
+    max_chars o max_lines, dopo max_delay secondi dalla prima write, e subito con flush()
+    (pausa, richiesta di input, fine dello script).
+    Con `ring` (OutputRing) il testo va nella memoria condivisa e sulla pipe passa solo
+    un ('output_ready',) per ogni flush che ha scritto testo nella ring, oppure
+    ('output_dropped',) se la ring ha accolto solo il marcatore dei byte persi.
+    Dopo un fork() il figlio non ha il flusher: li' ogni write va subito sulla pipe.
+    """
+    def __init__(self, conn, max_chars=64 * 1024, max_lines=1000, max_delay=0.05, ring=None):
         self.conn = conn
-    def write(self, text):
-        if text:
-            try: self.conn.send(('stdout', text))
-            except (OSError, EOFError, BrokenPipeError): pass
+        self.ring = ring
+        self.max_chars = max_chars
+        self.max_lines = max_lines
+        self.max_delay = max_delay
+        self._chunks = []   # [(stream, [testi])]
+        self._size = 0
+        self._lines = 0
+        self._closed = False
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._flusher = threading.Thread(target=self._flush_loop, name="DebuggerOutputFlusher", daemon=True)
+        self._flusher.start()
+        if hasattr(os, 'register_at_fork'):
+            ref = weakref.ref(self)
+            def call(name):
+                def hook():
+                    output = ref()
+                    if output is not None: getattr(output, name)()
+                return hook
+            os.register_at_fork(before=call('_before_fork'), after_in_parent=call('_after_fork_parent'),
+                                after_in_child=call('_after_fork_child'))
+
+    def write(self, stream, text):
+        if not text: return
+        # Lock C direttamente (non il Condition): sotto settrace ogni chiamata Python costa
+        with self._lock:
+            if self._closed:
+                self._chunks.append((stream, [text])); self._flush_locked(); return
+            was_empty = not self._chunks
+            if not was_empty and self._chunks[-1][0] == stream:
+                self._chunks[-1][1].append(text)
+            else:
+                self._chunks.append((stream, [text]))
+            self._size += len(text)
+            self._lines += text.count('\n')
+            if self._size >= self.max_chars or self._lines >= self.max_lines:
+                self._flush_locked()
+            elif was_empty:
+                self._cond.notify()   # fa partire il timer del flusher
+
     def flush(self):
-        pass
+        with self._cond: self._flush_locked()
+
+    def send(self, msg):
+        # Messaggi non di output sulla stessa pipe (es. richieste di input): prima svuota il buffer
+        with self._cond:
+            self._flush_locked()
+            self.conn.send(msg)
+
+    def close(self):
+        with self._cond:
+            self._flush_locked()
+            self._closed = True
+            self._cond.notify()
+            if self.ring is not None and self.ring.dropped:
+                # Ring ancora piena a fine script: il marcatore passa dalla pipe
+                self._send(('stderr', f"\n[{self.ring.dropped} bytes of output dropped]\n"))
+            self.ring = None   # eventuali write successive vanno direttamente sulla pipe
+
+    def _flush_locked(self):
+        chunks, self._chunks = self._chunks, []
+        self._size = self._lines = 0
+        if self.ring is not None:
+            stored = marked = False
+            for stream, parts in chunks:
+                text_in, marker_in = self.ring.write(stream, ''.join(parts))
+                stored, marked = stored or text_in, marked or marker_in
+            if stored: self._send(('output_ready',))
+            elif marked: self._send(('output_dropped',))
+            return
+        for stream, parts in chunks:
+            self._send((stream, ''.join(parts)))
+
+    def _before_fork(self):
+        # Lock tenuto durante il fork: il figlio non eredita un buffer a meta' o un lock del flusher
+        self._lock.acquire()
+        self._flush_locked()
+
+    def _after_fork_parent(self):
+        self._lock.release()
+
+    def _after_fork_child(self):
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._chunks = []
+        self._size = self._lines = 0
+        self._closed = True   # niente flusher: write() invia subito (vedi ramo _closed)
+        self.ring = None      # la ring ha un solo produttore, il processo genitore
+
+    def _send(self, msg):
+        try: self.conn.send(msg)
+        except (OSError, EOFError, BrokenPipeError): pass
+
+    def _flush_loop(self):
+        with self._cond:
+            while not self._closed:
+                if not self._chunks:
+                    self._cond.wait()
+                    continue
+                self._cond.wait(self.max_delay)
+                self._flush_locked()
+
+class StdOutRedirect:
+    def __init__(self, output):
+        self.output = output
+        # partial (C) invece di un metodo: sotto settrace ogni write costa una chiamata Python in meno
+        self.write = partial(output.write, 'stdout')
+    def flush(self):
+        self.output.flush()
 
 class StdErrRedirect:
-    def __init__(self, conn):
-        self.conn = conn
-    def write(self, text):
-        if text:
-            try: self.conn.send(('stderr', text))
-            except (OSError, EOFError, BrokenPipeError): pass
+    def __init__(self, output):
+        self.output = output
+        # partial (C) invece di un metodo: sotto settrace ogni write costa una chiamata Python in meno
+        self.write = partial(output.write, 'stderr')
     def flush(self):
-        pass
+        self.output.flush()
 
 class StdInRedirect:
-    def __init__(self, io_conn_obj):
+    def __init__(self, io_conn_obj, output=None):
         self.conn = io_conn_obj
+        self.output = output
     def readline_with_prompt(self, prompt_text_from_caller=""):
         unique_input_id = f"input_{time.time()}_{id(self)}"
         try:
-            self.conn.send(('gui_input_request_with_prompt', unique_input_id, str(prompt_text_from_caller)))
+            msg = ('gui_input_request_with_prompt', unique_input_id, str(prompt_text_from_caller))
+            if self.output is not None: self.output.send(msg)
+            else: self.conn.send(msg)
         except (OSError, BrokenPipeError, EOFError):
             raise EOFError("Debugger connection lost while requesting GUI input.")
         while True:
@@ -89,10 +296,88 @@ class StdInRedirect:
     def flush(self):
         pass
 
+class MonitoringEngine:
+    """
+    Esecuzione fino ai breakpoint con sys.monitoring (Python 3.12+).
+    Gli eventi LINE sono attivi solo sui code object che contengono breakpoint;
+    altrove PY_START/LINE restituiscono DISABLE e il codice gira a velocita' nativa.
+    Lo stepping resta a carico di bdb: alla pausa il backend riattiva settrace.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.mon = sys.monitoring
+        self.tool_id = sys.monitoring.DEBUGGER_ID
+        self._line_codes = set()   # code object con LINE abilitato
+        self._lock = threading.Lock()
+        self._installed = False
+
+    def install(self):
+        mon = self.mon
+        try: mon.use_tool_id(self.tool_id, "python_dbg_gui")
+        except ValueError: return False
+        mon.register_callback(self.tool_id, mon.events.PY_START, self._on_py_start)
+        mon.register_callback(self.tool_id, mon.events.LINE, self._on_line)
+        mon.set_events(self.tool_id, mon.events.PY_START)
+        self._installed = True
+        return True
+
+    def uninstall(self):
+        if not self._installed: return
+        self._installed = False
+        mon = self.mon
+        try:
+            mon.set_events(self.tool_id, 0)
+            with self._lock:
+                for code in self._line_codes:
+                    mon.set_local_events(self.tool_id, code, 0)
+                self._line_codes.clear()
+            mon.register_callback(self.tool_id, mon.events.PY_START, None)
+            mon.register_callback(self.tool_id, mon.events.LINE, None)
+            mon.free_tool_id(self.tool_id)
+        except ValueError: pass
+
+    def _set_lines_enabled(self, code, enabled):
+        with self._lock:
+            if enabled and code not in self._line_codes:
+                self.mon.set_local_events(self.tool_id, code, self.mon.events.LINE)
+                self._line_codes.add(code)
+            elif not enabled and code in self._line_codes:
+                self.mon.set_local_events(self.tool_id, code, 0)
+                self._line_codes.discard(code)
+
+    def _on_py_start(self, code, instruction_offset):
+        backend = self.backend
+        if backend.quitting: return self.mon.DISABLE
+        backend._classify_code(code)   # registra il code object nel BreakpointIndex
+        if id(code) in backend._bp_index.by_code:
+            self._set_lines_enabled(code, True)
+        return self.mon.DISABLE
+
+    def _on_line(self, code, line_number):
+        backend = self.backend
+        if backend.quitting: return self.mon.DISABLE
+        # Durante lo stepping gli eventi li gestisce settrace
+        if backend._tracing_active: return None
+        bp_lines = backend._bp_index.by_code.get(id(code))
+        if not bp_lines or line_number not in bp_lines: return self.mon.DISABLE
+        # I thread che valutano le watch non si fermano sui breakpoint
+        if threading.get_ident() in backend._untraced_threads: return None
+        backend._stop_from_monitoring(sys._getframe(1), line_number)
+        return None
+
+    def refresh_codes(self, codes):
+        # Breakpoint cambiati: set_local_events vale anche per i frame gia' in esecuzione
+        by_code = self.backend._bp_index.by_code
+        for code in codes:
+            self._set_lines_enabled(code, id(code) in by_code)
+        # Riattiva le location disabilitate con DISABLE (PY_START e righe ora con breakpoint)
+        self.mon.restart_events()
+
 class DebuggerBackend(bdb.Bdb):
-    def __init__(self, script_path_from_gui, cmd_conn, io_conn, breakpoints=None, script_args=None):
+    def __init__(self, script_path_from_gui, cmd_conn, io_conn, breakpoints=None, script_args=None, engine='auto', repr_limits=None, watch_timeout_ms=500, output_ring=None):
         super().__init__()
         self.main_script_path = self.canonic(script_path_from_gui)
+        self.main_script_dir = os.path.dirname(self.main_script_path)
         self.conn_to_gui = cmd_conn
         self.io_conn_to_gui = io_conn
         self.script_args = script_args if script_args is not None else []
@@ -106,58 +391,290 @@ class DebuggerBackend(bdb.Bdb):
         self._runtime_bp_lock = threading.RLock()
 
         self.dynamic_breakpoints = set()
+        # id(code) -> (weakref al code, CODE_LIBRARY / CODE_PROJECT): dipende solo dal filename
+        self._code_kinds = {}
+        self._bp_index = BreakpointIndex()
+
+        # 'monitoring' (sys.monitoring, 3.12+) oppure 'bdb' (settrace classico)
+        self.engine = 'monitoring' if engine in ('auto', 'monitoring') and HAS_SYS_MONITORING else 'bdb'
+        self._monitor = None
+        self._tracing_active = True
+        self._resume_point = None
+
+        # Tabella degli oggetti espandibili della pausa corrente: handle -> oggetto.
+        # Viene svuotata ad ogni pausa, quindi gli oggetti non restano vivi oltre.
+        self._var_handles = {}
+        self._repr_limits = repr_limits
+        self._var_repr = SafeRepr.from_config(repr_limits, call_with_timeout=self._call_with_timeout)
+
+        # Watch registrate dalla GUI ('set_watches'), valutate ad ogni pausa nel pause_snapshot
+        self._watch_exprs = []
+        self._watch_codes = {}
+        self._timed_out_watches = set()   # non si rivalutano finche' l'utente non le modifica
+        self._watch_timeout = max(0.01, float(watch_timeout_ms) / 1000.0)
+        # Thread di valutazione delle watch: non devono fermarsi sui breakpoint
+        self._untraced_threads = set()
 
         self.clear_all_breaks()
-        if breakpoints:
-            for lineno in breakpoints:
-                self.dynamic_breakpoints.add((self.main_script_path, int(lineno)))
-                self.set_break(self.main_script_path, int(lineno))
+        # Righe del main script oppure coppie (file, riga) per gli altri file aperti nella GUI
+        bp_files = {self.main_script_path}
+        for bp in breakpoints or ():
+            bp_file, lineno = (self.canonic(bp[0]), bp[1]) if isinstance(bp, (tuple, list)) else (self.main_script_path, bp)
+            self.dynamic_breakpoints.add((bp_file, int(lineno)))
+            self.set_break(bp_file, int(lineno))
+            bp_files.add(bp_file)
+        for bp_file in bp_files:
+            self._bp_index.set_file_lines(bp_file, self._file_breakpoint_lines(bp_file))
 
         self.original_builtin_input = None
         self.redirected_stdin_instance = None
+        self._output = None
+        self._output_ring_name = output_ring   # nome della SharedMemory creata dalla GUI (None = solo pipe)
 
     def canonic(self, filename):
         if not filename: return filename
         if filename.startswith("<") and filename.endswith(">"): return filename
-        return os.path.normcase(os.path.abspath(filename))
+        canonic = self.fncache.get(filename)
+        if not canonic:
+            canonic = os.path.normcase(os.path.abspath(filename))
+            self.fncache[filename] = canonic
+        return canonic
+
+    def _is_project_file(self, filename):
+        return filename == self.main_script_path or filename.startswith(self.main_script_dir)
+
+    def _file_breakpoint_lines(self, filename):
+        return {ln for f, ln in self.dynamic_breakpoints if f == filename}
+
+    def _classify_code(self, code):
+        entry = self._code_kinds.get(id(code))
+        if entry is not None and entry[0]() is code:
+            return entry[1]
+        filename = self.canonic(code.co_filename)
+        kind = CODE_PROJECT if self._is_project_file(filename) else CODE_LIBRARY
+        self._code_kinds[id(code)] = (weakref.ref(code, partial(self._forget_code_kind, id(code))), kind)
+        # user_line non si ferma mai nelle librerie: nell'indice bastano i file del progetto
+        if kind == CODE_PROJECT: self._bp_index.register(code, filename)
+        return kind
+
+    def _forget_code_kind(self, key, ref):
+        entry = self._code_kinds.get(key)
+        if entry is not None and entry[0] is ref: del self._code_kinds[key]
+
+    def _is_breakpoint_line(self, frame):
+        bp_lines = self._bp_index.by_code.get(id(frame.f_code))
+        return bool(bp_lines) and frame.f_lineno in bp_lines
+
+    def _arm_stack(self, frame):
+        # Riattiva il trace locale sui frame utente dello stack (servono gli eventi 'line'
+        # anche nei chiamanti che in continue non venivano tracciati)
+        f = frame
+        while f is not None:
+            if f.f_trace is None and self._classify_code(f.f_code) != CODE_LIBRARY:
+                f.f_trace = self.trace_dispatch
+            f = f.f_back
+
+    def _arm_running_frames(self, codes):
+        # Nuovo breakpoint in una funzione gia' in esecuzione senza trace locale
+        if not codes or self._monitor is not None: return
+        ids = {id(c) for c in codes}
+        for frame in sys._current_frames().values():
+            f = frame
+            while f is not None:
+                if id(f.f_code) in ids and f.f_trace is None:
+                    f.f_trace = self.trace_dispatch
+                f = f.f_back
 
     def _safe_repr(self, v):
+        return self._var_repr.summarize(v)[0]
+
+    def _describe_value(self, name, value):
+        # (nome, tipo, riepilogo, handle, troncato): l'handle e' None se il valore non ha figli
+        handle = None
+        if self._value_children_count(value):
+            handle = len(self._var_handles) + 1
+            self._var_handles[handle] = value
+        summary, truncated = self._var_repr.summarize(value)
+        return (name, type(value).__name__, summary, handle, truncated)
+
+    def _value_children_count(self, value):
         try:
-            s = repr(v)
-            return s[:200] + "..." if len(s) > 200 else s
-        except Exception as e:
-            return f"<repr error: {e}>"
+            if isinstance(value, (str, bytes, bytearray)): return 0
+            if isinstance(value, (dict, list, tuple, set, frozenset)): return len(value)
+            d = getattr(value, '__dict__', None)
+            return len(d) if isinstance(d, dict) and not callable(value) else 0
+        except Exception:
+            return 0
+
+    def _value_children(self, value, start, count):
+        if isinstance(value, dict):
+            items = ((self._safe_repr(k), v) for k, v in itertools.islice(value.items(), start, start + count))
+        elif isinstance(value, (list, tuple)):
+            items = ((f"[{i}]", v) for i, v in enumerate(value[start:start + count], start))
+        elif isinstance(value, (set, frozenset)):
+            items = ((f"[{i}]", v) for i, v in enumerate(itertools.islice(value, start, start + count), start))
+        else:
+            items = itertools.islice(sorted(vars(value).items(), key=lambda kv: str(kv[0])), start, start + count)
+        return [self._describe_value(str(k), v) for k, v in items]
 
     def _get_locals(self, frame):
-        return {str(k): self._safe_repr(v) for k, v in frame.f_locals.items() if not str(k).startswith('__')}
+        return [self._describe_value(str(k), v) for k, v in sorted(frame.f_locals.items(), key=lambda kv: str(kv[0]))
+                if not str(k).startswith('__')]
+
+    def _build_pause_snapshot(self, frame, filename):
+        stack = []
+        curr = frame
+        while curr:
+            stack.append((curr.f_code.co_filename, curr.f_lineno, curr.f_code.co_name))
+            curr = curr.f_back
+        self._var_handles = {}
+        self._var_repr.start_budget()
+        return {
+            'version': PAUSE_SNAPSHOT_VERSION,
+            'file': filename,
+            'line': frame.f_lineno,
+            'stack': stack,
+            'variables': {'locals': self._get_locals(frame), 'globals': []},
+            'watches': self._evaluate_watches(frame),
+        }
+
+    def _evaluate_watches(self, frame):
+        # expr -> (testo, successo), nell'ordine della Watch; tutte insieme hanno watch_timeout
+        deadline = time.perf_counter() + self._watch_timeout
+        results = {}
+        for expr in list(self._watch_exprs):
+            if expr in self._timed_out_watches:
+                results[expr] = ("<timed out earlier: edit the watch to evaluate it again>", False)
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                results[expr] = (f"<not evaluated: watches exceeded {int(self._watch_timeout * 1000)} ms>", False)
+                continue
+            results[expr] = self._eval_watch(expr, frame, remaining)
+        return results
+
+    def _eval_watch(self, expr, frame, timeout):
+        try:
+            code = self._watch_codes.get(expr)
+            if code is None:
+                code = self._watch_codes[expr] = compile(expr, '<watch>', 'eval')
+        except SyntaxError as e:
+            return (str(e), False)
+
+        outcome = self._call_with_timeout(
+            lambda: SafeRepr.from_config(self._repr_limits).summarize(eval(code, frame.f_globals, frame.f_locals))[0], timeout)
+        if outcome is None:
+            # Il thread puo' essere ancora in esecuzione: non se ne avvia un altro a ogni pausa
+            self._timed_out_watches.add(expr)
+            return (f"<timed out after {int(timeout * 1000)} ms>", False)
+        ok, value = outcome
+        return (value, True) if ok else (str(value), False)
+
+    def _call_with_timeout(self, func, timeout=None):
+        """
+        Esegue func in un thread non tracciato: se supera timeout (default watch_timeout) la pausa
+        prosegue senza aspettarlo. Restituisce (True, risultato), (False, eccezione) oppure None.
+        """
+        result = []
+        def worker():
+            sys.settrace(None)
+            ident = threading.get_ident()
+            self._untraced_threads.add(ident)
+            try:
+                result.append((True, func()))
+            except Exception as e:
+                result.append((False, e))
+            finally:
+                self._untraced_threads.discard(ident)
+        t = threading.Thread(target=worker, name="DebuggerWatchEval", daemon=True)
+        t.start()
+        t.join(self._watch_timeout if timeout is None else timeout)
+        return result[0] if result else None
+
+    def _completion_names(self, frame, expr):
+        # expr vuota: nomi visibili nel frame; altrimenti dir() dell'oggetto indicato dal nome
+        # puntato (solo lookup e getattr, nessuna eval di codice arbitrario)
+        if not expr:
+            names = set(frame.f_locals) | set(frame.f_globals) | set(dir(builtins))
+        else:
+            parts = expr.split('.')
+            for scope in (frame.f_locals, frame.f_globals, builtins.__dict__):
+                if parts[0] in scope:
+                    obj = scope[parts[0]]; break
+            else:
+                raise NameError(parts[0])
+            for part in parts[1:]:
+                obj = getattr(obj, part)
+            names = dir(obj)
+        return sorted(name for name in names if isinstance(name, str))
+
+    def _send_variable_children(self, arg):
+        # pause_seq torna indietro com'e': le maniglie ricominciano da 1 a ogni pausa
+        pause_seq, handle, start, count = arg
+        value = self._var_handles.get(handle)
+        self._var_repr.start_budget()
+        try:
+            if value is None: raise KeyError(handle)
+            children = self._value_children(value, int(start), min(int(count), VARIABLES_PAGE_SIZE))
+            total = self._value_children_count(value)
+        except Exception as e:
+            children, total = [("<error>", "", str(e), None, False)], 1
+        self.conn_to_gui.send(('variable_children', pause_seq, handle, int(start), children, total))
 
     def trace_dispatch(self, frame, event, arg):
-        if self.quitting:
+        if self.quitting or not self._tracing_active:
             return None
 
         if event == 'line':
-            filename = self.canonic(frame.f_code.co_filename)
-            lineno = frame.f_lineno
-            
-            with self._runtime_bp_lock:
-                is_bp = (filename, lineno) in self.dynamic_breakpoints
-            
-            if is_bp:
+            if self._resume_point is not None:
+                # La riga su cui si e' fermato sys.monitoring non va ripetuta da settrace
+                resume_point, self._resume_point = self._resume_point, None
+                if resume_point == (frame, frame.f_lineno):
+                    return self.trace_dispatch
+            bp_lines = self._bp_index.by_code.get(id(frame.f_code))
+            if bp_lines and frame.f_lineno in bp_lines:
                 self.set_step()
+            elif self.stoplineno == -1:
+                # Continue e nessun breakpoint su questa riga: bdb non fermerebbe comunque
+                return self.trace_dispatch
+
+        elif event == 'call' and self.botframe is not None:
+            kind = self._classify_code(frame.f_code)
+            if id(frame.f_code) not in self._bp_index.by_code:
+                # Le librerie non vengono mai tracciate riga per riga; in continue nemmeno
+                # le funzioni utente senza breakpoint (_arm_running_frames copre quelli nuovi)
+                if kind == CODE_LIBRARY or self.stoplineno == -1:
+                    return None
 
         res = super().trace_dispatch(frame, event, arg)
+        if not self._tracing_active:
+            return None
 
-        # Mantiene attivo il trace per le funzioni utente
-        if res is None and event == 'call':
-            filename = self.canonic(frame.f_code.co_filename)
-            main_dir = os.path.dirname(self.main_script_path)
-            if filename.startswith(main_dir) or filename == self.main_script_path:
-                return self.trace_dispatch
+        # Mantiene attivo il trace per le funzioni con breakpoint
+        if res is None and event == 'call' and id(frame.f_code) in self._bp_index.by_code:
+            return self.trace_dispatch
 
         return res
 
     def set_continue(self):
         self._set_stopinfo(self.botframe, None, -1)
+        if self._monitor is not None:
+            # Fino al prossimo breakpoint basta sys.monitoring
+            self._tracing_active = False
+            sys.settrace(None)
+
+    def _start_tracing(self, frame):
+        self._tracing_active = True
+        self._arm_stack(frame)
+        sys.settrace(self.trace_dispatch)
+
+    def _stop_from_monitoring(self, frame, lineno):
+        self.user_line(frame)
+        if self.quitting or (self.stopframe is self.botframe and self.stoplineno == -1):
+            return
+        # step / next / return: da qui in poi serve il trace riga per riga
+        self._resume_point = (frame, lineno)
+        self._start_tracing(frame)
 
     def set_quit(self):
         self.stopframe = self.botframe
@@ -169,7 +686,7 @@ class DebuggerBackend(bdb.Bdb):
         filename = self.canonic(frame.f_code.co_filename)
         
         # Filtro: Ignora file non del progetto
-        if not filename.startswith(os.path.dirname(self.main_script_path)) and filename != self.main_script_path:
+        if self._classify_code(frame.f_code) == CODE_LIBRARY:
             self.set_continue()
             return
 
@@ -185,25 +702,15 @@ class DebuggerBackend(bdb.Bdb):
                         is_f5_run = True
             except Exception: pass
             
-            with self._runtime_bp_lock:
-                is_bp = (filename, frame.f_lineno) in self.dynamic_breakpoints
-            
-            if is_f5_run and not is_bp and not self.break_here(frame):
+            if is_f5_run and not self._is_breakpoint_line(frame) and not self.break_here(frame):
                 self.set_continue()
                 return
 
         if not self._user_line_state_sent_this_pause:
+            self._arm_stack(frame.f_back)
+            if self._output is not None: self._output.flush()
             try:
-                self.conn_to_gui.send(('line', filename, frame.f_lineno))
-                
-                stack = []
-                curr = frame
-                while curr:
-                    stack.append((curr.f_code.co_filename, curr.f_lineno, curr.f_code.co_name))
-                    curr = curr.f_back
-                self.conn_to_gui.send(('stack', stack))
-
-                self.conn_to_gui.send(('variables', {'locals': self._get_locals(frame), 'globals': {}}))
+                self.conn_to_gui.send(('pause_snapshot', self._build_pause_snapshot(frame, filename)))
             except: pass
             self._user_line_state_sent_this_pause = True
 
@@ -219,9 +726,22 @@ class DebuggerBackend(bdb.Bdb):
                 elif cmd == 'eval':
                     try:
                         res = eval(arg, frame.f_globals, frame.f_locals)
+                        self._var_repr.start_budget()
                         self.conn_to_gui.send(('eval_result', arg, self._safe_repr(res), True))
                     except Exception as e:
                         self.conn_to_gui.send(('eval_result', arg, str(e), False))
+                elif cmd == 'refresh_watches':
+                    try: self.conn_to_gui.send(('watch_results', self._evaluate_watches(frame)))
+                    except Exception: pass
+                elif cmd == 'expand_variable':
+                    try: self._send_variable_children(arg)
+                    except Exception: pass
+                elif cmd == 'complete_names':
+                    pause_seq, expr = arg
+                    outcome = self._call_with_timeout(lambda: self._completion_names(frame, expr))
+                    names = outcome[1] if outcome and outcome[0] else []
+                    try: self.conn_to_gui.send(('completion_names', pause_seq, expr, names))
+                    except Exception: pass
                 elif cmd == 'execute_code_interactive':
                     try:
                         exec(arg, frame.f_globals, frame.f_locals)
@@ -231,6 +751,12 @@ class DebuggerBackend(bdb.Bdb):
             except queue.Empty:
                 continue
 
+    def _on_breakpoints_changed(self, affected_codes):
+        if self._monitor is not None:
+            self._monitor.refresh_codes(affected_codes)
+        else:
+            self._arm_running_frames(affected_codes)
+
     def _runtime_command_loop(self):
         while not self._runtime_stop_event.is_set():
             try:
@@ -247,6 +773,8 @@ class DebuggerBackend(bdb.Bdb):
                     with self._runtime_bp_lock:
                         self.dynamic_breakpoints.add((canon_path, int(fline)))
                         self.set_break(canon_path, int(fline))
+                        affected = self._bp_index.set_file_lines(canon_path, self._file_breakpoint_lines(canon_path))
+                    self._on_breakpoints_changed(affected)
                 
                 elif cmd == 'remove_breakpoint_runtime':
                     fname, fline = arg
@@ -254,7 +782,17 @@ class DebuggerBackend(bdb.Bdb):
                     with self._runtime_bp_lock:
                         self.dynamic_breakpoints.discard((canon_path, int(fline)))
                         self.clear_break(canon_path, int(fline))
+                        affected = self._bp_index.set_file_lines(canon_path, self._file_breakpoint_lines(canon_path))
+                    self._on_breakpoints_changed(affected)
                 
+                elif cmd == 'set_watches':
+                    self._watch_exprs = [str(e) for e in (arg or [])]
+                    # Una watch modificata ha un testo nuovo: quelle rimosse escono dal set
+                    self._timed_out_watches.intersection_update(self._watch_exprs)
+                    # In pausa: risultati subito, altrimenti arrivano col prossimo pause_snapshot
+                    if self._user_line_state_sent_this_pause:
+                        self._gui_cmd_queue.put(('refresh_watches', None))
+
                 else:
                     self._gui_cmd_queue.put((cmd, arg))
             except: break
@@ -262,6 +800,7 @@ class DebuggerBackend(bdb.Bdb):
     def start(self):
         _old_stdout, _old_stderr, _old_stdin = sys.stdout, sys.stderr, sys.stdin
         _old_cwd = os.getcwd()
+        ring = None
         if self.original_builtin_input is None: self.original_builtin_input = builtins.input
         
         try:
@@ -278,9 +817,13 @@ class DebuggerBackend(bdb.Bdb):
             # ===============================================
 
             sys.argv = [self.main_script_path] + self.script_args
-            sys.stdout = StdOutRedirect(self.io_conn_to_gui)
-            sys.stderr = StdErrRedirect(self.io_conn_to_gui)
-            self.redirected_stdin_instance = StdInRedirect(self.io_conn_to_gui)
+            if self._output_ring_name:
+                try: ring = OutputRing.attach(self._output_ring_name)
+                except (OSError, ValueError): ring = None
+            self._output = BufferedOutput(self.io_conn_to_gui, ring=ring)
+            sys.stdout = StdOutRedirect(self._output)
+            sys.stderr = StdErrRedirect(self._output)
+            self.redirected_stdin_instance = StdInRedirect(self.io_conn_to_gui, self._output)
             sys.stdin = self.redirected_stdin_instance
             builtins.input = lambda p="": self.redirected_stdin_instance.readline_with_prompt(p).rstrip('\n')
 
@@ -293,14 +836,28 @@ class DebuggerBackend(bdb.Bdb):
             
             globals_dict = {'__name__': '__main__', '__file__': self.main_script_path}
 
-            threading.settrace(self.trace_dispatch)
+            if self.engine == 'monitoring':
+                self.reset()
+                self._monitor = MonitoringEngine(self)
+                if not self._monitor.install():
+                    self._monitor = None; self.engine = 'bdb'
+            if self._monitor is None:
+                threading.settrace(self.trace_dispatch)
             self.runctx(code_obj, globals_dict, globals_dict)
 
         except (BdbQuit, SystemExit): pass
         except Exception:
-            try: self.conn_to_gui.send(('stderr', traceback.format_exc()))
+            try:
+                if self._output is not None: self._output.flush()
+                self.conn_to_gui.send(('stderr', traceback.format_exc()))
             except: pass
         finally:
+            if self._monitor is not None:
+                self._monitor.uninstall()
+            if self._output is not None:
+                self._output.close()
+            if ring is not None:
+                ring.close()
             self._runtime_stop_event.set()
             sys.stdout, sys.stderr, sys.stdin = _old_stdout, _old_stderr, _old_stdin
             builtins.input = self.original_builtin_input
@@ -309,13 +866,14 @@ class DebuggerBackend(bdb.Bdb):
             try: os.chdir(_old_cwd)
             except: pass
 
-            time.sleep(0.2)
             try:
                 self.conn_to_gui.send(('finished',))
                 self.conn_to_gui.close()
             except: pass
 
 class DebuggerApp:
+    MAX_MESSAGES_PER_TICK = 500
+
     def __init__(self, parent, main_app_ref=None):
         self.parent = parent
         self.main_app_ref = main_app_ref
@@ -330,11 +888,19 @@ class DebuggerApp:
         self.left_pane.add(self.notebook, weight=3)
         self.console_nb = ttk.Notebook(self.left_pane)
         self.left_pane.add(self.console_nb, weight=1)
-        self.output_panel = ConsolePanel(self.console_nb, app_ref=self)
+        console_max_lines, console_spool, console_spool_keep = 10000, True, 3
+        if self.main_app_ref and isinstance(getattr(self.main_app_ref, 'config', None), dict):
+            console_max_lines = self.main_app_ref.config.get('console_max_lines', 10000)
+            console_spool = self.main_app_ref.config.get('console_spool', True)
+            console_spool_keep = self.main_app_ref.config.get('console_spool_keep', 3)
+        self.output_panel = ConsolePanel(self.console_nb, app_ref=self, max_lines=console_max_lines, spool=console_spool,
+                                         keep_spools=console_spool_keep)
         self.console_nb.add(self.output_panel, text='Output/Input')
         self.right_pane = ttk.PanedWindow(self.main_pane, orient='vertical')
         self.main_pane.add(self.right_pane, weight=1)
         self.inspector = VariablesPanel(self.right_pane)
+        self.inspector.request_children = self.request_variable_children
+        self.inspector.on_watches_changed = self._sync_watches
         self.right_pane.add(self.inspector, weight=1)
         self.stack = StackPanel(self.right_pane)
         self.right_pane.add(self.stack, weight=1)
@@ -345,7 +911,19 @@ class DebuggerApp:
         self.on_finished = None
         self.interactive_exec_callback = None
         self._eval_callbacks = {}
-        self.parent.after(100, self._poll_debugger)
+        # Completamento semantico: cache per pausa (expr -> nomi ordinati) e richieste in corso
+        self._pause_seq = 0
+        self._completion_cache = {}
+        self._completion_waiters = {}
+
+        # Lettura event-driven delle pipe: un thread resta bloccato su connection.wait()
+        # e sveglia Tk con un evento virtuale solo quando arrivano messaggi
+        self._msg_queue = queue.Queue()
+        self._session_id = 0
+        self._reader_thread = None
+        self._output_ring = None   # OutputRing della sessione (config "output_transport": "ring")
+        self._wake_pending = False
+        self.parent.bind('<<DebuggerMessages>>', self._drain_messages, add='+')
         
     def add_breakpoint_runtime(self, bp_file: str, bp_line: int):
         if not self.dbg_conn: return False
@@ -367,12 +945,25 @@ class DebuggerApp:
 
         parent_cmd_conn, child_cmd_conn = Pipe()
         parent_io_conn, child_io_conn = Pipe()
+        config = self.main_app_ref.config if self.main_app_ref and isinstance(getattr(self.main_app_ref, 'config', None), dict) else {}
+        backend_options = {
+            'engine': config.get('debugger_engine', 'auto'),
+            'repr_limits': config.get('repr_limits'),
+            'watch_timeout_ms': config.get('watch_timeout_ms', 500),
+        }
+        ring = None
+        if config.get('output_transport') == 'ring':
+            try:
+                ring = OutputRing.create(int(config.get('output_ring_kb', 4096)) * 1024)
+                backend_options['output_ring'] = ring.name
+            except (OSError, ValueError): ring = None
 
         # IMPORTANTISSIMO: NON daemon.
         # Flask/Werkzeug (debug=True) può creare processi (reloader) e un processo daemon non può avere figli.
         self.dbg_proc = Process(
             target=_backend_process_main,
             args=(script_path, child_cmd_conn, child_io_conn, breakpoints, script_args),
+            kwargs=backend_options,
             name=f"DebuggerBackend-{os.path.basename(script_path)}",
             daemon=False
         )
@@ -386,6 +977,8 @@ class DebuggerApp:
 
             self.dbg_conn = parent_cmd_conn
             self.io_conn = parent_io_conn
+            self._start_reader(ring)
+            self._sync_watches()
 
             time.sleep(0.25)
             return True
@@ -403,6 +996,7 @@ class DebuggerApp:
             except Exception:
                 pass
             self.dbg_proc = None
+            if ring is not None: ring.close()
             return False
         
     def _get_script_and_breakpoints_from_active_tab(self):
@@ -416,6 +1010,10 @@ class DebuggerApp:
         script_to_run = getattr(editor_widget, 'filepath', None)
         if not script_to_run: messagebox.showwarning('Debugger', 'Selected file has no path. Please save it first.'); return None, None
         breakpoints = editor_widget.breakpoints
+        # Anche i breakpoint delle altre tab (comprese quelle non ancora caricate)
+        if self.main_app_ref is not None and hasattr(self.main_app_ref, 'collect_breakpoints'):
+            try: breakpoints = self.main_app_ref.collect_breakpoints()
+            except Exception: pass
         return script_to_run, breakpoints
 
     def run_project(self, script_args=None):
@@ -466,6 +1064,8 @@ class DebuggerApp:
         else: return False
 
     def stop_execution(self):
+        self._session_id += 1  # i messaggi ancora in coda della sessione chiusa vengono ignorati
+        self._close_output_ring()
         if self.dbg_proc and self.dbg_proc.is_alive():
             try: self.dbg_proc.terminate(); self.dbg_proc.join(timeout=0.5)
             except Exception: pass
@@ -477,6 +1077,29 @@ class DebuggerApp:
             except Exception: pass
         self.dbg_conn = None; self.dbg_proc = None; self.io_conn = None
 
+    def request_variable_children(self, handle, start, count):
+        if not self.dbg_conn: return False
+        try:
+            self.dbg_conn.send(('expand_variable', (self._pause_seq, handle, int(start), int(count))))
+            return True
+        except Exception: return False
+
+    def request_completions(self, expr: str, callback):
+        """
+        Names for completion in the paused frame: attributes of the dotted name `expr`, or the
+        frame's visible names when it is empty. Returns the sorted list if this pause already
+        has it cached; otherwise asks the backend, returns None and later calls callback(names).
+        """
+        names = self._completion_cache.get(expr)
+        if names is not None: return names
+        if not self.dbg_conn: return None
+        waiting = self._completion_waiters.setdefault(expr, [])
+        waiting.append(callback)
+        if len(waiting) == 1:
+            try: self.dbg_conn.send(('complete_names', (self._pause_seq, expr)))
+            except Exception: self._completion_waiters.pop(expr, None)
+        return None
+
     def evaluate_expression(self, expr: str):
         if self.dbg_conn: self.dbg_conn.send(('eval', expr)); return True
         else: return False
@@ -497,25 +1120,29 @@ class DebuggerApp:
         if not expr: return False
         try:
             if self.inspector and hasattr(self.inspector, "add_watch"):
-                ok = self.inspector.add_watch(expr)
-                if ok and self.main_app_ref and getattr(self.main_app_ref, "paused", False):
-                    self.parent.after_idle(self._refresh_watch_values)
-                return ok
+                return self.inspector.add_watch(expr)
         except Exception: return False
         return False
 
-    def _refresh_watch_values(self):
-        if not self.dbg_conn or not (self.main_app_ref and getattr(self.main_app_ref, "paused", False)): return
-        if not (self.inspector and hasattr(self.inspector, "get_watch_expressions")): return
-        try: exprs = list(self.inspector.get_watch_expressions() or [])
-        except Exception: exprs = []
-        for expr in exprs:
-            def _mk_cb(e):
-                return lambda _expr, val, success: (
-                    self.inspector.update_watch_value(e, val, success)
-                    if self.inspector and hasattr(self.inspector, "update_watch_value") else None
-                )
-            self.evaluate_expression_async(expr, _mk_cb(expr))
+    def remove_watch(self, expr: str):
+        try: return self.inspector.remove_watch(expr)
+        except Exception: return False
+
+    def refresh_watch(self):
+        self._sync_watches()
+
+    def _sync_watches(self):
+        # La lista delle watch vive nel backend: la inviamo ad ogni modifica (e all'avvio)
+        if not self.dbg_conn: return False
+        try:
+            self.dbg_conn.send(('set_watches', list(self.inspector.get_watch_expressions() or [])))
+            return True
+        except Exception: return False
+
+    def _update_watch_values(self, watches):
+        if not (watches and self.inspector.winfo_exists()): return
+        for expr, (val, success) in watches.items():
+            self.inspector.update_watch_value(expr, val, success)
 
     def evaluate_expression_from_window(self, code_to_exec, callback):
         if self.dbg_conn:
@@ -524,126 +1151,175 @@ class DebuggerApp:
             return True
         self.interactive_exec_callback = None; return False
         
-    def _poll_debugger(self):
-        process_died = False; connection_closed = False; msg = None
-        if self.dbg_proc and not self.dbg_proc.is_alive() and self.dbg_conn:
-            process_died = True; connection_closed = True
-        if self.dbg_conn or process_died:
-            can_poll = self.dbg_conn and not process_died; has_message = False
-            if can_poll:
-                 try: has_message = self.dbg_conn.poll(timeout=0)
-                 except (OSError, EOFError, BrokenPipeError): connection_closed = True; has_message = False
-            if has_message or process_died or connection_closed:
-                if process_died or connection_closed:
-                    if not has_message: msg = ('finished',) 
-                if has_message and self.dbg_conn:
-                     try: msg = self.dbg_conn.recv()
-                     except (EOFError, OSError, BrokenPipeError): msg = ('finished',); connection_closed = True
-                if msg:
-                    kind, *rest = msg
-                    if kind == 'line':
-                        fname, ln = rest
-                        if self.on_breakpoint_hit: self.on_breakpoint_hit(fname, ln)
-                    elif kind == 'stack':
-                         stack_data = rest[0] if rest else []
-                         if self.stack.winfo_exists(): self.stack.update_stack(stack_data)
-                    elif kind == 'variables':
-                         var_data = rest[0] if rest else {'locals':{}, 'globals':{}}
-                         if self.inspector.winfo_exists(): self.inspector.update_variables(var_data.get('locals'), var_data.get('globals'))
-                         try: self._refresh_watch_values()
-                         except Exception: pass
-                    elif kind == 'stdout':
-                        text, = rest
-                        if self.output_panel.winfo_exists(): self.output_panel.write(text)
-                    elif kind == 'stderr':
-                        text, = rest
-                        if self.output_panel.winfo_exists(): self.output_panel.write(text)
-                    elif kind == 'gui_input_request_with_prompt':
-                        input_id, prompt_from_backend = rest
-                        self.parent.after_idle(self.show_gui_input_dialog, input_id, "Script Input", prompt_from_backend)
-                    elif kind == 'gui_input_request': 
-                        input_id = rest[0]
-                        prompt_for_dialog = "Script requires input (check console for exact prompt):"
-                        self.parent.after_idle(self.show_gui_input_dialog, input_id, "Script Input", prompt_for_dialog)
-                    elif kind == "eval_expression_result":
-                        req_id, text = rest
-                        if self.main_app_ref and hasattr(self.main_app_ref, "_on_eval_expression_result"):
-                            self.main_app_ref._on_eval_expression_result(req_id, text)
-                    elif kind == 'eval_result':
-                        expr, val, success_flag = rest
-                        cb = None
-                        try:
-                            if expr in self._eval_callbacks and self._eval_callbacks[expr]:
-                                cb = self._eval_callbacks[expr].pop(0)
-                                if not self._eval_callbacks[expr]: del self._eval_callbacks[expr]
-                        except Exception: cb = None
-                        if cb:
-                            try: cb(expr, val, bool(success_flag))
-                            except Exception: pass
-                        else:
-                            if self.parent.winfo_exists():
-                                messagebox.showinfo('Evaluation Result', f"{expr} = {val}", parent=self.parent)
-                    elif kind == 'interactive_result':
-                        original_code, stdout_val, stderr_val, success, exc_str = rest
-                        if self.interactive_exec_callback:
-                            try: self.interactive_exec_callback(original_code, stdout_val, stderr_val, success, exc_str)
-                            except Exception: pass
-                            finally: self.interactive_exec_callback = None
-                    elif kind == 'breakpoint_runtime_status':
-                        try:
-                            status, bp_file, bp_line, msg = rest[0]
-                            if self.output_panel and self.output_panel.winfo_exists():
-                                self.output_panel.write(f"[runtime bp] {status} {bp_file}:{bp_line} {msg or ''}\n")
-                        except Exception: pass 
-                    elif kind == 'finished': connection_closed = True
-
-            if self.io_conn and self.dbg_proc and self.dbg_proc.is_alive():
+    def _start_reader(self, ring=None):
+        self._session_id += 1
+        self._output_ring = ring
+        self._reader_thread = threading.Thread(
+            target=self._reader_loop,
+            args=(self._session_id, self.dbg_conn, self.io_conn, self.dbg_proc.sentinel),
+            name="DebuggerPipeReader", daemon=True)
+        self._reader_thread.start()
+
+    def _reader_loop(self, session_id, cmd_conn, io_conn, proc_sentinel):
+        # Thread di lettura: nessuna chiamata Tk tranne event_generate per svegliare il mainloop
+        conns = [cmd_conn, io_conn]
+        waitables = conns + [proc_sentinel]
+        finished = False
+        while conns and not finished:
+            try:
+                ready = wait_connections(waitables)
+            except (OSError, ValueError):
+                break
+            for conn in ready:
+                if conn is proc_sentinel:
+                    # Processo terminato: quello che resta nelle pipe viene letto sotto
+                    finished = True; break
                 try:
-                    while self.io_conn.poll(timeout=0):
-                        msg2 = self.io_conn.recv()
-                        if not msg2: continue
-                        kind2, *rest2 = msg2
-                        if kind2 == 'stdout':
-                            (text,) = rest2
-                            if self.output_panel.winfo_exists(): self.output_panel.write(text)
-                        elif kind2 == 'stderr':
-                            (text,) = rest2
-                            if self.output_panel.winfo_exists(): self.output_panel.write(text)
-                        elif kind2 == 'breakpoint_runtime_status':
-                            try:
-                                status, bp_file, bp_line, msg = rest2[0]
-                                if self.output_panel and self.output_panel.winfo_exists():
-                                    self.output_panel.write(f"[runtime bp] {status} {bp_file}:{bp_line} {msg or ''}\n")
-                            except Exception: pass
-                        elif kind2 == 'gui_input_request_with_prompt':
-                            input_id, prompt_from_backend = rest2
-                            self.parent.after_idle(self.show_gui_input_dialog, input_id, "Script Input", prompt_from_backend)
-                        elif kind2 == 'gui_input_request':
-                            input_id = rest2[0] if rest2 else None
-                            prompt_for_dialog = "Script requires input (check console for exact prompt):"
-                            if input_id is not None:
-                                self.parent.after_idle(self.show_gui_input_dialog, input_id, "Script Input", prompt_for_dialog)
-                except (EOFError, OSError, BrokenPipeError): pass
-
-            if connection_closed:
-                 if self.dbg_conn:
-                     try: self.dbg_conn.close()
-                     except Exception: pass
-                 self.dbg_conn = None
-                 if self.io_conn:
-                     try: self.io_conn.close()
-                     except Exception: pass
-                 self.io_conn = None
-                 if self.dbg_proc and not process_died:
-                      if self.dbg_proc.is_alive():
-                           try: self.dbg_proc.terminate(); self.dbg_proc.join(timeout=0.2)
-                           except Exception: pass
-                 self.dbg_proc = None
-                 if self.on_finished: self.on_finished()
-        try:
-            if self.parent.winfo_exists(): self.parent.after(100, self._poll_debugger)
+                    msg = conn.recv()
+                except (EOFError, OSError, ValueError):
+                    conns.remove(conn); waitables.remove(conn)
+                    if conn is cmd_conn: finished = True
+                    continue
+                if not msg: continue
+                if conn is cmd_conn and msg[0] == 'finished':
+                    finished = True; continue   # accodato sotto, dopo l'output rimasto
+                self._msg_queue.put((session_id, msg))
+            self._wake_gui()
+        # Output ancora nelle pipe dopo 'finished' (il backend lo invia prima di chiudere)
+        for c in conns:
+            try:
+                while c.poll(0):
+                    msg = c.recv()
+                    if msg and msg[0] != 'finished': self._msg_queue.put((session_id, msg))
+            except (EOFError, OSError, ValueError): pass
+        self._msg_queue.put((session_id, ('finished',)))
+        self._wake_gui()
+
+    def _wake_gui(self):
+        if self._wake_pending: return
+        self._wake_pending = True
+        try: self.parent.event_generate('<<DebuggerMessages>>', when='tail')
+        except (tk.TclError, RuntimeError): self._wake_pending = False
+
+    def _drain_messages(self, event=None):
+        self._wake_pending = False
+        for _ in range(self.MAX_MESSAGES_PER_TICK):
+            try: session_id, msg = self._msg_queue.get_nowait()
+            except queue.Empty: return
+            if session_id != self._session_id: continue
+            if self._dispatch_message(msg):
+                self._end_session()
+        # Ancora messaggi: continua al prossimo giro del mainloop, senza bloccare Tk
+        try: self.parent.after_idle(self._drain_messages)
         except tk.TclError: pass
 
+    def _read_output_ring(self):
+        # La ring si legge solo dal thread Tk: se la GUI resta indietro si riempie e il
+        # backend scarta l'output (con marcatore) invece di accumularlo in memoria
+        if self._output_ring is None: return
+        for stream, text in self._output_ring.read_all():
+            if self.output_panel.winfo_exists(): self.output_panel.write(text)
+
+    def _close_output_ring(self):
+        if self._output_ring is not None:
+            self._output_ring.close()
+            self._output_ring = None
+
+    def _end_session(self):
+        self._read_output_ring()
+        self._close_output_ring()
+        self._session_id += 1
+        if self.dbg_conn:
+            try: self.dbg_conn.close()
+            except Exception: pass
+        self.dbg_conn = None
+        if self.io_conn:
+            try: self.io_conn.close()
+            except Exception: pass
+        self.io_conn = None
+        if self.dbg_proc:
+            if self.dbg_proc.is_alive():
+                try: self.dbg_proc.terminate(); self.dbg_proc.join(timeout=0.2)
+                except Exception: pass
+        self.dbg_proc = None
+        if self.on_finished: self.on_finished()
+
+    def _dispatch_message(self, msg):
+        """Gestisce un messaggio del backend; restituisce True per 'finished'."""
+        kind, *rest = msg
+        if kind in ('output_ready', 'output_dropped'):
+            self._read_output_ring()
+        elif kind == 'pause_snapshot':
+            self._apply_pause_snapshot(rest[0] if rest else {})
+        elif kind == 'watch_results':
+            self._update_watch_values(rest[0] if rest else {})
+        elif kind == 'variable_children':
+             pause_seq, handle, start, children, total = rest
+             if pause_seq != self._pause_seq: return False   # maniglia di una pausa precedente
+             if self.inspector.winfo_exists(): self.inspector.add_children(handle, start, children, total)
+        elif kind in ('stdout', 'stderr'):
+            text, = rest
+            if self.output_panel.winfo_exists(): self.output_panel.write(text)
+        elif kind == 'gui_input_request_with_prompt':
+            input_id, prompt_from_backend = rest
+            self.parent.after_idle(self.show_gui_input_dialog, input_id, "Script Input", prompt_from_backend)
+        elif kind == 'gui_input_request':
+            input_id = rest[0] if rest else None
+            prompt_for_dialog = "Script requires input (check console for exact prompt):"
+            if input_id is not None:
+                self.parent.after_idle(self.show_gui_input_dialog, input_id, "Script Input", prompt_for_dialog)
+        elif kind == "eval_expression_result":
+            req_id, text = rest
+            if self.main_app_ref and hasattr(self.main_app_ref, "_on_eval_expression_result"):
+                self.main_app_ref._on_eval_expression_result(req_id, text)
+        elif kind == 'eval_result':
+            expr, val, success_flag = rest
+            cb = None
+            try:
+                if expr in self._eval_callbacks and self._eval_callbacks[expr]:
+                    cb = self._eval_callbacks[expr].pop(0)
+                    if not self._eval_callbacks[expr]: del self._eval_callbacks[expr]
+            except Exception: cb = None
+            if cb:
+                try: cb(expr, val, bool(success_flag))
+                except Exception: pass
+            else:
+                if self.parent.winfo_exists():
+                    messagebox.showinfo('Evaluation Result', f"{expr} = {val}", parent=self.parent)
+        elif kind == 'completion_names':
+            pause_seq, expr, names = rest
+            if pause_seq != self._pause_seq: return False   # risposta di una pausa precedente
+            self._completion_cache[expr] = names
+            for callback in self._completion_waiters.pop(expr, []):
+                try: callback(names)
+                except Exception: pass
+        elif kind == 'interactive_result':
+            self._completion_cache.clear()   # il codice eseguito puo' aver cambiato i nomi
+            original_code, stdout_val, stderr_val, success, exc_str = rest
+            if self.interactive_exec_callback:
+                try: self.interactive_exec_callback(original_code, stdout_val, stderr_val, success, exc_str)
+                except Exception: pass
+                finally: self.interactive_exec_callback = None
+        elif kind == 'breakpoint_runtime_status':
+            try:
+                status, bp_file, bp_line, msg = rest[0]
+                if self.output_panel and self.output_panel.winfo_exists():
+                    self.output_panel.write(f"[runtime bp] {status} {bp_file}:{bp_line} {msg or ''}\n")
+            except Exception: pass
+        elif kind == 'finished': return True
+        return False
+
+    def _apply_pause_snapshot(self, snap):
+        # Un solo messaggio per pausa: posizione, stack, variabili (e watch) insieme
+        if snap.get('version') != PAUSE_SNAPSHOT_VERSION: return
+        self._pause_seq += 1
+        self._completion_cache.clear(); self._completion_waiters.clear()
+        if self.on_breakpoint_hit: self.on_breakpoint_hit(snap['file'], snap['line'])
+        if self.stack.winfo_exists(): self.stack.update_stack(snap.get('stack') or [])
+        var_data = snap.get('variables') or {}
+        if self.inspector.winfo_exists(): self.inspector.update_variables(var_data.get('locals'), var_data.get('globals'))
+        self._update_watch_values(snap.get('watches'))
+
     def show_gui_input_dialog(self, input_id, title, prompt_text_for_dialog):
         if not self.parent.winfo_exists():
             if self.io_conn: self.io_conn.send(('gui_input_response', input_id, '\n'))
@@ -660,4 +1336,141 @@ class DebuggerApp:
         if self.main_app_ref and hasattr(self.main_app_ref, 'get_active_editor_text_widget'):
             active_text_widget = self.main_app_ref.get_active_editor_text_widget()
             if active_text_widget and active_text_widget.winfo_exists():
-                active_text_widget.focus_set()
\ No newline at end of file
+                active_text_widget.focus_set()
+
+
+def _output_benchmark(total_lines=100_000, transport='pipe', engine='auto'):
+    """python -m gui.debugger_app [righe] [pipe|ring] [engine]: righe/s di uno script che stampa, e messaggi sulla pipe io."""
+    import tempfile
+    with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as f:
+        f.write(f"for i in range({int(total_lines)}):\n    print('line', i)\n")
+        script = f.name
+    ring = OutputRing.create(4096 * 1024) if transport == 'ring' else None
+    parent_cmd, child_cmd = Pipe()
+    parent_io, child_io = Pipe()
+    options = {'engine': engine, 'output_ring': ring.name if ring else None}
+    proc = Process(target=_backend_process_main, args=(script, child_cmd, child_io, [], []), kwargs=options)
+    t0 = time.perf_counter()
+    proc.start()
+    parent_cmd.send(('continue', None))
+    messages, lines, finished = 0, 0, False
+    try:
+        while not finished:
+            for conn in wait_connections([parent_cmd, parent_io], timeout=60):
+                try: msg = conn.recv()
+                except EOFError: finished = True; break
+                if conn is parent_cmd:
+                    finished = finished or msg[0] == 'finished'
+                    continue
+                messages += 1
+                if msg[0] == 'stdout': lines += msg[1].count('\n')
+                elif msg[0] in ('output_ready', 'output_dropped') and ring is not None:
+                    lines += sum(text.count('\n') for stream, text in ring.read_all() if stream == 'stdout')
+        while parent_io.poll(0.2):   # output rimasto dopo 'finished'
+            msg = parent_io.recv(); messages += 1
+            if msg[0] == 'stdout': lines += msg[1].count('\n')
+        if ring is not None: lines += sum(text.count('\n') for stream, text in ring.read_all() if stream == 'stdout')
+        elapsed = time.perf_counter() - t0
+    finally:
+        proc.join(5)
+        if proc.is_alive(): proc.terminate()
+        if ring is not None: ring.close()
+        os.remove(script)
+    print(f"{transport}/{engine}: {lines} of {total_lines} lines in {elapsed:.2f}s = {lines / elapsed:,.0f} lines/s; "
+          f"{messages} io messages")
+    return lines == total_lines
+
+
+_TRACE_TARGET = """import fractions, sys, time
+def numeric(n):
+    total = 0
+    for i in range(n):
+        total += i * i % 7
+    return total
+def library(n):
+    return sum(fractions.Fraction(i, 3) for i in range(n))
+times = []
+for func, n in ((numeric, {iterations}), (library, {iterations} // 100)):
+    t0 = time.perf_counter(); func(n); times.append(time.perf_counter() - t0)
+with open(sys.argv[1], 'w') as f: f.write(' '.join(map(str, times)))
+"""
+
+# Eseguito in un interprete separato: il backend viene importato da `tree`, che puo' essere
+# un'altra copia del repository (es. un commit precedente, per il confronto prima/dopo)
+_TRACE_DRIVER = """import inspect, sys, threading
+sys.path.insert(0, sys.argv[1])
+from multiprocessing import Pipe
+from gui.debugger_app import _backend_process_main
+script, out_path, engine = sys.argv[2:5]
+gui_cmd, cmd = Pipe()
+gui_io, io = Pipe()
+def answer():
+    # Ogni pausa (anche quella iniziale) riceve 'continue'; l'output si scarta
+    while True:
+        try: msg = gui_cmd.recv()
+        except EOFError: return
+        if msg[0] == 'finished': return
+        if msg[0] in ('line', 'pause_snapshot'): gui_cmd.send(('continue', None))
+def drain():
+    while True:
+        try: gui_io.recv()
+        except EOFError: return
+threading.Thread(target=answer, daemon=True).start()
+threading.Thread(target=drain, daemon=True).start()
+gui_cmd.send(('continue', None))
+if 'engine' in inspect.signature(_backend_process_main).parameters: kwargs = {'engine': engine}
+elif engine == 'bdb': kwargs = {}
+else: sys.exit(3)   # backend senza scelta del motore
+_backend_process_main(script, cmd, io, [], [out_path], **kwargs)
+"""
+
+def _trace_benchmark(iterations=300_000, tree=None):
+    """
+    python -m gui.debugger_app trace [iterazioni] [tree]: costo del tracing in continue senza
+    breakpoint, su un ciclo numerico e su uno che chiama la stdlib (fractions), senza debugger
+    e sotto il backend con ciascun motore. Con `tree` il backend e' quello di un'altra copia
+    del repository (git worktree di un commit precedente) per il confronto prima/dopo.
+    """
+    import subprocess
+    import tempfile
+    tree = os.path.abspath(tree or os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    workdir = tempfile.mkdtemp(prefix="pydbg_trace_")
+    script, out_path = os.path.join(workdir, "loop.py"), os.path.join(workdir, "times.txt")
+    with open(script, 'w') as f: f.write(_TRACE_TARGET.format(iterations=int(iterations)))
+    runs = [('bare', [sys.executable, script, out_path])]
+    for engine in ('bdb', 'monitoring') if HAS_SYS_MONITORING else ('bdb',):
+        runs.append((engine, [sys.executable, '-c', _TRACE_DRIVER, tree, script, out_path, engine]))
+    results = {}
+    try:
+        for name, cmd in runs:
+            if os.path.exists(out_path): os.remove(out_path)
+            proc = subprocess.run(cmd, cwd=workdir, timeout=600, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            if proc.returncode == 3: continue
+            try:
+                with open(out_path) as f: results[name] = [float(t) for t in f.read().split()]
+            except (OSError, ValueError): results[name] = None
+    finally:
+        for path in (script, out_path):
+            if os.path.exists(path): os.remove(path)
+        os.rmdir(workdir)
+    bare = results.get('bare')
+    print(f"Python {sys.version.split()[0]}, backend from {tree}")
+    for name, times in results.items():
+        if times is None:
+            print(f"  {name:<10} failed"); continue
+        cols = []
+        for label, t, b in zip(("numeric", "library"), times, bare or times):
+            cols.append(f"{label} {t:.3f}s" + (f" (x{t / b:.1f})" if name != 'bare' and b else ""))
+        print(f"  {name:<10} " + "   ".join(cols))
+    return all(times is not None for times in results.values())
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['trace']:
+        ok = _trace_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 300_000,
+                              sys.argv[3] if len(sys.argv) > 3 else None)
+    else:
+        ok = _output_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+                               sys.argv[2] if len(sys.argv) > 2 else 'pipe',
+                               sys.argv[3] if len(sys.argv) > 3 else 'auto')
+    sys.exit(0 if ok else 1)
@@ -1,11 +1,14 @@
 import tkinter as tk
 from tkinter import ttk
 import tkinter.font as tkfont
-import keyword
 import re
 import sys
+from gui.syntax import SyntaxHighlighter, install_edit_hook
+from gui.completion import DocumentWords, shared_word_index, prefix_matches
 MIN_FONT_SIZE = 8
 MAX_FONT_SIZE = 24
+HIGHLIGHT_SLICE_S = 0.008   # lavoro di evidenziazione in background per ciclo idle (< un frame)
+WORDS_REFRESH_MS = 1000     # ritardo con cui le righe modificate entrano nell'indice delle parole
 class CodeEditor(tk.Frame):
     def __init__(self, master, main_app_ref=None):
         super().__init__(master)
@@ -19,11 +22,9 @@ class CodeEditor(tk.Frame):
         self.completion_active = False
         self.potential_completions = []
         self.completion_word_start_index = None
-        self.python_keywords = keyword.kwlist + keyword.softkwlist
-        self.python_builtins = [b for b in dir(__builtins__) if not b.startswith('_')]
-        self._base_known_words = sorted(list(set(self.python_keywords + self.python_builtins)))
-        self.document_words = set()
-        self.all_known_words = list(self._base_known_words)
+        self.word_index = shared_word_index()
+        self._document_words = DocumentWords(self.word_index)
+        self._words_job = None
         self.bg_color = "white"
         self.fg_color = "black"
         self.insert_bg_color = "black"
@@ -63,7 +64,11 @@ class CodeEditor(tk.Frame):
         self.text.bind('<Shift-MouseWheel>', lambda e: self._on_mousewheel(e, 'x'), add='+')
         self.gutter.bind('<Button-1>', self._on_gutter_click)
         self.gutter.bind('<Double-Button-1>', self._on_gutter_double_click)
-        self._compile_syntax_patterns()
+        self._gutter_slots = []       # [text_id, rect_id, riga, y, breakpoint] riusati tra un refresh e l'altro
+        self._gutter_fg_in_use = None
+        self.highlighter = SyntaxHighlighter(self.text)
+        self.search_matches = None    # indice delle occorrenze del dialogo di ricerca (EditorMatches)
+        install_edit_hook(self.text, self._on_text_edited)
         self._apply_default_syntax_colors()
         self.text.tag_configure('current_line', background='#e6e6e6')
         self.text.tag_configure('breakpoint_line', background='#ffdddd')
@@ -88,9 +93,10 @@ class CodeEditor(tk.Frame):
         self.text.bind("<KeyPress-Down>", self._on_arrow_key_for_completion, add='+')
         self.text.bind("<Button-1>", self._on_click_for_completion, add='+')
         self._highlight_job = None
+        self._bg_highlight_job = None
+        self.bind('<Map>', self._update_gutter_and_highlight, add='+')
         self._debugger_active_line = None                                 
         self.after(50, self._update_gutter_and_highlight)
-        self.after(5000, lambda: self._update_document_words_safely())
     def _apply_default_syntax_colors(self):
         for tag, color in self.syntax_colors.items():
             font_config = self.current_font
@@ -136,26 +142,13 @@ class CodeEditor(tk.Frame):
         self._update_gutter_and_highlight()                                  
     def _on_release_1(self, event=None):
         self.after_idle(self._update_gutter) 
-    def _compile_syntax_patterns(self):
-        kwlist = keyword.kwlist + keyword.softkwlist
-        builtins_list = dir(__builtins__)
-        self._syntax_patterns_ordered = [
-            ('string', r'("""(?:.|\n)*?""")|(\'\'\'(?:.|\n)*?\'\'\')|(".*?")|(\'.*?\')'),
-            ('function', r'\bdef\s+([a-zA-Z_]\w*)'), 
-            ('class', r'\bclass\s+([a-zA-Z_]\w*)'),
-            ('decorator', r'@\w+'),
-            ('keyword', r'\b(' + '|'.join(kwlist) + r')\b'),
-            ('builtin', r'\b(' + '|'.join(b for b in builtins_list if not b.startswith('_')) + r')\b'),
-            ('self', r'\b(self|cls)\b'), 
-            ('number', r'\b-?\d+\.?\d*(?:[eE][-+]?\d+)?\b'), 
-            ('comment', r'#.*'), 
-        ]
-        self._compiled_patterns = {}
-        for tag, pattern_str in self._syntax_patterns_ordered:
-            flags = re.DOTALL if tag == 'string' else 0
-            self._compiled_patterns[tag] = re.compile(pattern_str, flags)
-        self._highlight_order = ['comment'] +\
-                                [tag for tag, _ in self._syntax_patterns_ordered if tag != 'comment']
+    def _on_text_edited(self, line, delta):
+        self.highlighter.on_edit(line, delta)
+        self._document_words.on_edit(line, delta)
+        if self.search_matches is not None: self.search_matches.on_edit(line, delta)
+        # Solo gli editor modificati rileggono parole, e solo le righe toccate
+        if self._words_job is None:
+            self._words_job = self.after(WORDS_REFRESH_MS, self._update_document_words)
     def _on_text_change(self, event=None):
         if self.text.edit_modified():
             if not self.dirty:
@@ -171,14 +164,27 @@ class CodeEditor(tk.Frame):
             self._hide_completion_listbox(); return
         self._handle_completion_check()
     def _trigger_highlight_update(self):
-        if self._highlight_job: self.after_cancel(self._highlight_job)
-        self._highlight_job = self.after(150, self._highlight_syntax_visible_wrapper)                     
+        # Niente debounce: la vista costa solo le righe non ancora colorate
+        if self._highlight_job is None:
+            self._highlight_job = self.after_idle(self._highlight_syntax_visible_wrapper)
     def _highlight_syntax_visible_wrapper(self):
         self._highlight_job = None
         if self.winfo_exists():
             self._update_gutter() 
             self._highlight_syntax_visible()
             self._ensure_debugger_line_is_current() 
+            if self._bg_highlight_job is None:
+                self._bg_highlight_job = self.after_idle(self._highlight_in_background)
+    def _highlight_in_background(self):
+        """Colora il resto del file a fette di HIGHLIGHT_SLICE_S, dalla vista verso l'esterno.
+        Ogni fetta e' un callback idle separato, quindi tasti e scroll passano prima."""
+        self._bg_highlight_job = None
+        if not self.winfo_exists() or not self.winfo_ismapped(): return
+        try:
+            first_line, last_line = self._visible_line_range()
+            if self.highlighter.highlight_outward(first_line, last_line, HIGHLIGHT_SLICE_S):
+                self._bg_highlight_job = self.after_idle(self._highlight_in_background)
+        except (tk.TclError, ValueError): pass
     def _ensure_debugger_line_is_current(self):
         """
         Re-applica la riga gialla dopo refresh/syntax-highlight/scroll,
@@ -240,23 +246,35 @@ class CodeEditor(tk.Frame):
     def _on_completion_select_mouse(self, event):
         self._apply_completion(from_keyboard=False); self.text.focus_set(); return "break"
     def _handle_completion_check(self):
-        if not hasattr(self, 'all_known_words'): return
         try:
             if self.text.tag_ranges("sel"): self._hide_completion_listbox(); return
             cursor_index = self.text.index(tk.INSERT)
             line_start = self.text.index(f"{cursor_index} linestart")
             text_before_cursor = self.text.get(line_start, cursor_index)
-            match = re.search(r'([a-zA-Z_][a-zA-Z_0-9]*)$', text_before_cursor)
-            if match:
-                current_word = match.group(1)
-                if len(current_word) >= 2:
-                    suggestions = [w for w in self.all_known_words if w.startswith(current_word) and w != current_word]
-                    if suggestions:
-                        self.completion_word_start_index = self.text.index(f"{cursor_index} - {len(current_word)}c")
-                        self._show_completion_listbox(suggestions, current_word); return
+            # "obj.attr.pre": owner = "obj.attr" (attributi dal debugger in pausa), parola = "pre"
+            match = re.search(r'((?:[a-zA-Z_][a-zA-Z_0-9]*\.)*)([a-zA-Z_][a-zA-Z_0-9]*)?$', text_before_cursor)
+            owner, current_word = match.group(1)[:-1], match.group(2) or ''
+            suggestions = []
+            if owner or len(current_word) >= 2:
+                names = self._semantic_names(owner)
+                if names: suggestions = prefix_matches(names, current_word, hide_private=True)
+            if not owner and len(current_word) >= 2:
+                known = set(suggestions)
+                suggestions += [w for w in self.word_index.complete(current_word) if w not in known]
+            if suggestions:
+                self.completion_word_start_index = self.text.index(f"{cursor_index} - {len(current_word)}c")
+                self._show_completion_listbox(suggestions, current_word); return
             self._hide_completion_listbox()
         except tk.TclError: self._hide_completion_listbox()
         except Exception: self._hide_completion_listbox()
+    def _semantic_names(self, owner):
+        """Nomi dal frame in pausa (cache per pausa nel DebuggerApp); None se non disponibili subito."""
+        if not self.main_app_ref or not hasattr(self.main_app_ref, 'request_completions'): return None
+        def on_names(names):
+            # Risposta arrivata dopo il tasto: ricalcola se l'editor ha ancora il focus
+            if self.winfo_exists() and self.focus_get() is self.text:
+                self.after_idle(self._handle_completion_check)
+        return self.main_app_ref.request_completions(owner, on_names)
     def _show_completion_listbox(self, suggestions, current_word_part):
         if not self.winfo_exists(): return
         try: x, y, _, height = self.text.bbox(tk.INSERT)
@@ -392,6 +410,13 @@ class CodeEditor(tk.Frame):
                 try: self.text.tag_remove('breakpoint_line', start_idx, end_idx)
                 except tk.TclError: pass
         self._breakpoints.clear(); self._update_gutter()
+    def refresh_breakpoint_tags(self):
+        """Riapplica 'breakpoint_line' alle righe con breakpoint (dopo sostituzioni su piu' righe)."""
+        for ln in self._breakpoints:
+            start_idx, end_idx = self._get_line_tag_range(ln)
+            if start_idx and end_idx:
+                try: self.text.tag_add('breakpoint_line', start_idx, end_idx)
+                except tk.TclError: pass
     def _get_word_under_cursor(self):
         """Ritorna l'identificatore Python sotto il cursore (o None)."""
         try:
@@ -594,10 +619,10 @@ class CodeEditor(tk.Frame):
         print("[editor] notify_breakpoint_change", self.filepath, line_number, action_taken,
             "is_running=", getattr(self.main_app_ref, "is_running", None))
 
-        # Notifica SEMPRE se il debug è in esecuzione (paused o running)
+        # Notifica SEMPRE: la main app salva il breakpoint e, se il debug è attivo, lo inoltra
         if self.main_app_ref and hasattr(self.main_app_ref, 'notify_breakpoint_change'):
             try:
-                if self.main_app_ref.is_running and self.filepath and action_taken:
+                if self.filepath and action_taken:
                     self.main_app_ref.notify_breakpoint_change(self.filepath, line_number, action_taken)
             except Exception:
                 pass
@@ -672,66 +697,70 @@ class CodeEditor(tk.Frame):
         except (tk.TclError, ValueError): pass
         return None
     def _update_gutter(self):                                     
+        """
+        Numeri di riga e marker dei breakpoint con un pool fisso di item del canvas:
+        si aggiornano solo gli slot cambiati. Con wrap='none' le righe hanno altezza costante,
+        quindi basta dlineinfo della prima riga visibile (niente bbox per riga).
+        """
         if not self.winfo_exists() or not self.gutter.winfo_exists() : return                            
-        self.gutter.delete('all')
         try:
-            first_visible_index = self.text.index("@0,0")
-            bottom_y = self.text.winfo_height()
-            last_visible_index = self.text.index(f"@0,{bottom_y-1}") if bottom_y > 0 else self.text.index("@0,0")
-            first_line = int(first_visible_index.split('.')[0])
-            last_line_num_val = int(last_visible_index.split('.')[0])
-            last_line = last_line_num_val + 2 
+            first_line = int(self.text.index("@0,0").split('.')[0])
+            dline = self.text.dlineinfo(f"{first_line}.0")
+            total_lines = int(self.text.index("end-1c").split('.')[0])
+            view_height = self.text.winfo_height()
         except (tk.TclError, ValueError): return
-        for line_num in range(first_line, last_line + 1):
-            index = f"{line_num}.0"
-            dline = self.text.dlineinfo(index)
-            if dline:
-                x, y, width, height, baseline = dline
-                text_x = 5 
-                text_y = y + height // 2 
-                line_num_text_id = self.gutter.create_text(text_x, text_y, anchor='w', 
-                                                           text=str(line_num), font=self.current_font, 
-                                                           fill=self.gutter_fg_color)
-                if line_num in self._breakpoints:
-                    try:
-                        text_bbox = self.gutter.bbox(line_num_text_id)
-                        if text_bbox:
-                             pad_y = 1                  
-                             rect_bbox = (2, text_bbox[1] - pad_y, self.gutter_width - 2, text_bbox[3] + pad_y)
-                             self.gutter.create_rectangle(rect_bbox, fill="", outline='red', width=1) 
-                    except tk.TclError: pass
+        count = 0
+        if dline:
+            y0, line_h = dline[1], max(1, dline[3])
+            count = max(0, min(total_lines - first_line + 1, (view_height - y0) // line_h + 1))
+        gutter = self.gutter
+        slots = self._gutter_slots
+        if self._gutter_fg_in_use != self.gutter_fg_color:
+            # Cambio tema: ricolora tutto il pool
+            for slot in slots:
+                gutter.itemconfigure(slot[0], fill=self.gutter_fg_color)
+            self._gutter_fg_in_use = self.gutter_fg_color
+        while len(slots) < count:
+            text_id = gutter.create_text(5, 0, anchor='w', text='', font=self.current_font,
+                                         fill=self.gutter_fg_color, state='hidden')
+            rect_id = gutter.create_rectangle(2, 0, self.gutter_width - 2, 0, fill="", outline='red',
+                                              width=1, state='hidden')
+            slots.append([text_id, rect_id, None, None, False])
+        for i in range(count):
+            slot = slots[i]
+            line_num = first_line + i
+            y = y0 + i * line_h
+            is_bp = line_num in self._breakpoints
+            if slot[3] != y:
+                gutter.coords(slot[0], 5, y + line_h // 2)
+                gutter.coords(slot[1], 2, y, self.gutter_width - 2, y + line_h - 1)
+            if slot[2] != line_num or slot[3] is None:
+                gutter.itemconfigure(slot[0], text=str(line_num), state='normal')
+            if slot[4] != is_bp or slot[3] is None:
+                gutter.itemconfigure(slot[1], state='normal' if is_bp else 'hidden')
+            slot[2:] = [line_num, y, is_bp]
+        for slot in slots[count:]:
+            if slot[3] is not None:
+                gutter.itemconfigure(slot[0], state='hidden'); gutter.itemconfigure(slot[1], state='hidden')
+                slot[2:] = [None, None, False]
     def set_read_only(self, read_only):
         if not self.winfo_exists(): return
         try:
             new_state = 'disabled' if read_only else 'normal'
             if self.text['state'] != new_state: self.text.config(state=new_state)
         except tk.TclError: pass
+    def _visible_line_range(self):
+        first_line = int(self.text.index("@0,0").split('.')[0])
+        last_line = int(self.text.index(f"@0,{self.text.winfo_height()}").split('.')[0])
+        return first_line, last_line + 1
     def _highlight_syntax_visible(self):                                                  
         if not self.winfo_exists(): return
         try:
-            first_visible_index = self.text.index("@0,0")
-            last_visible_index = self.text.index(f"@0,{self.text.winfo_height()}") + "+1l"
-        except (tk.TclError, ValueError): return
-        for tag in self._compiled_patterns.keys():                         
-            try: self.text.tag_remove(tag, first_visible_index, last_visible_index)
-            except tk.TclError: pass
-        visible_text = self.text.get(first_visible_index, last_visible_index)
-        if not visible_text.strip(): return                            
-        for tag in self._highlight_order:
-            compiled_pattern = self._compiled_patterns.get(tag)
-            if not compiled_pattern: continue
-            try:
-                for match in compiled_pattern.finditer(visible_text):
-                    start, end = match.span()
-                    abs_start_index = self.text.index(f"{first_visible_index}+{start}c")
-                    abs_end_index = self.text.index(f"{first_visible_index}+{end}c")
-                    if tag in ['function', 'class'] and match.lastindex and match.lastindex >= 1:
-                         name_start, name_end = match.span(1)
-                         abs_start_index = self.text.index(f"{first_visible_index}+{name_start}c")
-                         abs_end_index = self.text.index(f"{first_visible_index}+{name_end}c")
-                    self.text.tag_add(tag, abs_start_index, abs_end_index)
-            except tk.TclError: pass
-            except Exception: pass
+            first_line, last_line = self._visible_line_range()
+            self.highlighter.highlight(first_line, last_line)
+            # Le occorrenze della ricerca vengono colorate solo nella parte visibile
+            if self.search_matches is not None: self.search_matches.show(first_line, last_line)
+        except (tk.TclError, ValueError): pass
     def _update_gutter_and_highlight(self, event=None):                        
         self.after_idle(self._update_gutter)
         self.after_idle(self._trigger_highlight_update)                                  
@@ -827,17 +856,66 @@ class CodeEditor(tk.Frame):
             self.text.tag_remove('current_line', '1.0', tk.END)
         except tk.TclError: pass
         self._debugger_active_line = None                                       
-    def _update_document_words_safely(self):
-        if self.winfo_exists():
-            self._update_document_words()
-            self.after(2000, self._update_document_words_safely)
-    def _update_document_words(self, event=None):
+    def _update_document_words(self):
+        self._words_job = None
         if not self.winfo_exists(): return
-        try:
-            if not hasattr(self, '_base_known_words'): return
-            current_text_content = self.text.get("1.0", tk.END)
-            found_words = set(re.findall(r'\b([a-zA-Z_]\w*)\b', current_text_content))
-            self.document_words = { word for word in found_words if word not in self._base_known_words and not word.isdigit() and len(word) > 1 }
-            self.all_known_words = sorted(list(set(list(self._base_known_words) + list(self.document_words))))
+        get_lines = lambda first, last: self.text.get(f"{first}.0", f"{last}.end").split('\n')
+        try: self._document_words.refresh(get_lines, int(self.text.index("end-1c").split('.')[0]))
         except tk.TclError: pass
-        except Exception: pass
+    def destroy(self):
+        # Le parole di questa tab escono dall'indice condiviso
+        if self._words_job is not None:
+            self.after_cancel(self._words_job); self._words_job = None
+        self._document_words.close()
+        super().destroy()
+
+class EditorPlaceholder(ttk.Frame):
+    """
+    Tab ripristinata all'avvio ma non ancora caricata: il main la sostituisce con un CodeEditor
+    alla prima selezione. Conserva percorso e breakpoint, che restano salvati e inviati al backend.
+    """
+    def __init__(self, master, filepath, breakpoints=()):
+        super().__init__(master)
+        self.filepath = filepath
+        self._breakpoints = {ln for ln in breakpoints if isinstance(ln, int) and ln > 0}
+        self.opened_by_debugger = False
+        self.dirty = False
+        self._temp_name = None
+    @property
+    def breakpoints(self): return sorted(self._breakpoints)
+
+def _typing_benchmark(total_lines=20000, keystrokes=300):
+    """python -m gui.editor [righe]: apre un file di total_lines righe, digita in fondo e riporta il costo per tasto."""
+    import time, itertools
+    root = tk.Tk()
+    editor = CodeEditor(root)
+    editor.pack(fill='both', expand=True)
+    sample = ['class Foo(Base):', '    """Docstring', '    on two lines."""', '    def bar(self, x=1):',
+              "        return print(x, 'text', 0x1F)  # comment", '']
+    content = '\n'.join(itertools.islice(itertools.cycle(sample), total_lines))
+    t0 = time.perf_counter()
+    editor.text.insert('1.0', content)
+    editor.text.mark_set(tk.INSERT, tk.END); editor.text.see(tk.INSERT)
+    root.update()
+    editor._highlight_syntax_visible()
+    open_ms = (time.perf_counter() - t0) * 1000
+    # Background: quanto serve a colorare tutto il file e quanto dura il ciclo di eventi piu' lungo
+    t0 = last = time.perf_counter(); longest = 0.0
+    while not editor.highlighter.complete:
+        root.update()
+        now = time.perf_counter(); longest = max(longest, now - last); last = now
+    print(f"background highlight of {total_lines} lines: {(last - t0) * 1000:.0f} ms, longest event-loop turn {longest * 1000:.1f} ms")
+    timings = []
+    for ch in itertools.islice(itertools.cycle("value = compute(self, 'abc', 42)  # note\n"), keystrokes):
+        t = time.perf_counter()
+        editor.text.insert(tk.INSERT, ch); editor.text.see(tk.INSERT)
+        editor._highlight_syntax_visible()
+        root.update_idletasks()
+        timings.append(time.perf_counter() - t)
+    timings.sort()
+    print(f"{total_lines} lines: open+first highlight {open_ms:.0f} ms; per keystroke p50={timings[len(timings)//2]*1000:.2f} ms "
+          f"p99={timings[int(len(timings)*0.99)]*1000:.2f} ms max={timings[-1]*1000:.2f} ms")
+    root.destroy()
+
+if __name__ == "__main__":
+    _typing_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
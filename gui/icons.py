@@ -0,0 +1,117 @@
+import hashlib
+import os
+import queue
+import threading
+import tkinter as tk
+
+ICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+# Sorgenti originali: usate solo dall'aggiornamento facoltativo da rete
+ICON_URLS = {
+    'dark_mode': "https://www.svgrepo.com/show/315691/dark-mode.svg",
+    'font_increase': "https://www.svgrepo.com/show/309640/font-increase.svg",
+    'font_decrease': "https://www.svgrepo.com/show/310863/font-decrease.svg",
+    'debug_script': "https://www.svgrepo.com/show/450791/debug-script.svg",
+}
+
+def rasterize(svg, size, color):
+    """PNG size x size da un SVG; 'currentColor' diventa color. None se cairosvg non c'e'."""
+    try: import cairosvg
+    except ImportError: return None
+    svg = svg.replace(b'currentColor', color.encode('ascii', 'replace'))
+    return cairosvg.svg2png(bytestring=svg, output_width=size, output_height=size)
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f: f.write(data)
+    os.replace(tmp, path)
+
+class IconLoader:
+    """
+    Icons from the SVG assets bundled in gui/assets, rasterised once per (name, size, theme)
+    into PNG files under cache_dir. The cache file name carries a hash of the SVG and colour,
+    so an updated asset is re-rendered. Reading, rendering and the optional network refresh run
+    in a worker thread; PhotoImages are built on the Tk thread from an after() poll, since Tk
+    reads PNG natively.
+    """
+    POLL_MS = 30
+    TIMEOUT_S = 3
+    def __init__(self, root, cache_dir):
+        self.root = root
+        self.cache_dir = cache_dir
+        self.images = {}          # (nome, size) -> PhotoImage: i riferimenti devono restare vivi
+        self._results = queue.Queue()
+        self._workers = []
+        self._poll_job = None
+    def load(self, names, size, theme, color, callback, refresh=False):
+        """callback(nome, PhotoImage) sul thread Tk per ogni icona disponibile (di nuovo se aggiornata da rete)."""
+        job = (list(names), int(size), str(theme), color or 'black', callback, refresh)
+        worker = threading.Thread(target=self._work, args=job, name="IconLoader", daemon=True)
+        self._workers.append(worker)
+        worker.start()
+        if self._poll_job is None: self._poll_job = self.root.after(self.POLL_MS, self._poll)
+    def png_bytes(self, name, size, theme, color):
+        svg = self._source(name)
+        if svg is None: return None
+        digest = hashlib.sha1(svg + color.encode('utf-8')).hexdigest()[:12]
+        prefix = f"{name}-{size}-{theme}-"
+        path = os.path.join(self.cache_dir, f"{prefix}{digest}.png")
+        try:
+            with open(path, 'rb') as f: return f.read()
+        except OSError: pass
+        data = rasterize(svg, size, color)
+        if not data: return None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for old in os.listdir(self.cache_dir):
+                if old.startswith(prefix) and old.endswith('.png'): os.remove(os.path.join(self.cache_dir, old))
+            _write_atomic(path, data)
+        except OSError: pass   # senza cache si rasterizza di nuovo al prossimo avvio
+        return data
+    def _source(self, name):
+        # Una copia aggiornata da rete (cache_dir/svg) ha la precedenza su quella distribuita
+        for directory in (os.path.join(self.cache_dir, 'svg'), ICON_DIR):
+            try:
+                with open(os.path.join(directory, f"{name}.svg"), 'rb') as f: return f.read()
+            except OSError: continue
+        return None
+    def _download(self, name):
+        url = ICON_URLS.get(name)
+        if not url: return None
+        try:
+            import requests
+            resp = requests.get(url, timeout=self.TIMEOUT_S)
+            resp.raise_for_status()
+            return resp.content
+        except ImportError:
+            from urllib.request import urlopen
+            with urlopen(url, timeout=self.TIMEOUT_S) as resp: return resp.read()
+    def _work(self, names, size, theme, color, callback, refresh):
+        for name in names:
+            try: self._results.put((name, size, self.png_bytes(name, size, theme, color), callback))
+            except Exception: pass
+        if not refresh: return
+        for name in names:
+            try:
+                svg = self._download(name)
+                if not svg or b'<svg' not in svg or svg == self._source(name): continue
+                svg_dir = os.path.join(self.cache_dir, 'svg')
+                os.makedirs(svg_dir, exist_ok=True)
+                _write_atomic(os.path.join(svg_dir, f"{name}.svg"), svg)
+                self._results.put((name, size, self.png_bytes(name, size, theme, color), callback))
+            except Exception: pass   # rete assente: restano le icone locali
+    def _poll(self):
+        self._poll_job = None
+        while True:
+            try: name, size, data, callback = self._results.get_nowait()
+            except queue.Empty: break
+            if not data: continue
+            try: image = tk.PhotoImage(master=self.root, data=data)
+            except tk.TclError: continue
+            self.images[(name, size)] = image
+            try: callback(name, image)
+            except tk.TclError: pass
+        self._workers = [w for w in self._workers if w.is_alive()]
+        if self._workers or not self._results.empty():
+            try: self._poll_job = self.root.after(self.POLL_MS, self._poll)
+            except tk.TclError: pass
@@ -1,6 +1,9 @@
 import tkinter as tk
 from tkinter import ttk
 
+# Figli per ogni richiesta 'expand_variable': il backend (debugger_app) usa lo stesso valore
+VARIABLES_PAGE_SIZE = 100
+
 class VariablesPanel(tk.Frame):
     """Variables inspector with Locals/Globals and a Watch (pinned) group."""
 
@@ -20,6 +23,8 @@ class VariablesPanel(tk.Frame):
         vsb = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
         self.tree.configure(yscrollcommand=vsb.set)
 
+        self.tree.tag_configure('truncated', foreground='#8a6d3b')
+
         self.tree.grid(row=1, column=0, sticky="nsew")
         vsb.grid(row=1, column=1, sticky="ns")
 
@@ -29,6 +34,16 @@ class VariablesPanel(tk.Frame):
         self._globals_root = self.tree.insert("", "end", text="Globals", values=("",), open=True)
 
         self._watch_items = {}  # expr -> item_id
+        self.on_watches_changed = None  # impostato da DebuggerApp: invia la lista al backend
+
+        # Espansione lazy: i figli arrivano dal backend solo quando il nodo viene aperto.
+        # request_children(handle, start, count) viene impostato da DebuggerApp.
+        self.request_children = None
+        self._handle_items = {}    # handle -> item_id
+        self._pending_items = {}   # item_id segnaposto -> (handle, start)
+        self._requested = set()    # segnaposto gia' richiesti
+        self.tree.bind("<<TreeviewOpen>>", self._on_open)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
 
         # Context menu for watch items
         self._menu = tk.Menu(self, tearoff=0)
@@ -86,8 +101,69 @@ class VariablesPanel(tk.Frame):
         """Update Locals/Globals groups."""
         self._clear_group(self._locals_root)
         self._clear_group(self._globals_root)
-        self._populate_dict(self._locals_root, locals_dict or {})
-        self._populate_dict(self._globals_root, globals_dict or {})
+        self._handle_items.clear()
+        self._pending_items.clear()
+        self._requested.clear()
+        for root, data in ((self._locals_root, locals_dict), (self._globals_root, globals_dict)):
+            if isinstance(data, dict): self._populate_dict(root, data)
+            else: self._populate_entries(root, data or [])
+
+    def _populate_entries(self, root, entries):
+        # entries: [(nome, tipo, riepilogo, handle, troncato)] come prodotte da DebuggerBackend._describe_value
+        for name, type_name, summary, handle, *extra in entries:
+            try:
+                truncated = bool(extra and extra[0])
+                if truncated: summary = f"{summary}  [truncated]"
+                node = self.tree.insert(root, "end", text=name, values=(summary,), open=False,
+                                        tags=('truncated',) if truncated else ())
+                if handle is not None:
+                    self._handle_items[handle] = node
+                    self._insert_placeholder(node, handle, 0, "loading...")
+            except Exception:
+                pass
+
+    def _insert_placeholder(self, parent, handle, start, text):
+        item = self.tree.insert(parent, "end", text=text, values=("",))
+        self._pending_items[item] = (handle, start)
+        return item
+
+    def _on_open(self, event=None):
+        # Prima pagina: il nodo aperto ha ancora il solo segnaposto "loading..."
+        item = self.tree.focus()
+        for child in self.tree.get_children(item) if item else ():
+            if self._pending_items.get(child, (None, -1))[1] == 0:
+                self._request(child)
+
+    def _on_select(self, event=None):
+        # Pagine successive: selezionando "... N more"
+        for item in self.tree.selection():
+            if item in self._pending_items:
+                self._request(item)
+
+    def _request(self, placeholder):
+        if placeholder in self._requested or not callable(self.request_children):
+            return
+        handle, start = self._pending_items[placeholder]
+        self._requested.add(placeholder)
+        self.tree.item(placeholder, text="loading...")
+        try: self.request_children(handle, start, VARIABLES_PAGE_SIZE)
+        except Exception: pass
+
+    def add_children(self, handle, start, children, total):
+        """Inserisce una pagina di figli ricevuta dal backend sotto il nodo di `handle`."""
+        node = self._handle_items.get(handle)
+        if node is None or not self.tree.exists(node):
+            return
+        for item, (h, s) in list(self._pending_items.items()):
+            if h == handle and s == start:
+                del self._pending_items[item]
+                self._requested.discard(item)
+                try: self.tree.delete(item)
+                except Exception: pass
+        self._populate_entries(node, children)
+        loaded = start + len(children)
+        if children and loaded < total:
+            self._insert_placeholder(node, handle, loaded, f"... {total - loaded} more")
 
     def _populate_dict(self, root, data):
         try:
@@ -130,6 +206,7 @@ class VariablesPanel(tk.Frame):
             item = self.tree.insert(self._watch_root, "end", text=expr, values=("<pending>",), open=False)
             self._watch_items[expr] = item
             self.tree.see(item)
+            self._notify_watches_changed()
             return True
         except Exception:
             return False
@@ -142,9 +219,15 @@ class VariablesPanel(tk.Frame):
         if item:
             try: self.tree.delete(item)
             except Exception: pass
+            self._notify_watches_changed()
             return True
         return False
 
+    def _notify_watches_changed(self):
+        if callable(self.on_watches_changed):
+            try: self.on_watches_changed()
+            except Exception: pass
+
     def get_watch_expressions(self):
         return list(self._watch_items.keys())
 
@@ -1,13 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import urllib.parse
-import urllib.request
-import json
 import re
 import uuid
 import os
-from threading import Thread
-import traceback
+import time
 from pygments.formatters import HtmlFormatter               
 from pygments import highlight               
 from pygments.lexers import get_lexer_by_name, TextLexer               
@@ -27,6 +24,7 @@ except ImportError:
         "include_output": False, "include_code": False
     }}
     class CodeEditor: pass              
+from gui.ollama_stream import OllamaStream
 class MarkdownDisplayChatWindow(tk.Frame):
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
@@ -165,9 +163,15 @@ class MarkdownDisplayChatWindow(tk.Frame):
             return url
         return url
 class OllamaChatWindow(tk.Toplevel):
+    STREAM_POLL_MS = 30
+    RENDER_MIN_S = 0.1   # intervallo minimo tra due ridisegni della risposta in arrivo
     def __init__(self, parent, main_app_ref):
         super().__init__(parent)
         self.main_app_ref = main_app_ref
+        self._stream = None
+        self._reply_text = None   # risposta in arrivo, mostrata in coda alla cronologia
+        self._render_due = 0.0
+        self._html_rows = {}      # (tema, ruolo, testo) -> HTML del messaggio gia' convertito
         self.transient(parent)
         self.title("Ollama AI Chat")
         self.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -242,6 +246,7 @@ class OllamaChatWindow(tk.Toplevel):
         self.entry.bind("<Return>",self._on_enter_key); self.entry.bind("<Shift-Return>",lambda e:"break")
         self.send_btn = ttk.Button(input_frame,text="Send",command=self._send_message_from_dialog); self.send_btn.grid(row=0,column=1,sticky="ns")
         self.entry.focus_set()
+        self.bind("<Escape>", lambda e: self._cancel_ai_reply())
         self._create_entry_context_menu()
     def _create_entry_context_menu(self):
         self.entry_context_menu = tk.Menu(self.entry, tearoff=0)
@@ -273,6 +278,10 @@ class OllamaChatWindow(tk.Toplevel):
     def _reset_chat(self):
         if not self.winfo_exists(): return
         if messagebox.askyesno("Reset Chat", "Are you sure you want to clear the chat history?", parent=self):
+            if self._stream is not None:
+                self._stream.cancel()
+                self._stream = self._reply_text = None
+                self.unfreeze_interface()
             self.chat_history = []
             self._add_message_to_display(None, None)
             if self.entry.winfo_exists(): self.entry.delete("1.0", tk.END)
@@ -299,14 +308,15 @@ class OllamaChatWindow(tk.Toplevel):
         return None
     def freeze_interface(self):
         if not self.winfo_exists(): return
-        for w in [self.send_btn, self.entry, self.output_check, self.code_check]:
+        for w in [self.entry, self.output_check, self.code_check]:
             if w.winfo_exists(): w.config(state="disabled")
-        if self.send_btn.winfo_exists(): self.send_btn.config(text="Waiting...")
+        # Durante la generazione il pulsante interrompe la risposta (anche Esc)
+        if self.send_btn.winfo_exists(): self.send_btn.config(text="Stop", command=self._cancel_ai_reply)
     def unfreeze_interface(self):
         if not self.winfo_exists(): return
         for w in [self.entry, self.output_check, self.code_check]:
             if w.winfo_exists(): w.config(state="normal")
-        if self.send_btn.winfo_exists(): self.send_btn.config(state="normal", text="Send")
+        if self.send_btn.winfo_exists(): self.send_btn.config(state="normal", text="Send", command=self._send_message_from_dialog)
     def _get_context_from_ide(self):
         context_parts = []
         ide_context_present = False
@@ -353,40 +363,37 @@ class OllamaChatWindow(tk.Toplevel):
         self.chat_history.append({"role": "user", "content": prompt_for_api})
         self._add_message_to_display("user", user_query_original)
         self.freeze_interface()
-        Thread(target=self._run_ai_reply_thread_for_dialog, daemon=True).start()
-    def _run_ai_reply_thread_for_dialog(self):
-        ai_r, err_r = None, None
-        try: ai_r = "".join(list(self._ollama_api_call()))
-        except Exception as e: err_r = f"[Comm Error: {e}]\n{traceback.format_exc()}"
-        if self.winfo_exists(): self.after(0, self._handle_ai_reply_result_for_dialog, ai_r, err_r)
-    def _handle_ai_reply_result_for_dialog(self, ai_content, error_msg):
-        if not self.winfo_exists(): return
-        if error_msg:
-            self.chat_history.append({"role": "error", "content": error_msg})
-            self._add_message_to_display("error", error_msg)
-        elif ai_content is not None:
-            self.chat_history.append({"role": "assistant", "content": ai_content})
-            self._add_message_to_display("assistant", ai_content)
+        self._reply_text = ""
+        self._render_due = 0.0
+        self._stream = self._ollama_api_call().start()
+        self.after(self.STREAM_POLL_MS, self._poll_ai_reply)
+    def _poll_ai_reply(self):
+        stream = self._stream
+        if stream is None or not self.winfo_exists(): return
+        text, finished, error = stream.poll()
+        if text: self._reply_text += text
+        if finished:
+            self._finish_ai_reply(error, stream.cancelled)
+            return
+        # Il primo testo si mostra subito, poi si ridisegna al massimo ogni RENDER_MIN_S
+        # (o meno spesso se il rendering della chat costa di piu')
+        now = time.perf_counter()
+        if text and now >= self._render_due:
+            self._add_message_to_display("assistant", None)
+            self._render_due = now + max(self.RENDER_MIN_S, 4 * (time.perf_counter() - now))
+        self.after(self.STREAM_POLL_MS, self._poll_ai_reply)
+    def _finish_ai_reply(self, error_msg, cancelled):
+        reply, self._reply_text, self._stream = self._reply_text, None, None
+        if reply: self.chat_history.append({"role": "assistant", "content": reply})
+        # Solo per la chat a video: il ruolo non e' in CHAT_ROLES, al modello arriva la risposta parziale
+        if cancelled: self.chat_history.append({"role": "stopped", "content": "*[Generation stopped]*"})
+        if error_msg: self.chat_history.append({"role": "error", "content": error_msg})
+        self._add_message_to_display(None, None)
         self.unfreeze_interface()
+    def _cancel_ai_reply(self):
+        if self._stream is not None: self._stream.cancel()
     def _ollama_api_call(self):
-        payload = {"model": self.model, "messages": self.chat_history, "stream": False}
-        data_ = json.dumps(payload).encode("utf-8")
-        api_url_full = urllib.parse.urljoin(self.api_url, "/api/chat" if self.api_url.endswith('/') else "/api/chat")
-        req = urllib.request.Request(api_url_full, data=data_, headers={"Content-Type": "application/json"}, method="POST")
-        try:
-            with urllib.request.urlopen(req, timeout=120) as r:
-                d = json.loads(r.read().decode())
-                if "message" in d and "content" in d["message"]: yield d["message"]["content"]
-                elif "error" in d: yield f"[API Err ({os.path.basename(api_url_full)}): {d['error']}]"
-                else: yield f"[API Err ({os.path.basename(api_url_full)}): Bad format]"
-        except urllib.error.HTTPError as e:
-            b = e.read().decode(); j = {};
-            try: j = json.loads(b)
-            except: j = {"error": b}
-            yield f"[API HTTP Err ({os.path.basename(api_url_full)}): {e.code} - {j.get('error', 'Unknown')}]"
-        except urllib.error.URLError as e: yield f"[API URL Err ({os.path.basename(api_url_full)}): {e.reason}]"
-        except TimeoutError: yield f"[API Err ({os.path.basename(api_url_full)}): Timeout(120s)]"
-        except Exception as e: yield f"[Chat Call Err ({os.path.basename(api_url_full)}): {e}]"
+        return OllamaStream(self.api_url, self.model, self.chat_history)
     def _add_message_to_display(self, role, content_to_display):
         if not self.winfo_exists(): return
         if role is None and content_to_display is None: pass
@@ -405,7 +412,14 @@ class OllamaChatWindow(tk.Toplevel):
                         idx_generic_marker = actual_content_for_display.find(context_end_marker_generic)
                         if idx_generic_marker != -1:
                              actual_content_for_display = actual_content_for_display[idx_generic_marker + len(context_end_marker_generic):].strip()
+            if msg_h["role"] == "stopped":
+                # Nota di interruzione: in coda alla risposta parziale, nello stesso messaggio
+                if display_hist_render and display_hist_render[-1]["role"] == "assistant":
+                    display_hist_render[-1] = {"role": "assistant", "content": f"{display_hist_render[-1]['content']}\n\n{actual_content_for_display}"}
+                else: display_hist_render.append({"role": "assistant", "content": actual_content_for_display})
+                continue
             display_hist_render.append({"role": msg_h["role"], "content": actual_content_for_display})
+        if self._reply_text: display_hist_render.append({"role": "assistant", "content": self._reply_text})
         curr_theme_name = self.main_app_ref.current_theme_name if self.main_app_ref and hasattr(self.main_app_ref, 'current_theme_name') else "light"
         palette = APP_THEMES.get(curr_theme_name, APP_THEMES.get("light", {}))
         if curr_theme_name == "dark":
@@ -416,8 +430,15 @@ class OllamaChatWindow(tk.Toplevel):
             usr_bg, usr_fg = palette.get("app_bg", "#F0F0F0"), palette.get("editor_fg", "black")
             ai_bg, ai_fg = palette.get("gutter_bg", "#f5f5f5"), palette.get("editor_fg", "#333333")
             err_bg, err_fg = palette.get("breakpoint_line_editor_bg", "#ffdddd"), palette.get("syntax", {}).get('string', "#a31515")
+        html_rows = {}
         for msg_item in display_hist_render:
             r, c_for_html = msg_item["role"], msg_item["content"]
+            # I messaggi gia' convertiti non si riconvertono a ogni token della risposta in arrivo
+            key = (curr_theme_name, r, c_for_html)
+            balloon = self._html_rows.get(key)
+            if balloon is not None:
+                rows_html.append(balloon); html_rows[key] = balloon
+                continue
             current_bg, current_fg = (usr_bg if r == "user" else (err_bg if r == "error" else ai_bg)),\
                                      (usr_fg if r == "user" else (err_fg if r == "error" else ai_fg))
             html_row_content = self._convert_single_message_to_html(c_for_html, r)
@@ -430,7 +451,8 @@ class OllamaChatWindow(tk.Toplevel):
                 balloon = f"""<table style="width:100%;table-layout:fixed;margin:10px 0;"><tr>
                                <td style="width:80%;{td_style}">{html_row_content}</td><td style="width:20%;"></td>
                              </tr></table>"""
-            rows_html.append(balloon)
+            rows_html.append(balloon); html_rows[key] = balloon
+        self._html_rows = html_rows
         py_style = 'monokai' if curr_theme_name == "dark" else 'default'
         body_bg_chat = palette.get('app_bg', 'white'); body_fg_chat = palette.get('editor_fg', 'black')
         py_css = HtmlFormatter(style=py_style, noclasses=True).get_style_defs('.highlight')
@@ -523,12 +545,14 @@ class OllamaChatWindow(tk.Toplevel):
         self.config(bg=palette.get('app_bg', '#F0F0F0'))
         self._add_message_to_display(None, None)                                            
     def _on_close(self):
+        self._cancel_ai_reply()
         if self.main_app_ref and hasattr(self.main_app_ref, 'config') and hasattr(self.main_app_ref, 'ollama_chat_window'):
             chat_cfg = self.main_app_ref.config.get('chat_ai_config', {})
             if hasattr(self, 'include_output_var'): chat_cfg['include_output'] = self.include_output_var.get()
             if hasattr(self, 'code_check_var'): chat_cfg['include_code'] = self.code_check_var.get()
             self.main_app_ref.config['chat_ai_config'] = chat_cfg
             self.main_app_ref.ollama_chat_window = None
+            if hasattr(self.main_app_ref, '_schedule_config_save'): self.main_app_ref._schedule_config_save()
         self.destroy()
 if __name__ == '__main__':
     class MockMainApp:
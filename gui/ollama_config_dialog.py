@@ -114,6 +114,7 @@ class OllamaConfigDialog(tk.Toplevel):
             chat_config['api_url'] = new_url
             chat_config['selected_model'] = new_model
             self.main_app_ref.config['chat_ai_config'] = chat_config
+            if hasattr(self.main_app_ref, '_schedule_config_save'): self.main_app_ref._schedule_config_save()
             messagebox.showinfo("Saved", "Ollama configuration saved.", parent=self)
         else:
             messagebox.showerror("Error", "Cannot save configuration. Main application reference is missing.", parent=self)
@@ -0,0 +1,109 @@
+import http.client
+import json
+import queue
+import socket
+import threading
+import time
+import urllib.parse
+
+CHAT_ROLES = ("system", "user", "assistant", "tool")
+
+class OllamaError(Exception):
+    pass
+
+def chat_endpoint(api_url):
+    return urllib.parse.urljoin(api_url, "/api/chat")
+
+def iter_ndjson(lines):
+    """Oggetti JSON di uno stream NDJSON; le righe vuote si saltano."""
+    for raw in lines:
+        raw = raw.strip()
+        if raw: yield json.loads(raw)
+
+class OllamaStream:
+    """
+    One streaming /api/chat request (NDJSON, one object per generated chunk) read on a
+    worker thread. Text chunks go through a queue that the Tk thread drains with poll()
+    from an after() loop, so the first token is on screen as soon as Ollama sends it.
+    cancel() shuts the socket down, which also wakes a read still waiting for the model.
+    """
+    def __init__(self, api_url, model, messages, timeout=120):
+        self.url = chat_endpoint(api_url)
+        self.payload = {"model": model, "stream": True,
+                        "messages": [m for m in messages if m.get("role") in CHAT_ROLES]}
+        self.timeout = timeout
+        self.started_at = None
+        self.first_token_s = None   # secondi dall'invio al primo testo ricevuto
+        self._events = queue.Queue()
+        self._cancelled = threading.Event()
+        self._sock = None
+        self._thread = None
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="OllamaStream", daemon=True)
+        self._thread.start()
+        return self
+    def cancel(self):
+        self._cancelled.set()
+        sock = self._sock
+        if sock is not None:
+            try: sock.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+    def poll(self):
+        """
+        (testo arrivato dall'ultima chiamata, finito, errore). Dopo finito=True non arriva
+        altro; errore è None anche quando la richiesta è stata annullata.
+        """
+        parts, finished, error = [], False, None
+        while True:
+            try: kind, value = self._events.get_nowait()
+            except queue.Empty: break
+            if kind == 'text': parts.append(value)
+            else:
+                finished, error = True, value
+                break
+        return "".join(parts), finished, error
+    def _run(self):
+        error = None
+        try:
+            for text in self._chunks():
+                if self.cancelled: break
+                if self.first_token_s is None: self.first_token_s = time.perf_counter() - self.started_at
+                self._events.put(('text', text))
+        except Exception as e:
+            error = self._describe(e)
+        self._events.put(('end', None if self.cancelled else error))
+    def _chunks(self):
+        parts = urllib.parse.urlsplit(self.url)
+        conn_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        conn = conn_class(parts.netloc, timeout=self.timeout)
+        try:
+            conn.connect()
+            self._sock = conn.sock
+            if self.cancelled: return
+            conn.request("POST", parts.path or "/", body=json.dumps(self.payload).encode("utf-8"),
+                         headers={"Content-Type": "application/json", "Accept": "application/x-ndjson"})
+            resp = conn.getresponse()
+            if resp.status != 200:
+                body = resp.read().decode("utf-8", "replace")
+                try: message = json.loads(body).get("error", body)
+                except (ValueError, AttributeError): message = body
+                raise OllamaError(f"HTTP {resp.status} - {message or resp.reason}")
+            for obj in iter_ndjson(resp):
+                if "error" in obj: raise OllamaError(obj["error"])
+                text = (obj.get("message") or {}).get("content")
+                if text: yield text
+                if obj.get("done"): return
+        finally:
+            self._sock = None
+            conn.close()
+    def _describe(self, e):
+        where = self.url
+        if isinstance(e, OllamaError): return f"[API Err ({where}): {e}]"
+        if isinstance(e, (socket.timeout, TimeoutError)): return f"[API Err ({where}): Timeout ({self.timeout}s)]"
+        if isinstance(e, ValueError): return f"[API Err ({where}): Bad format ({e})]"
+        if isinstance(e, OSError): return f"[API URL Err ({where}): {e}]"
+        return f"[Chat Call Err ({where}): {e}]"
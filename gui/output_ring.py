@@ -0,0 +1,119 @@
+import struct
+from multiprocessing import shared_memory
+
+# Ring buffer in memoria condivisa per l'output del debuggee (un produttore, un consumatore).
+# Header: write_pos, read_pos (contatori crescenti, l'indice e' pos % capacity).
+# Record: stream (1 byte) + lunghezza (uint32) + testo utf-8.
+# Niente doorbell in memoria condivisa (senza barriere la GUI poteva perdere l'ultimo avviso):
+# il backend manda ('output_ready',) sulla pipe a ogni flush che ha scritto del testo, oppure
+# ('output_dropped',) se e' entrato solo il marcatore dei byte persi.
+_HEADER = struct.Struct('<QQ')
+_RECORD = struct.Struct('<BI')
+_WRITE_POS, _READ_POS = 0, 8
+
+_STREAMS = ('stdout', 'stderr')
+_DROPPED = 2   # record speciale: byte persi perche' la GUI era indietro
+
+class OutputRing:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.capacity = shm.size - _HEADER.size
+        self._buf = shm.buf
+        self._pending_dropped = 0
+
+    @classmethod
+    def create(cls, size):
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER.size + max(4096, int(size)))
+        _HEADER.pack_into(shm.buf, 0, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:   # track= esiste solo da Python 3.13
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        self._buf = None
+        try:
+            self.shm.close()
+            if self.owner: self.shm.unlink()
+        except (OSError, BufferError): pass
+
+    # --- lato backend ---------------------------------------------------------
+
+    def write(self, stream, text):
+        """
+        Scrive un record; se non c'e' spazio i byte vengono contati come persi.
+        Restituisce (testo scritto, marcatore dei byte persi scritto).
+        """
+        data = text.encode('utf-8', 'replace')
+        marker = False
+        if self._pending_dropped:
+            if not self._put(_DROPPED, str(self._pending_dropped).encode()):
+                self._pending_dropped += len(data)
+                return False, False
+            self._pending_dropped = 0
+            marker = True
+        if not self._put(_STREAMS.index(stream), data):
+            self._pending_dropped += len(data)
+            return False, marker
+        return True, marker
+
+    @property
+    def dropped(self):
+        return self._pending_dropped
+
+    def _put(self, code, data):
+        buf = self._buf
+        write_pos = struct.unpack_from('<Q', buf, _WRITE_POS)[0]
+        read_pos = struct.unpack_from('<Q', buf, _READ_POS)[0]
+        record = _RECORD.pack(code, len(data)) + data
+        if len(record) > self.capacity - (write_pos - read_pos):
+            return False
+        self._copy_in(write_pos, record)
+        # Prima i dati, poi la posizione: il consumatore non legge record incompleti
+        struct.pack_into('<Q', buf, _WRITE_POS, write_pos + len(record))
+        return True
+
+    def _copy_in(self, pos, data):
+        start = _HEADER.size + pos % self.capacity
+        first = min(len(data), _HEADER.size + self.capacity - start)
+        self._buf[start:start + first] = data[:first]
+        if first < len(data):
+            self._buf[_HEADER.size:_HEADER.size + len(data) - first] = data[first:]
+
+    # --- lato GUI -------------------------------------------------------------
+
+    def read_all(self):
+        """Legge tutti i record disponibili come messaggi ('stdout'|'stderr', testo)."""
+        buf = self._buf
+        if buf is None: return []
+        write_pos = struct.unpack_from('<Q', buf, _WRITE_POS)[0]
+        read_pos = struct.unpack_from('<Q', buf, _READ_POS)[0]
+        messages = []
+        while read_pos < write_pos:
+            code, length = _RECORD.unpack(self._copy_out(read_pos, _RECORD.size))
+            data = self._copy_out(read_pos + _RECORD.size, length)
+            read_pos += _RECORD.size + length
+            if code == _DROPPED:
+                messages.append(('stderr', f"\n[{data.decode()} bytes of output dropped]\n"))
+            else:
+                messages.append((_STREAMS[code], data.decode('utf-8', 'replace')))
+        struct.pack_into('<Q', buf, _READ_POS, read_pos)
+        return messages
+
+    def _copy_out(self, pos, length):
+        start = _HEADER.size + pos % self.capacity
+        first = min(length, _HEADER.size + self.capacity - start)
+        data = bytes(self._buf[start:start + first])
+        if first < length:
+            data += bytes(self._buf[_HEADER.size:_HEADER.size + length - first])
+        return data
@@ -0,0 +1,266 @@
+import os
+import queue
+import re
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+# Esclusi sempre, oltre al .gitignore della cartella radice
+DEFAULT_EXCLUDES = ('.git/', '.hg/', '.svn/', '__pycache__/', '.venv/', 'venv/', 'node_modules/',
+                    '.mypy_cache/', '.pytest_cache/', '*.pyc', '*.pyo', '*.so', '*.dll', '*.exe')
+
+def _glob_to_regex(pattern):
+    # '**' attraversa le cartelle, '*' e '?' no; [..] come in fnmatch ('!' iniziale = negazione)
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        if pattern.startswith('**/', i): out.append('(?:.*/)?'); i += 3; continue
+        if pattern.startswith('**', i): out.append('.*'); i += 2; continue
+        c = pattern[i]
+        if c == '*': out.append('[^/]*')
+        elif c == '?': out.append('[^/]')
+        elif c == '[' and pattern.find(']', i + 1) != -1:
+            j = pattern.find(']', i + 1)
+            chars = pattern[i + 1:j]
+            if chars.startswith('!'): chars = '^' + chars[1:]
+            out.append('[' + chars.replace('\\', '\\\\') + ']')
+            i = j
+        elif c == '\\' and i + 1 < n: out.append(re.escape(pattern[i + 1])); i += 1
+        else: out.append(re.escape(c))
+        i += 1
+    return re.compile(''.join(out))
+
+class IgnoreRules:
+    """
+    gitignore-style exclude patterns: '#' comments, '!' negation, trailing '/' for directories
+    only, patterns containing '/' anchored at the root, otherwise matched against the base name.
+    The last matching pattern wins. Paths are relative to the search root, with '/' separators.
+    """
+    def __init__(self, patterns=()):
+        self._rules = []
+        for pattern in patterns: self.add(pattern)
+    def add(self, pattern):
+        pattern = pattern.rstrip('\r\n').rstrip(' ')
+        if not pattern or pattern.startswith('#'): return
+        negate = pattern.startswith('!')
+        if negate: pattern = pattern[1:]
+        dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        if pattern: self._rules.append((_glob_to_regex(pattern), negate, dir_only, anchored))
+    def add_file(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f: self.add(line)
+        except OSError: pass
+    def ignored(self, rel_path, is_dir=False):
+        name = rel_path.rsplit('/', 1)[-1]
+        result = False
+        for regex, negate, dir_only, anchored in self._rules:
+            if dir_only and not is_dir: continue
+            if regex.fullmatch(rel_path if anchored else name): result = not negate
+        return result
+
+def compile_query(query, regex=False, match_case=False, whole_word=False):
+    """Espressione della ricerca; solleva re.error se query non e' una regex valida."""
+    expression = query if regex else re.escape(query)
+    if whole_word: expression = rf'\b(?:{expression})\b'
+    return re.compile(expression, 0 if match_case else re.IGNORECASE)
+
+class ProjectSearch:
+    """
+    Searches every text file under `root` in a worker thread. Matching files are queued as
+    (path, [(line, col, line_text), ...]) as soon as they are scanned; the GUI drains them
+    with poll() from an after() loop, so the main thread never waits on the file system.
+    Ignored directories are pruned before descending; cancel() stops at the next file.
+    """
+    MAX_FILE_BYTES = 2 * 1024 * 1024
+    MAX_RESULTS = 10000
+    MAX_PER_FILE = 1000
+    MAX_LINE_CHARS = 300
+    BINARY_PROBE = 8192
+    def __init__(self, root, query, regex=False, match_case=False, whole_word=False, excludes=()):
+        self.root = os.path.abspath(root)
+        self.pattern = compile_query(query, regex, match_case, whole_word)
+        self.rules = IgnoreRules(DEFAULT_EXCLUDES)
+        self.rules.add_file(os.path.join(self.root, '.gitignore'))
+        for pattern in excludes: self.rules.add(pattern)
+        self.results = queue.Queue()
+        self.files_scanned = 0
+        self.files_matched = 0
+        self.match_count = 0
+        self.truncated = False
+        self.done = False
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ProjectSearch", daemon=True)
+    def start(self):
+        self._thread.start()
+        return self
+    def cancel(self):
+        self._cancel.set()
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+    @property
+    def finished(self):
+        """Thread terminato e tutti i risultati gia' letti."""
+        return self.done and self.results.empty()
+    def poll(self, limit=100):
+        """Fino a limit file con risultati, senza bloccare."""
+        batch = []
+        while len(batch) < limit:
+            try: batch.append(self.results.get_nowait())
+            except queue.Empty: break
+        return batch
+    def _run(self):
+        try: self._walk()
+        finally: self.done = True
+    def _walk(self):
+        rules, root = self.rules, self.root
+        for dirpath, dirnames, filenames in os.walk(root):
+            if self.cancelled: return
+            rel_dir = os.path.relpath(dirpath, root).replace(os.sep, '/')
+            rel_dir = '' if rel_dir == '.' else rel_dir + '/'
+            # Le cartelle escluse non vengono visitate affatto
+            dirnames[:] = sorted(d for d in dirnames if not rules.ignored(rel_dir + d, True))
+            for name in sorted(filenames):
+                if self.cancelled: return
+                if rules.ignored(rel_dir + name): continue
+                path = os.path.join(dirpath, name)
+                matches = self._search_file(path)
+                self.files_scanned += 1
+                if not matches: continue
+                # truncated solo se qualche risultato viene davvero scartato
+                if self.match_count + len(matches) > self.MAX_RESULTS:
+                    matches = matches[:self.MAX_RESULTS - self.match_count]
+                    self.truncated = True
+                if matches:
+                    self.match_count += len(matches)
+                    self.files_matched += 1
+                    self.results.put((path, matches))
+                if self.truncated: return
+    def _search_file(self, path):
+        try:
+            if os.path.getsize(path) > self.MAX_FILE_BYTES: return None
+            with open(path, 'rb') as f: data = f.read()
+        except OSError: return None
+        if b'\0' in data[:self.BINARY_PROBE]: return None   # file binario
+        text = data.decode('utf-8', 'replace')
+        matches = []
+        line, last = 1, 0
+        for m in self.pattern.finditer(text):
+            start = m.start()
+            if start == m.end(): continue   # match vuoti (es. 'x*') non servono
+            line += text.count('\n', last, start); last = start
+            line_start = text.rfind('\n', 0, start) + 1
+            line_end = text.find('\n', start)
+            if line_end == -1: line_end = len(text)
+            matches.append((line, start - line_start, text[line_start:min(line_end, line_start + self.MAX_LINE_CHARS)]))
+            if len(matches) >= self.MAX_PER_FILE: break
+        return matches
+
+class ProjectSearchWindow:
+    """Finestra 'Find in Project': risultati raggruppati per file, doppio click apre la riga."""
+    POLL_MS = 50
+    FILES_PER_TICK = 50
+    def __init__(self, parent, app, root_dir):
+        self.app = app
+        self.search = None
+        self._poll_job = None
+        self._targets = {}   # id riga del Treeview -> (path, riga, colonna)
+        self.top = tk.Toplevel(parent)
+        self.top.title("Find in Project")
+        self.top.geometry("760x480")
+        self.top.transient(parent)
+        self.create_widgets(root_dir)
+        self.top.bind("<Return>", lambda e: self.start())
+        self.top.bind("<Escape>", lambda e: self.cancel() if self.search and not self.search.done else self.top.destroy())
+        self.top.bind("<Destroy>", self._on_destroy)
+        self.find_entry.focus_set()
+    def create_widgets(self, root_dir):
+        frame = ttk.Frame(self.top, padding=8)
+        frame.pack(fill='both', expand=True)
+        frame.columnconfigure(1, weight=1)
+        frame.rowconfigure(5, weight=1)
+        ttk.Label(frame, text="Find:").grid(row=0, column=0, sticky='w')
+        self.find_entry = ttk.Entry(frame)
+        self.find_entry.grid(row=0, column=1, sticky='ew', padx=5, pady=2)
+        ttk.Label(frame, text="Folder:").grid(row=1, column=0, sticky='w')
+        self.folder_var = tk.StringVar(value=root_dir)
+        ttk.Entry(frame, textvariable=self.folder_var).grid(row=1, column=1, sticky='ew', padx=5, pady=2)
+        ttk.Label(frame, text="Exclude:").grid(row=2, column=0, sticky='w')
+        self.exclude_var = tk.StringVar(value="")
+        ttk.Entry(frame, textvariable=self.exclude_var).grid(row=2, column=1, sticky='ew', padx=5, pady=2)
+        opts = ttk.Frame(frame)
+        opts.grid(row=3, column=0, columnspan=2, sticky='w')
+        self.use_regex = tk.BooleanVar(value=False)
+        self.match_case = tk.BooleanVar(value=False)
+        self.whole_word = tk.BooleanVar(value=False)
+        ttk.Checkbutton(opts, text="Regex", variable=self.use_regex).pack(side='left', padx=(0, 8))
+        ttk.Checkbutton(opts, text="Match case", variable=self.match_case).pack(side='left', padx=(0, 8))
+        ttk.Checkbutton(opts, text="Whole word", variable=self.whole_word).pack(side='left', padx=(0, 8))
+        ttk.Button(opts, text="Search", command=self.start).pack(side='left', padx=2)
+        ttk.Button(opts, text="Cancel", command=self.cancel).pack(side='left', padx=2)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(frame, textvariable=self.status_var).grid(row=4, column=0, columnspan=2, sticky='w', pady=(4, 2))
+        tree_frame = ttk.Frame(frame)
+        tree_frame.grid(row=5, column=0, columnspan=2, sticky='nsew')
+        self.tree = ttk.Treeview(tree_frame, columns=('line', 'text'), show='tree headings')
+        self.tree.heading('#0', text="File"); self.tree.heading('line', text="Line"); self.tree.heading('text', text="Text")
+        self.tree.column('#0', width=220); self.tree.column('line', width=60, anchor='e', stretch=False); self.tree.column('text', width=440)
+        sb = ttk.Scrollbar(tree_frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=sb.set)
+        sb.pack(side='right', fill='y'); self.tree.pack(side='left', fill='both', expand=True)
+        self.tree.bind("<Double-1>", self._open_selected)
+        self.tree.bind("<Return>", self._open_selected)
+    def start(self):
+        query = self.find_entry.get()
+        if not query: return
+        root = self.folder_var.get().strip()
+        if not os.path.isdir(root): self.status_var.set(f"Folder not found: {root}"); return
+        self.cancel()
+        self._cancel_poll()   # un solo ciclo _poll sulla coda della ricerca nuova
+        excludes = [p.strip() for p in self.exclude_var.get().split(',') if p.strip()]
+        try:
+            self.search = ProjectSearch(root, query, self.use_regex.get(), self.match_case.get(),
+                                        self.whole_word.get(), excludes)
+        except re.error as e: self.status_var.set(f"Invalid regex: {e}"); return
+        self.tree.delete(*self.tree.get_children())
+        self._targets.clear()
+        self.search.start()
+        self._poll()
+    def cancel(self):
+        if self.search is not None: self.search.cancel()
+    def _poll(self):
+        self._poll_job = None
+        search = self.search
+        if search is None or not self.top.winfo_exists(): return
+        for path, matches in search.poll(self.FILES_PER_TICK):
+            rel = os.path.relpath(path, search.root)
+            parent = self.tree.insert('', 'end', text=f"{rel} ({len(matches)})", open=True)
+            self._targets[parent] = (path, matches[0][0], matches[0][1])
+            for line, col, text in matches:
+                item = self.tree.insert(parent, 'end', values=(line, text.strip()))
+                self._targets[item] = (path, line, col)
+        status = f"{search.match_count} matches in {search.files_matched} files ({search.files_scanned} scanned)"
+        if search.finished:
+            if search.cancelled: status += " - cancelled"
+            elif search.truncated: status += f" - stopped at {search.MAX_RESULTS} matches"
+            self.status_var.set(status)
+            return
+        self.status_var.set(status + " - searching...")
+        self._poll_job = self.top.after(self.POLL_MS, self._poll)
+    def _open_selected(self, event=None):
+        target = self._targets.get(self.tree.focus())
+        if target is None: return
+        path, line, col = target
+        self.app.open_path(path, line, col)
+    def _cancel_poll(self):
+        if self._poll_job is not None:
+            try: self.top.after_cancel(self._poll_job)
+            except tk.TclError: pass
+            self._poll_job = None
+    def _on_destroy(self, event):
+        if event.widget is not self.top: return
+        self.cancel()
+        self._cancel_poll()
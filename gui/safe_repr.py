@@ -0,0 +1,189 @@
+import builtins
+import inspect
+import itertools
+import reprlib
+import time
+import weakref
+from functools import partial
+
+# Limiti di default (sovrascrivibili da "repr_limits" in DEFAULT_CONFIG)
+DEFAULT_REPR_LIMITS = {
+    "max_chars": 200,
+    "max_depth": 3,
+    "max_elements": 20,
+    "time_budget_ms": 100,
+}
+
+_CONTAINERS = (list, tuple, dict, set, frozenset)
+
+# "modulo.QualName" -> funzione(valore, engine) -> str
+_SUMMARIZERS = {}
+
+def register_summarizer(type_path, func):
+    """Registra un riepilogo per un tipo (es. 'numpy.ndarray'); vale anche per le sottoclassi."""
+    _SUMMARIZERS[type_path] = func
+
+def _type_path(cls):
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+class SafeRepr(reprlib.Repr):
+    """
+    repr() a costo limitato per l'inspector del debugger.
+    Oltre ai limiti di reprlib (caratteri, profondita', elementi) applica un budget di tempo:
+    start_budget() lo fa partire e, una volta esaurito, i valori successivi vengono descritti
+    solo con tipo e lunghezza, senza chiamare __repr__ utente.
+    dict e set non vengono ordinati (reprlib li ordina per intero prima di troncarli).
+    Con call_with_timeout(func, secondi) -> (ok, risultato) o None, il repr() dei tipi non
+    builtin gira li' con il tempo rimasto: se non finisce il valore risulta troncato e il
+    suo tipo non viene piu' chiamato.
+    """
+    def __init__(self, max_chars=200, max_depth=3, max_elements=20, time_budget_ms=100, call_with_timeout=None):
+        super().__init__()
+        self.max_chars = int(max_chars)
+        self.max_elements = int(max_elements)
+        self.maxlevel = int(max_depth)
+        self.maxstring = self.maxother = self.maxlong = self.max_chars
+        self.maxlist = self.maxtuple = self.maxdict = self.maxset = self.maxfrozenset = self.max_elements
+        self.maxdeque = self.maxarray = self.max_elements
+        self.time_budget = float(time_budget_ms) / 1000.0
+        self.call_with_timeout = call_with_timeout
+        self._deadline = None
+        self._slow_types = weakref.WeakSet()   # tipi il cui __repr__ ha sforato il budget
+        self.truncated = False
+
+    @classmethod
+    def from_config(cls, limits, call_with_timeout=None):
+        merged = dict(DEFAULT_REPR_LIMITS)
+        if isinstance(limits, dict):
+            merged.update({k: v for k, v in limits.items() if k in DEFAULT_REPR_LIMITS})
+        return cls(call_with_timeout=call_with_timeout, **merged)
+
+    def start_budget(self):
+        self._deadline = time.perf_counter() + self.time_budget
+
+    def budget_exhausted(self):
+        return self._deadline is not None and time.perf_counter() > self._deadline
+
+    def summarize(self, value):
+        """Restituisce (testo, troncato)."""
+        self.truncated = False
+        try:
+            text = self.repr(value)
+        except Exception as e:
+            return f"<repr error: {e}>", False
+        if isinstance(value, _CONTAINERS) and len(value) > self.max_elements:
+            text = f"{text} (len={len(value)})"
+        if len(text) > self.max_chars:
+            text = text[:self.max_chars] + "..."
+            self.truncated = True
+        return text, self.truncated
+
+    def repr1(self, x, level):
+        if self.budget_exhausted():
+            self.truncated = True
+            return self._fallback(x)
+        for cls in type(x).__mro__:
+            func = _SUMMARIZERS.get(_type_path(cls))
+            if func is not None:
+                return func(x, self)
+        if isinstance(x, _CONTAINERS):
+            if len(x) > self.max_elements or (level <= 0 and len(x)):
+                self.truncated = True
+        elif isinstance(x, str) and len(x) > self.maxstring:
+            self.truncated = True
+        return super().repr1(x, level)
+
+    def repr_dict(self, x, level):
+        # Come reprlib, ma solo i primi max_elements nell'ordine del dict
+        if not x: return '{}'
+        if level <= 0: return '{...}'
+        pieces = [f"{self.repr1(k, level - 1)}: {self.repr1(v, level - 1)}"
+                  for k, v in itertools.islice(x.items(), self.maxdict)]
+        if len(x) > self.maxdict: pieces.append('...')
+        return '{%s}' % ', '.join(pieces)
+
+    def repr_set(self, x, level):
+        if not x: return 'set()'
+        return self._repr_iterable(x, level, '{', '}', self.maxset)
+
+    def repr_frozenset(self, x, level):
+        if not x: return 'frozenset()'
+        return self._repr_iterable(x, level, 'frozenset({', '})', self.maxfrozenset)
+
+    def repr_instance(self, x, level):
+        # Come reprlib, ma segnala il troncamento e non propaga le eccezioni di __repr__
+        try:
+            s = builtins.repr(x) if type(x).__module__ == 'builtins' else self._user_repr(x)
+        except Exception:
+            return self._fallback(x)
+        if s is None:
+            return self._fallback(x)
+        if len(s) > self.maxother:
+            self.truncated = True
+            i = max(0, (self.maxother - 3) // 2)
+            j = max(0, self.maxother - 3 - i)
+            s = s[:i] + "..." + s[len(s) - j:]
+        return s
+
+    def _user_repr(self, x):
+        # __repr__ scritto dall'utente: puo' fare I/O o bloccarsi, quindi ha solo il tempo rimasto
+        cls = type(x)
+        if self.call_with_timeout is None: return builtins.repr(x)
+        remaining = self.time_budget if self._deadline is None else self._deadline - time.perf_counter()
+        if cls in self._slow_types or remaining <= 0:
+            self.truncated = True
+            return None
+        outcome = self.call_with_timeout(partial(builtins.repr, x), remaining)
+        if outcome is None:
+            self._slow_types.add(cls)
+            self.truncated = True
+            return None
+        ok, s = outcome
+        if not ok: raise s
+        return s
+
+    def _fallback(self, x):
+        # Nessuna chiamata a codice utente: solo tipo, lunghezza (per i builtin) e id
+        name = type(x).__name__
+        if isinstance(x, _CONTAINERS + (str, bytes, bytearray)):
+            return f"<{name} len={len(x)}>"
+        return f"<{name} object at {id(x):#x}>"
+
+# --- Riepiloghi per i tipi "pesanti" -----------------------------------------
+
+def _summarize_bytes(x, engine):
+    n = len(x)
+    if n <= engine.maxstring:
+        return builtins.repr(x)
+    engine.truncated = True
+    return f"{builtins.repr(x[:engine.maxstring])}... (len={n})"
+
+def _summarize_generator(x, engine):
+    state = inspect.getgeneratorstate(x) if inspect.isgenerator(x) else None
+    name = getattr(x, '__qualname__', type(x).__name__)
+    return f"<{type(x).__name__} {name}{' ' + state.lower() if state else ''}>"
+
+def _summarize_ndarray(x, engine):
+    text = f"ndarray shape={tuple(x.shape)} dtype={x.dtype}"
+    if x.size <= engine.max_elements:
+        return f"{text} {engine.repr(x.tolist())}"
+    engine.truncated = True
+    return text
+
+def _summarize_dataframe(x, engine):
+    columns = list(x.columns[:engine.max_elements])
+    if len(x.columns) > engine.max_elements:
+        engine.truncated = True
+    return f"DataFrame shape={tuple(x.shape)} columns={engine.repr(columns)}"
+
+def _summarize_series(x, engine):
+    return f"Series len={len(x)} dtype={x.dtype} name={x.name!r}"
+
+register_summarizer('builtins.bytes', _summarize_bytes)
+register_summarizer('builtins.bytearray', _summarize_bytes)
+register_summarizer('builtins.generator', _summarize_generator)
+register_summarizer('builtins.coroutine', _summarize_generator)
+register_summarizer('builtins.async_generator', _summarize_generator)
+register_summarizer('numpy.ndarray', _summarize_ndarray)
+register_summarizer('pandas.core.frame.DataFrame', _summarize_dataframe)
+register_summarizer('pandas.core.series.Series', _summarize_series)
@@ -1,24 +1,130 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import bisect
 import re
+
+# Replace All: match piu' vicini di BLOCK_GAP caratteri vengono sostituiti con una sola replace
+BLOCK_GAP = 4096
+BLOCK_MAX = 65536
+
+def offset_positions(content, offsets):
+    """(riga, colonna) per offset crescenti in content, in una sola passata."""
+    line, line_start, last = 1, 0, 0
+    for offset in offsets:
+        newlines = content.count('\n', last, offset)
+        if newlines:
+            line += newlines
+            line_start = content.rfind('\n', last, offset) + 1
+        last = offset
+        yield line, offset - line_start
+
+def replacement_blocks(content, spans, replacement):
+    """Raggruppa gli span (start, end) in blocchi (start, end, testo_sostituito) contigui."""
+    blocks = []
+    start = end = None
+    pieces = []
+    for s, e in spans:
+        if start is not None and s - end <= BLOCK_GAP and e - start <= BLOCK_MAX:
+            pieces.append(content[end:s]); pieces.append(replacement)
+            end = e
+            continue
+        if start is not None: blocks.append((start, end, ''.join(pieces)))
+        start, end, pieces = s, e, [replacement]
+    if start is not None: blocks.append((start, end, ''.join(pieces)))
+    return blocks
+
+def replace_spans(text, content, spans, replacement):
+    """
+    Replaces the character spans of `content` (the text of `text`) back to front, so earlier
+    indexes stay valid, as a single undo step. Nearby spans share one Text 'replace' call.
+    """
+    blocks = replacement_blocks(content, spans, replacement)
+    if not blocks: return 0
+    indexes = [f"{line}.{col}" for line, col in offset_positions(content, [offset for s, e, _ in blocks for offset in (s, e)])]
+    autoseparators = text.cget('autoseparators')
+    text.configure(autoseparators=False)
+    try:
+        text.edit_separator()
+        for i in range(len(blocks) - 1, -1, -1):
+            text.replace(indexes[2 * i], indexes[2 * i + 1], blocks[i][2])
+        text.edit_separator()
+    finally:
+        text.configure(autoseparators=autoseparators)
+    return len(spans)
+
+class EditorMatches:
+    """
+    Match positions of one editor as a sorted list of (line, start_col, end_col).
+    The editor forwards its (line, delta) edit notifications: following lines are shifted and
+    the edited ones rescanned, so positions stay valid without Tk marks. Only the visible
+    lines carry the highlight tag, refreshed by the editor after scrolls and edits.
+    """
+    def __init__(self, editor, pattern, tag):
+        self.editor = editor
+        self.text = editor.text
+        self.pattern = pattern
+        self.tag = tag
+        self.show_all = False
+        self._shown = None   # (prima, ultima) righe su cui e' applicato il tag
+        content = self.text.get("1.0", "end-1c")
+        spans = [m.span() for m in pattern.finditer(content) if m.end() > m.start()]
+        self.positions = [(line, col, col + e - s) for (line, col), (s, e) in
+                          zip(offset_positions(content, [s for s, _ in spans]), spans)]
+        editor.search_matches = self
+    def __len__(self):
+        return len(self.positions)
+    def _scan(self, first, last):
+        found = []
+        for line, text in enumerate(self.text.get(f"{first}.0", f"{last}.end").split('\n'), first):
+            found.extend((line, m.start(), m.end()) for m in self.pattern.finditer(text) if m.end() > m.start())
+        return found
+    def on_edit(self, line, delta):
+        """Stessa notifica del SyntaxHighlighter: riga modificata e variazione del numero di righe."""
+        pos = self.positions
+        i = bisect.bisect_left(pos, (line,))
+        j = bisect.bisect_left(pos, (line + max(0, -delta) + 1,))
+        found = self._scan(line, line + max(0, delta))
+        if delta: pos[i:] = found + [(l + delta, s, e) for l, s, e in pos[j:]]
+        else: pos[i:j] = found
+    def show(self, first, last):
+        """Applica il tag solo alle occorrenze delle righe [first, last]."""
+        text = self.text
+        if self._shown is not None:
+            text.tag_remove(self.tag, f"{self._shown[0]}.0", f"{self._shown[1]}.end")
+        text.tag_remove(self.tag, f"{first}.0", f"{last}.end")
+        self._shown = None
+        if not self.show_all: return
+        pos = self.positions
+        indexes = []
+        for l, s, e in pos[bisect.bisect_left(pos, (first,)):bisect.bisect_left(pos, (last + 1,))]:
+            indexes += (f"{l}.{s}", f"{l}.{e}")
+        if indexes: text.tag_add(self.tag, *indexes)
+        self._shown = (first, last)
+    def detach(self):
+        if getattr(self.editor, 'search_matches', None) is self: self.editor.search_matches = None
+        try: self.text.tag_remove(self.tag, "1.0", tk.END)
+        except tk.TclError: pass
+
 class SearchReplaceDialog:
     def __init__(self, parent, app):
-        self.app = app                            
+        self.app = app
         self.top = tk.Toplevel(parent)
         self.top.title("Find and Replace")
-        self.top.transient(parent)                                         
-        self.top.attributes("-topmost", True)                                     
-        self.top.lift()                                                   
-        self.matches = []                                                                     
-        self.current_match_index = -1
+        self.top.transient(parent)
+        self.top.attributes("-topmost", True)
+        self.top.lift()
+        self.results = []      # EditorMatches per editor, nell'ordine delle tab
+        self.current = None    # (EditorMatches, (riga, colonna)) dell'occorrenza selezionata
+        self._query = None
+        self.unread_tabs = 0   # tab non caricate il cui file non si e' potuto cercare
         self.tag_name = "search_highlight"
         self.tag_current = "search_current"
         self.create_widgets()
         self.center_window()
-        self.top.bind("<Destroy>", lambda _: self.clear_highlights())
+        self.top.bind("<Destroy>", self._on_destroy)
     def center_window(self):
-        w=300
-        h=200
+        w=340
+        h=250
         parent = self.top.master
         px = parent.winfo_rootx()
         py = parent.winfo_rooty()
@@ -33,69 +139,192 @@ class SearchReplaceDialog:
         ttk.Label(frame, text="Find:").grid(row=0, column=0, sticky='w')
         self.find_entry = ttk.Entry(frame, width=40)
         self.find_entry.grid(row=0, column=1, padx=5, pady=5)
+        ttk.Label(frame, text="Replace:").grid(row=1, column=0, sticky='w')
+        self.replace_entry = ttk.Entry(frame, width=40)
+        self.replace_entry.grid(row=1, column=1, padx=5, pady=5)
         self.match_case = tk.BooleanVar(value=False)
         ttk.Checkbutton(frame, text="Match case", variable=self.match_case).grid(
-            row=1, column=0, columnspan=2, sticky='w')
+            row=2, column=0, columnspan=2, sticky='w')
         self.whole_word = tk.BooleanVar(value=False)
         ttk.Checkbutton(frame, text="Whole word", variable=self.whole_word).grid(
-            row=2, column=0, columnspan=2, sticky='w')
+            row=3, column=0, columnspan=2, sticky='w')
         self.search_current = tk.BooleanVar(value=True)
         ttk.Radiobutton(frame, text="Search in current tab", variable=self.search_current, value=True).grid(
-            row=3, column=0, columnspan=2, sticky='w')
-        ttk.Radiobutton(frame, text="Search in all open tabs", variable=self.search_current, value=False).grid(
             row=4, column=0, columnspan=2, sticky='w')
+        ttk.Radiobutton(frame, text="Search in all open tabs", variable=self.search_current, value=False).grid(
+            row=5, column=0, columnspan=2, sticky='w')
         btn_frame = ttk.Frame(frame)
-        btn_frame.grid(row=5, column=0, columnspan=2, pady=10)
+        btn_frame.grid(row=6, column=0, columnspan=2, pady=(10, 2))
         ttk.Button(btn_frame, text="Find Next", command=self.find_next).pack(side='left', padx=2)
         ttk.Button(btn_frame, text="Find All", command=self.find_all).pack(side='left', padx=2)
         ttk.Button(btn_frame, text="Cancel", command=self.top.destroy).pack(side='left', padx=2)
+        btn_frame2 = ttk.Frame(frame)
+        btn_frame2.grid(row=7, column=0, columnspan=2)
+        ttk.Button(btn_frame2, text="Replace", command=self.replace).pack(side='left', padx=2)
+        ttk.Button(btn_frame2, text="Replace All", command=self.replace_all).pack(side='left', padx=2)
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(frame, textvariable=self.status_var).grid(row=8, column=0, columnspan=2, sticky='w')
+        for var in (self.match_case, self.whole_word, self.search_current):
+            var.trace_add('write', lambda *_: self._invalidate())
+    @property
+    def match_count(self):
+        return sum(len(r) for r in self.results)
     def find_all(self):
         query = self.find_entry.get().strip()
         if not query:
             return
         self.clear_highlights()
         self._gather_matches(query)
-        if not self.matches:
+        if not self.match_count:
             messagebox.showinfo("Not found", "Nessuna occorrenza trovata.")
             return
-        editors_taggati = set()
-        for editor, start, end in self.matches:
-            editor.text.tag_add(self.tag_name, start, end)
-            editors_taggati.add(editor)
-        for editor in editors_taggati:
-            editor.text.tag_configure(self.tag_name, background="#aaccee")
+        # Nessun tag per tutte le occorrenze: ogni editor colora solo quelle in vista
+        for result in self.results:
+            result.show_all = True
+            result.text.tag_configure(self.tag_name, background="#aaccee")
+            result.editor._trigger_highlight_update()
+        self.status_var.set(f"{self.match_count} matches")
     def find_next(self):
         query = self.find_entry.get().strip()
         if not query:
             return
-        if not self.matches:
+        if query != self._query:
             self._gather_matches(query)
-            if not self.matches:
-                messagebox.showinfo("Not found", "Nessuna occorrenza trovata.")
-                return
-        self.current_match_index = (self.current_match_index + 1) % len(self.matches)
+        if not self.match_count:
+            messagebox.showinfo("Not found", "Nessuna occorrenza trovata.")
+            return
+        if self.current is not None:
+            result, (line, col) = self.current
+            found = self._advance(result, (line, col + 1))
+        else:
+            found = self._advance(*self._cursor_start())
+        self.clear_highlights()
+        if found: self.highlight_current_match(*found)
+    def _cursor_start(self):
+        # Prima ricerca: si parte dal cursore dell'editor attivo (o dall'inizio del primo editor)
+        text = self.app.get_active_editor_text_widget()
+        for result in self.results:
+            if result.text == text:
+                line, col = map(int, text.index("insert").split('.'))
+                return result, (line, col)
+        return self.results[0], (1, 0)
+    def _advance(self, result, key):
+        """Prima occorrenza da key (riga, colonna) in poi, passando agli editor successivi e ricominciando da capo."""
+        results = [r for r in self.results if r.editor.winfo_exists()]
+        if not results: return None
+        start = results.index(result) if result in results else 0
+        for k in range(len(results) + 1):
+            result = results[(start + k) % len(results)]
+            i = bisect.bisect_left(result.positions, key) if k == 0 else 0
+            if i < len(result.positions): return result, result.positions[i]
+        return None
+    def replace(self):
+        """Sostituisce l'occorrenza corrente (se c'e' ancora) e passa alla successiva."""
+        query = self.find_entry.get().strip()
+        if not query:
+            return
+        if self.current is None or query != self._query:
+            self.find_next(); return
+        result, (line, col) = self.current
+        editor = result.editor
+        i = bisect.bisect_left(result.positions, (line, col))
+        if i == len(result.positions) or result.positions[i][:2] != (line, col) or not self._is_writable(editor):
+            self.find_next(); return   # occorrenza modificata dopo la ricerca, o tab in sola lettura
+        replacement = self.replace_entry.get()
+        try:
+            editor.text.edit_separator()
+            editor.text.replace(f"{line}.{col}", f"{line}.{result.positions[i][2]}", replacement)
+            editor.text.edit_separator()
+        except tk.TclError: pass
+        # L'indice e' gia' aggiornato dalla notifica di modifica: si riparte dopo il testo inserito
         self.clear_highlights()
-        self.highlight_current_match()
+        found = self._advance(result, (line, col + len(replacement)))
+        if found: self.highlight_current_match(*found)
+        else: self.current = None; self.status_var.set("No more matches")
+    def replace_all(self):
+        query = self.find_entry.get().strip()
+        if not query:
+            return
+        pattern = self._pattern(query)
+        replacement = self.replace_entry.get()
+        self._invalidate()
+        total, skipped = 0, 0
+        for editor in self._target_editors(pattern):
+            text = editor.text
+            try:
+                content = text.get("1.0", "end-1c")
+                spans = [m.span() for m in pattern.finditer(content) if m.end() > m.start()]
+                if not spans: continue
+                if not self._is_writable(editor): skipped += 1; continue
+                total += replace_spans(text, content, spans, replacement)
+                # Le righe sostituite in blocco perdono i tag: si ripristinano quelli dei breakpoint
+                if hasattr(editor, 'refresh_breakpoint_tags'): editor.refresh_breakpoint_tags()
+            except tk.TclError: pass
+        if not total and not skipped and not self.unread_tabs:
+            messagebox.showinfo("Not found", "Nessuna occorrenza trovata.")
+            return
+        status = f"Replaced {total} occurrences"
+        if skipped: status += f" ({skipped} read-only tabs skipped)"
+        self.status_var.set(status + self._unread_note())
+    def _pattern(self, query):
+        flags = 0 if self.match_case.get() else re.IGNORECASE
+        return re.compile(rf"\b{re.escape(query)}\b" if self.whole_word.get() else re.escape(query), flags)
+    def _target_editors(self, pattern):
+        self.unread_tabs = 0
+        if not self.search_current.get():
+            self._load_matching_tabs(pattern)
+            return [editor for editor in self.app.open_tabs.values() if editor.winfo_exists()]
+        text = self.app.get_active_editor_text_widget()
+        return [editor for editor in self.app.open_tabs.values() if editor.winfo_exists() and editor.text == text]
+    def _load_matching_tabs(self, pattern):
+        # Le tab non ancora caricate si cercano nel file su disco: si caricano solo quelle con
+        # occorrenze; unread_tabs conta quelle il cui file non si e' potuto leggere
+        for path in self.app.pending_tab_paths():
+            try:
+                with open(path, 'r', encoding='utf-8') as f: content = f.read()
+            except (OSError, ValueError): self.unread_tabs += 1; continue
+            if pattern.search(content) and self.app.load_pending_tab(path) is None: self.unread_tabs += 1
+    def _unread_note(self):
+        return f" ({self.unread_tabs} unopened tabs could not be read)" if self.unread_tabs else ""
+    def _is_writable(self, editor):
+        return str(editor.text.cget('state')) == 'normal'
     def _gather_matches(self, query):
-        match_case = self.match_case.get()
-        whole_word = self.whole_word.get()
-        flags = 0 if match_case else re.IGNORECASE
-        pat = rf"\b{re.escape(query)}\b" if whole_word else re.escape(query)
-        self.matches.clear()
-        self.current_match_index = -1
-        for _, editor in self.app.open_tabs.items():
-            text = editor.text.get("1.0", tk.END)
-            for m in re.finditer(pat, text, flags):
-                start = f"1.0+{m.start()}c"
-                end   = f"1.0+{m.end()}c"
-                self.matches.append((editor, start, end))
-    def highlight_current_match(self):
-        editor, start, end = self.matches[self.current_match_index]
-        editor.text.tag_add(self.tag_current, start, end)
-        editor.text.tag_configure(self.tag_current, background="#aaccee")
-        editor.text.mark_set("insert", start)
-        editor.text.see(start)
+        pattern = self._pattern(query)
+        self._invalidate()
+        self._query = query
+        self.results = [EditorMatches(editor, pattern, self.tag_name) for editor in self._target_editors(pattern)]
+        self.status_var.set((f"{self.match_count} matches" if self.match_count else "") + self._unread_note())
+    def _invalidate(self):
+        """Scarta i risultati: la prossima ricerca li ricalcola."""
+        for result in self.results: result.detach()
+        self.results = []
+        self.current = None
+        self._query = None
+    def highlight_current_match(self, result, position):
+        line, col, end = position
+        self.current = (result, (line, col))
+        text = result.text
+        text.tag_add(self.tag_current, f"{line}.{col}", f"{line}.{end}")
+        text.tag_configure(self.tag_current, background="#aaccee")
+        text.mark_set("insert", f"{line}.{col}")
+        text.see(f"{line}.{col}")
+        # Numero progressivo: occorrenze degli editor precedenti + posizione in questo
+        before = 0
+        for r in self.results:
+            if r is result: break
+            before += len(r)
+        number = before + bisect.bisect_left(result.positions, (line, col)) + 1
+        self.status_var.set(f"{number} of {self.match_count}")
     def clear_highlights(self):
+        for result in self.results:
+            if result.editor.winfo_exists(): result.show_all = False
+        # Le tab non caricate non hanno tag: quelle con risultati sono gia' in open_tabs
         for _, editor in self.app.open_tabs.items():
+            if not editor.winfo_exists(): continue
             editor.text.tag_remove(self.tag_name, "1.0", tk.END)
             editor.text.tag_remove(self.tag_current, "1.0", tk.END)
+    def _on_destroy(self, event):
+        if event.widget is not self.top: return
+        try: self.clear_highlights()
+        except tk.TclError: pass
+        self._invalidate()
@@ -0,0 +1,230 @@
+import builtins
+import keyword
+import re
+import time
+
+# Tag di evidenziazione, nell'ordine in cui vengono rimossi/applicati
+SYNTAX_TAGS = ('keyword', 'comment', 'string', 'number', 'function', 'class', 'decorator', 'builtin', 'self')
+
+KEYWORDS = frozenset(keyword.kwlist + keyword.softkwlist)
+BUILTINS = frozenset(name for name in dir(builtins) if not name.startswith('_'))
+
+_TOKEN_RE = re.compile(r"""
+    (?P<comment>\#.*)
+  | (?P<string>(?<!\w)[rRbBuUfF]{0,2}(?P<quote>\"\"\"|'''|"|'))
+  | (?P<decorator>@\w+)
+  | (?P<number>\b(?:0[xXoObB][0-9a-fA-F_]+|\d[\d_]*\.?[\d_]*(?:[eE][-+]?\d+)?j?)\b)
+  | (?P<name>[A-Za-z_]\w*)
+""", re.VERBOSE)
+
+# Fine stringa a partire da una posizione interna (gli escape vengono saltati)
+_STRING_END = {
+    '"""': re.compile(r'(?:\\.|[^\\])*?"""', re.DOTALL),
+    "'''": re.compile(r"(?:\\.|[^\\])*?'''", re.DOTALL),
+    '"': re.compile(r'(?:\\.|[^\\"])*"'),
+    "'": re.compile(r"(?:\\.|[^\\'])*'"),
+}
+
+def _open_string_state(line, quote):
+    # Stringa non chiusa a fine riga: le triple continuano, le semplici solo con '\' finale
+    if len(quote) == 3: return quote
+    trailing = len(line) - len(line.rstrip('\\'))
+    return quote if trailing % 2 else None
+
+def lex_line(line, state=None):
+    """
+    Tokenizes one line starting in lexer state `state` (None, or the quote of an open string).
+    Returns (tokens, exit_state) with tokens as (tag, start_col, end_col).
+    """
+    tokens = []
+    pos, n = 0, len(line)
+    if state is not None:
+        m = _STRING_END[state].match(line)
+        if m is None:
+            if n: tokens.append(('string', 0, n))
+            return tokens, _open_string_state(line, state)
+        tokens.append(('string', 0, m.end()))
+        pos = m.end()
+    after_def = None
+    while pos < n:
+        m = _TOKEN_RE.search(line, pos)
+        if m is None: break
+        kind = m.lastgroup if m.lastgroup != 'quote' else 'string'
+        start, pos = m.span()
+        if kind == 'name':
+            word = m.group()
+            if after_def is not None: tokens.append((after_def, start, pos))
+            elif word in KEYWORDS: tokens.append(('keyword', start, pos))
+            elif word == 'self' or word == 'cls': tokens.append(('self', start, pos))
+            elif word in BUILTINS: tokens.append(('builtin', start, pos))
+            after_def = ('function' if word == 'def' else 'class') if word in ('def', 'class') else None
+            continue
+        after_def = None
+        if kind == 'string':
+            quote = m.group('quote')
+            end = _STRING_END[quote].match(line, pos)
+            if end is None:
+                tokens.append(('string', start, n))
+                return tokens, _open_string_state(line, quote)
+            pos = end.end()
+        tokens.append((kind, start, pos))
+    return tokens, None
+
+def scan_state(line, state=None):
+    """Solo lo stato a fine riga: le righe senza apici (fuori da stringhe) non vengono tokenizzate."""
+    if state is None and '"' not in line and "'" not in line: return None
+    return lex_line(line, state)[1]
+
+class SyntaxHighlighter:
+    """
+    Incremental highlighter for a tk.Text.
+    Keeps the lexer state at the start of every line; after an edit only the lines from the
+    edited one onwards are re-lexed, until the state matches the one stored before the edit.
+    Tags are applied to runs of stale lines with one tag_remove/tag_add call per tag, and
+    stay valid until the line (or its entry state) changes, so scrolling back costs nothing.
+    """
+    CHUNK_LINES = 500
+    BACKGROUND_BLOCK = 100
+    def __init__(self, text):
+        self.text = text
+        self.reset()
+    def reset(self):
+        n = self._text_line_count()
+        self._entry = [None] * (n + 2)    # _entry[i]: stato all'inizio della riga i
+        self._tagged = [True] + [False] * n  # _tagged[i]: i tag della riga i sono aggiornati (0: sentinella)
+        self._valid = 0                   # righe 1.._valid con stato di uscita corretto
+        self._known = 0                   # oltre _dirty_hi, stati coerenti fino a _known
+        self._dirty_hi = 0
+    @property
+    def line_count(self):
+        return len(self._tagged) - 1
+    def _text_line_count(self):
+        return int(self.text.index('end-1c').split('.')[0])
+    def _get_lines(self, first, last):
+        return self.text.get(f'{first}.0', f'{last}.end').split('\n')
+    def on_edit(self, line, delta):
+        """Riga della modifica e variazione del numero di righe (da insert/delete/replace)."""
+        line = max(1, min(line, self.line_count))
+        if delta > 0:
+            self._entry[line + 1:line + 1] = [None] * delta
+            self._tagged[line + 1:line + 1] = [False] * delta
+        elif delta < 0:
+            del self._entry[line + 1:line + 1 - delta]
+            del self._tagged[line + 1:line + 1 - delta]
+        self._tagged[line] = False
+        self._valid = min(self._valid, line - 1)
+        if self._known >= line: self._known = max(line - 1, self._known + delta)
+        if self._dirty_hi >= line: self._dirty_hi = max(line, self._dirty_hi + delta)
+        self._dirty_hi = max(self._dirty_hi, line + max(delta, 0))
+    def ensure_states(self, upto):
+        """Porta gli stati di inizio riga fino a `upto` in linea con il testo."""
+        upto = min(upto, self.line_count)
+        entry, tagged = self._entry, self._tagged
+        changed = False
+        while self._valid < upto:
+            first = self._valid + 1
+            last = min(upto, first + self.CHUNK_LINES - 1)
+            for i, line in enumerate(self._get_lines(first, last), first):
+                old = entry[i + 1]
+                new = scan_state(line, entry[i])
+                self._valid = i
+                changed = new != old
+                if changed:
+                    entry[i + 1] = new
+                    if i < self.line_count: tagged[i + 1] = False
+                elif i >= self._dirty_hi and i <= self._known:
+                    self._valid = self._known   # stati convergenti: il resto era gia' coerente
+                    break
+        if self._valid >= self._dirty_hi:
+            # Interrotto prima della convergenza: la riga successiva va rilessa col nuovo stato
+            self._dirty_hi = self._valid + 1 if changed and self._valid < self._known else 0
+        self._known = max(self._known, self._valid)
+    def highlight(self, first, last):
+        """Applica i tag alle righe [first, last] non ancora aggiornate."""
+        if self._text_line_count() != self.line_count: self.reset()
+        first, last = max(1, first), min(last, self.line_count)
+        if first > last: return
+        self.ensure_states(last)
+        if False not in self._tagged[first:last + 1]: return
+        tagged = self._tagged
+        i = first
+        while i <= last:
+            try: i = tagged.index(False, i, last + 1)
+            except ValueError: return
+            try: run_end = tagged.index(True, i, last + 1) - 1
+            except ValueError: run_end = last
+            self._tag_run(i, run_end)
+            i = run_end + 1
+    @property
+    def complete(self):
+        return self._valid >= self.line_count and False not in self._tagged
+    def highlight_outward(self, first, last, budget):
+        """
+        Colora a blocchi le righe attorno a [first, last], alternando sotto e sopra, finche'
+        non scade il budget (secondi). Restituisce True se resta ancora lavoro.
+        """
+        deadline = time.perf_counter() + budget
+        self.highlight(first, last)
+        below, above = last + 1, first - 1
+        block = self.BACKGROUND_BLOCK
+        while not self.complete:
+            if below > self.line_count and above < 1: return False
+            if below <= self.line_count:
+                self.highlight(below, below + block - 1); below += block
+            if above >= 1:
+                self.highlight(max(1, above - block + 1), above); above -= block
+            if time.perf_counter() > deadline: return not self.complete
+        return False
+    def _tag_run(self, first, last):
+        ranges = {tag: [] for tag in SYNTAX_TAGS}
+        entry = self._entry
+        for i, line in enumerate(self._get_lines(first, last), first):
+            for tag, start, end in lex_line(line, entry[i])[0]:
+                ranges[tag] += (f'{i}.{start}', f'{i}.{end}')
+            self._tagged[i] = True
+        for tag in SYNTAX_TAGS:
+            self.text.tag_remove(tag, f'{first}.0', f'{last + 1}.0')
+        for tag, indexes in ranges.items():
+            if indexes: self.text.tag_add(tag, *indexes)
+
+# Proc Tcl che sostituisce il comando del widget Text: inoltra tutto all'originale e,
+# per insert/delete/replace, notifica la riga modificata e il numero di righe prima/dopo.
+# replace viene notificata come cancellazione + inserimento, cosi' le righe sostituite vengono rilette.
+_EDIT_HOOK_PROC = r'''
+proc %(widget)s args {
+    switch -exact -- [lindex $args 0] {
+        replace {
+            set first [%(orig)s index [lindex $args 1]]
+            set last [%(orig)s index [lindex $args 2]]
+            set before [%(orig)s index end]
+            set result [%(orig)s {*}$args]
+            set middle "[expr {int($before) - (int($last) - int($first))}].0"
+            %(callback)s $first $before $middle
+            %(callback)s $first $middle [%(orig)s index end]
+            return $result
+        }
+        insert - delete {
+            set first [%(orig)s index [lindex $args 1]]
+            set before [%(orig)s index end]
+            set result [%(orig)s {*}$args]
+            %(callback)s $first $before [%(orig)s index end]
+            return $result
+        }
+    }
+    return [%(orig)s {*}$args]
+}
+'''
+
+def install_edit_hook(text, callback):
+    """Chiama callback(riga, delta_righe) dopo ogni modifica del Text (tastiera, undo, API)."""
+    def on_edit(first, before, after):
+        try: callback(int(first.split('.')[0]), int(after.split('.')[0]) - int(before.split('.')[0]))
+        except Exception: pass   # un'eccezione qui verrebbe rilanciata dal mainloop
+    widget = text._w
+    orig = widget + '_orig'
+    text.tk.call('rename', widget, orig)
+    text.tk.eval(_EDIT_HOOK_PROC % {'widget': widget, 'orig': orig, 'callback': text.register(on_edit)})
+    def remove(event=None):
+        try: text.tk.call('rename', widget, '')
+        except Exception: pass
+    text.bind('<Destroy>', remove, add='+')
@@ -1,15 +1,11 @@
+import time
+STARTUP_T0 = time.perf_counter()   # riferimento per --profile-startup, prima degli altri import
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import tkinter.font as tkfont
-import json
 import os
 import base64
-from screeninfo import get_monitors
-import cairosvg
-import requests
 import traceback
-import io
-from PIL import Image, ImageTk
 import sys # Assicurati che sys sia importato
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -17,14 +13,12 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from gui.debugger_app import DebuggerApp
-from gui.editor import CodeEditor
-from gui.run_config_dialog import RunConfigDialog
-from gui.debug_exec_dialog import DebugExecDialog
+from gui.editor import CodeEditor, EditorPlaceholder
 from gui.themes import THEMES
 from gui.config_defaults import DEFAULT_CONFIG
-from gui.ollama_config_dialog import OllamaConfigDialog
-from gui.ollama_chat_window import OllamaChatWindow
+from gui.config_store import ConfigStore
 from gui.custom_notebook import CustomNotebook # Assicurati che sia importato
+from gui.icons import IconLoader
 
 # --- NUOVA PARTE: GESTIONE PERCORSO CONFIGURAZIONE ---
 APP_NAME = "PythonDbgGui" # Nome della tua applicazione per la cartella di configurazione
@@ -65,6 +59,7 @@ def get_user_config_path(app_name, filename=".config.json"):
     return os.path.join(config_dir_path, filename)
 
 CONFIG_PATH = get_user_config_path(APP_NAME) # NUOVA DEFINIZIONE
+ICON_CACHE_DIR = os.path.join(os.path.dirname(CONFIG_PATH), "icon_cache")
 # --- FINE NUOVA PARTE ---
 
 
@@ -94,10 +89,12 @@ class MainApplication:
     def __init__(self, root):
         self.root = root
         self.open_tabs = {}
+        self._pending_tabs = {}   # percorso normalizzato -> EditorPlaceholder (tab non ancora caricate)
         self.is_running = False
         self.paused = False
         self.command_pending = False
         self.current_debug_target_path = None
+        self.icon_loader = IconLoader(root, ICON_CACHE_DIR)
         self.debug_exec_window = None
         self._eval_req_id = 0
         self._eval_callbacks = {}   # req_id -> callback
@@ -108,7 +105,9 @@ class MainApplication:
         self.current_theme_name = "light" # Default, verrà sovrascritto da config
         self.current_editor_font_size = 11 # Default, verrà sovrascritto da config
 
+        self.config_store = ConfigStore(CONFIG_PATH, DEFAULT_CONFIG)
         self.config = self._load_config() # Carica la configurazione usando il nuovo CONFIG_PATH
+        self.config_store.bind(root, self._collect_config)
 
         self._pane_states = self.config.get('pane_states', DEFAULT_CONFIG['pane_states'].copy())
         self.run_configs = self.config.get('run_configs', DEFAULT_CONFIG['run_configs'].copy())
@@ -167,10 +166,20 @@ class MainApplication:
         self.root.after_idle(self._apply_theme_globally)
         self.root.after_idle(self._apply_font_size_to_all_editors)
         
-        # Carica i file aperti precedentemente
-        for fp in self.config.get('open_files', []):
-            if os.path.exists(fp) and os.path.isfile(fp):
-                self._create_editor(fp)
+        # Riapre i file della sessione precedente: solo la tab attiva viene caricata subito,
+        # le altre sono segnaposto che diventano editor alla prima selezione
+        restore = [fp for fp in self.config.get('open_files', []) if isinstance(fp, str) and os.path.isfile(fp)]
+        active_file = self.config.get('active_file')
+        if active_file not in restore: active_file = restore[-1] if restore else None
+        active_editor = None
+        for fp in restore:
+            if fp == active_file: active_editor = self._create_editor(fp)
+            else: self._add_placeholder_tab(fp)
+        if active_editor is not None:
+            try: self.app.notebook.select(active_editor)
+            except tk.TclError: pass
+        if hasattr(self.app, 'notebook') and self.app.notebook:
+            self.app.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed, add='+')
                 
         root.protocol("WM_DELETE_WINDOW", self.on_exit)
         self._restore_geometry() # Ripristina dimensioni e posizione della finestra
@@ -180,6 +189,20 @@ class MainApplication:
         self._set_icon()
         
         
+    def request_completions(self, expr, callback):
+        """
+        Nomi per il completamento dal frame in pausa (vedi DebuggerApp.request_completions).
+        None se non si e' in pausa o se la risposta arrivera' dopo tramite callback(nomi).
+        """
+        if not getattr(self, "is_running", False) or not getattr(self, "paused", False):
+            return None
+        if not getattr(self, "app", None) or not hasattr(self.app, "request_completions"):
+            return None
+        try:
+            return self.app.request_completions(expr, callback)
+        except Exception:
+            return None
+
     def evaluate_expression_async(self, expr, callback=None):
         """
         Valuta `expr` nel frame corrente quando il debugger è in pausa.
@@ -337,25 +360,16 @@ class MainApplication:
         except Exception:
             pass
     def _set_icon(self):
-        svg_url = "https://www.svgrepo.com/show/450791/debug-script.svg"
-        icon_set = False
+        # Subito l'icona incorporata; quella vettoriale arriva dal loader, se rasterizzabile
         try:
-            resp = requests.get(svg_url, timeout=3)
-            resp.raise_for_status()
-            png_data = cairosvg.svg2png(bytestring=resp.content, dpi=96)               
-            icon_img = tk.PhotoImage(data=png_data)
-            if self.root.winfo_exists():
-                self.root.iconphoto(True, icon_img)
-            icon_set = True
+            self.app_icon = tk.PhotoImage(data=base64.b64decode(DEFAULT_ICON_DATA))
+            if self.root.winfo_exists(): self.root.iconphoto(True, self.app_icon)
         except Exception:
             pass
-        if not icon_set:
-            try:
-                icon_img = tk.PhotoImage(data=base64.b64decode(DEFAULT_ICON_DATA))
-                if self.root.winfo_exists():
-                    self.root.iconphoto(True, icon_img)
-            except Exception:
-                pass
+        def apply(name, image):
+            if self.root.winfo_exists(): self.app_icon = image; self.root.iconphoto(True, image)
+        self.icon_loader.load(['debug_script'], 64, 'app', 'black', apply,
+                              refresh=self.config.get('icons_network_refresh', False))
     def _restore_geometry(self):
         if not self.root.winfo_exists(): return
         geom_size = self.config.get('geometry', DEFAULT_CONFIG['geometry'])
@@ -368,44 +382,28 @@ class MainApplication:
                     pos_parts = geom_pos.lstrip('+').split('+')
                     if len(pos_parts) == 2:
                         req_x, req_y = int(pos_parts[0]), int(pos_parts[1])
-                        monitors = get_monitors()
-                        if monitors:
-                            monitor = monitors[0]
-                            if 0 <= req_x < (monitor.width - 50) and 0 <= req_y < (monitor.height - 50):
-                                self.root.geometry(f"{w}x{h}+{req_x}+{req_y}"); return
+                        monitor_w, monitor_h = self._primary_monitor_size()
+                        if 0 <= req_x < (monitor_w - 50) and 0 <= req_y < (monitor_h - 50):
+                            self.root.geometry(f"{w}x{h}+{req_x}+{req_y}"); return
                 except (ValueError, IndexError): pass
-            monitors = get_monitors()
-            if monitors:
-                monitor = monitors[0]
-                x = (monitor.width - w) // 2; y = (monitor.height - h) // 2
+            monitor_w, monitor_h = self._primary_monitor_size()
+            if monitor_w and monitor_h:
+                x = (monitor_w - w) // 2; y = (monitor_h - h) // 2
                 self.root.geometry(f"{w}x{h}+{x}+{y}")
             else:                                           
                 self.root.geometry(f"{w}x{h}")
         except Exception:
             self.root.geometry(f"{MIN_WIDTH}x{MIN_HEIGHT}")
+    def _primary_monitor_size(self):
+        """(larghezza, altezza) del primo monitor: screeninfo se installato, altrimenti lo schermo di Tk."""
+        try:
+            from screeninfo import get_monitors
+            monitors = get_monitors()
+            if monitors: return monitors[0].width, monitors[0].height
+        except Exception: pass
+        return self.root.winfo_screenwidth(), self.root.winfo_screenheight()
     def _load_config(self):
-        if os.path.exists(CONFIG_PATH):
-            try:
-                with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                    if isinstance(config_data, dict):
-                        merged_config = json.loads(json.dumps(DEFAULT_CONFIG))            
-                        def recursive_update(original, updates):
-                            for key, value in updates.items():
-                                if isinstance(value, dict) and key in original and isinstance(original[key], dict):
-                                    recursive_update(original[key], value)
-                                else:
-                                    original[key] = value
-                            for key, value in DEFAULT_CONFIG.items():                                          
-                                if key not in original and isinstance(merged_config.get(key),dict) and isinstance(value,dict):                                
-                                    original[key] = json.loads(json.dumps(value))            
-                                elif key not in original:
-                                     original[key] = value
-                        recursive_update(merged_config, config_data)
-                        return merged_config
-            except (json.JSONDecodeError, OSError, Exception):
-                 pass
-        return json.loads(json.dumps(DEFAULT_CONFIG))                     
+        return self.config_store.load()
     def _save_pane_state(self, name, paned):
         if not isinstance(paned, ttk.PanedWindow) or not paned.winfo_exists(): return
         try:
@@ -452,7 +450,13 @@ class MainApplication:
                  self._restore_pane_state('main',  self.app.main_pane)
         except Exception:
             pass
+    def _schedule_config_save(self):
+        """Salvataggio differito: piu' modifiche ravvicinate producono una sola scrittura."""
+        self.config_store.schedule()
     def _save_config(self):
+        if not self.root.winfo_exists(): return
+        self.config_store.flush()
+    def _collect_config(self):
         if not self.root.winfo_exists(): return
         try:
             main_geo_full = self.root.geometry()
@@ -463,9 +467,11 @@ class MainApplication:
             self.config['geometry'] = DEFAULT_CONFIG['geometry']
             self.config.pop('main_window_position', None)
         self.config['open_files'] = [
-            ed.filepath for ed in self.open_tabs.values()
+            ed.filepath for ed in self._tab_widgets()
             if getattr(ed, 'filepath', None) and os.path.exists(ed.filepath)
         ]
+        active_widget = self._selected_tab_widget()
+        self.config['active_file'] = getattr(active_widget, 'filepath', None)
         self._pane_states = {}
         try:
             if hasattr(self.app, 'main_pane') and self.app.main_pane.winfo_exists():
@@ -473,39 +479,11 @@ class MainApplication:
             self.config['pane_states'] = self._pane_states.copy()
         except Exception:
             self.config['pane_states'] = DEFAULT_CONFIG['pane_states'].copy()
-        bps = []
-        if hasattr(self.app, 'notebook') and self.app.notebook.winfo_exists():
-            try:
-                for tab_id in self.app.notebook.tabs():
-                    try:
-                        widget = self.app.notebook.nametowidget(tab_id)
-                        if isinstance(widget, CodeEditor) and hasattr(widget, 'breakpoints') and\
-                           hasattr(widget, 'filepath') and widget.filepath and os.path.exists(widget.filepath):
-                            for ln in widget.breakpoints:
-                                bps.append([widget.filepath, ln])
-                    except (tk.TclError, AttributeError): continue
-            except tk.TclError: pass
-        self.config['breakpoints'] = bps
+        self.config_store.set_breakpoints((fp, ln) for fp, ln in self.collect_breakpoints() if os.path.exists(fp))
         self.config['run_configs'] = self.run_configs.copy()
         self.config['debug_exec_dialog_config'] = self.debug_exec_dialog_config.copy()
         self.config['theme'] = self.current_theme_name
         self.config['editor_font_size'] = self.current_editor_font_size
-        try:
-            with open(CONFIG_PATH, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-        except (OSError, TypeError, Exception):
-            pass
-    def _load_icon_from_url(self, url, size=(16, 16)):
-        try:
-            resp = requests.get(url, timeout=3)
-            resp.raise_for_status()
-            png_data = cairosvg.svg2png(bytestring=resp.content, output_width=size[0]*2, output_height=size[1]*2)               
-            img_pil = Image.open(io.BytesIO(png_data))
-            img_pil = img_pil.resize(size, Image.Resampling.LANCZOS)
-            return ImageTk.PhotoImage(img_pil)
-        except Exception:
-            ph_img = Image.new('RGBA', size, (128,128,128,100))
-            return ImageTk.PhotoImage(ph_img)
     def _create_toolbar_buttons(self):
         s = ttk.Style()
         s.configure("Toolbutton", padding=1)
@@ -519,36 +497,35 @@ class MainApplication:
         self.btn_font_dec = ttk.Button(self.toolbar_frame, text="A-", command=self.decrease_font_size, style="Toolbutton", width=3)
         self.btn_font_dec.pack(side=tk.LEFT, padx=(1,2), pady=1)
         if self.root.winfo_exists():
-            self.root.after(500, self._load_and_apply_toolbar_icons)
+            self.root.after_idle(self._load_and_apply_toolbar_icons)
     def _load_and_apply_toolbar_icons(self):
+        """Icone della toolbar per il tema corrente: dalla cache su disco, caricate fuori dal thread Tk."""
         if not self.root.winfo_exists(): return
-        try:
-            icon_dark = self._load_icon_from_url("https://www.svgrepo.com/show/315691/dark-mode.svg", size=(20,20))
-            if icon_dark and hasattr(self, 'btn_dark_mode') and self.btn_dark_mode.winfo_exists():
-                self.icon_dark_mode = icon_dark
-                self.btn_dark_mode.config(image=self.icon_dark_mode, width=2, text="")
-        except Exception: pass
-        try:
-            icon_inc = self._load_icon_from_url("https://www.svgrepo.com/show/309640/font-increase.svg", size=(20,20))
-            if icon_inc and hasattr(self, 'btn_font_inc') and self.btn_font_inc.winfo_exists():
-                self.icon_font_increase = icon_inc
-                self.btn_font_inc.config(image=self.icon_font_increase, width=2, text="")
-        except Exception: pass
-        try:
-            icon_dec = self._load_icon_from_url("https://www.svgrepo.com/show/310863/font-decrease.svg", size=(20,20))
-            if icon_dec and hasattr(self, 'btn_font_dec') and self.btn_font_dec.winfo_exists():
-                self.icon_font_decrease = icon_dec
-                self.btn_font_dec.config(image=self.icon_font_decrease, width=2, text="")
-        except Exception: pass
+        buttons = {'dark_mode': ('btn_dark_mode', 'icon_dark_mode'),
+                   'font_increase': ('btn_font_inc', 'icon_font_increase'),
+                   'font_decrease': ('btn_font_dec', 'icon_font_decrease')}
+        def apply(name, image):
+            button_attr, icon_attr = buttons[name]
+            button = getattr(self, button_attr, None)
+            if button is not None and button.winfo_exists():
+                setattr(self, icon_attr, image)
+                button.config(image=image, width=2, text="")
+        theme_colors = THEMES.get(self.current_theme_name, THEMES["light"])
+        self.icon_loader.load(list(buttons), 20, self.current_theme_name, theme_colors.get("editor_fg", "black"), apply,
+                              refresh=self.config.get('icons_network_refresh', False))
     def toggle_dark_mode(self):
         self.current_theme_name = "dark" if self.current_theme_name == "light" else "light"
         self._apply_theme_globally()
+        self._load_and_apply_toolbar_icons()
+        self._schedule_config_save()
     def increase_font_size(self):
         self.current_editor_font_size = min(self.current_editor_font_size + FONT_SIZE_STEP, MAX_FONT_SIZE)
         self._apply_font_size_to_all_editors()
+        self._schedule_config_save()
     def decrease_font_size(self):
         self.current_editor_font_size = max(self.current_editor_font_size - FONT_SIZE_STEP, MIN_FONT_SIZE)
         self._apply_font_size_to_all_editors()
+        self._schedule_config_save()
     def _apply_theme_globally(self):
         if not self.root.winfo_exists(): return
         theme_colors = THEMES.get(self.current_theme_name, THEMES["light"])
@@ -620,6 +597,71 @@ class MainApplication:
         for editor in self.open_tabs.values():
             if editor.winfo_exists() and isinstance(editor, CodeEditor):
                 editor.set_font_size(self.current_editor_font_size)
+    def _tab_widgets(self):
+        """Widget delle tab nell'ordine del notebook (CodeEditor ed EditorPlaceholder)."""
+        if not (hasattr(self.app, 'notebook') and self.app.notebook.winfo_exists()): return []
+        widgets = []
+        try:
+            for tab_id in self.app.notebook.tabs():
+                try: widgets.append(self.app.notebook.nametowidget(tab_id))
+                except (tk.TclError, KeyError): continue
+        except tk.TclError: pass
+        return widgets
+    def _selected_tab_widget(self):
+        try:
+            current_tab_id = self.app.notebook.select()
+            return self.app.notebook.nametowidget(current_tab_id) if current_tab_id else None
+        except (tk.TclError, AttributeError, KeyError): return None
+    def collect_breakpoints(self):
+        """(file, riga) di tutte le tab, comprese quelle non ancora caricate."""
+        bps = []
+        for widget in self._tab_widgets():
+            filepath = getattr(widget, 'filepath', None)
+            if isinstance(widget, (CodeEditor, EditorPlaceholder)) and filepath:
+                bps.extend((filepath, ln) for ln in widget.breakpoints)
+        return bps
+    def _stored_breakpoints(self, norm_filepath):
+        return self.config_store.breakpoints_for(norm_filepath)
+    def _add_placeholder_tab(self, filepath):
+        norm_filepath = os.path.normcase(os.path.abspath(filepath))
+        if norm_filepath in self.open_tabs or norm_filepath in self._pending_tabs: return
+        placeholder = EditorPlaceholder(self.app.notebook, norm_filepath, self._stored_breakpoints(norm_filepath))
+        try: self.app.notebook.add(placeholder, text=os.path.basename(filepath), padding=(2, 2))
+        except tk.TclError: placeholder.destroy(); return
+        self._pending_tabs[norm_filepath] = placeholder
+    def _on_tab_changed(self, event=None):
+        widget = self._selected_tab_widget()
+        if isinstance(widget, EditorPlaceholder): self._materialize_tab(widget)
+    def _materialize_tab(self, placeholder, opened_by_debugger=False, go_to_line=None):
+        """Sostituisce il segnaposto con un CodeEditor nella stessa posizione."""
+        self._pending_tabs.pop(placeholder.filepath, None)
+        try: index = self.app.notebook.index(placeholder)
+        except tk.TclError: index = None
+        editor = self._create_editor(placeholder.filepath, opened_by_debugger, go_to_line)
+        try:
+            if editor is not None and index is not None: self.app.notebook.insert(index, editor)
+            self.app.notebook.forget(placeholder)
+        except tk.TclError: pass
+        placeholder.destroy()
+        return editor
+    def pending_tab_paths(self):
+        """Percorsi delle tab ripristinate ma non ancora caricate (EditorPlaceholder)."""
+        return list(self._pending_tabs)
+    def load_pending_tab(self, filepath):
+        """Carica la tab segnaposto di filepath lasciando selezionata la tab corrente; restituisce il CodeEditor o None."""
+        placeholder = self._pending_tabs.get(os.path.normcase(os.path.abspath(filepath)))
+        if placeholder is None: return None
+        selected = self._selected_tab_widget()
+        editor = self._materialize_tab(placeholder)
+        if selected is not None and selected is not placeholder:
+            try: self.app.notebook.select(selected)
+            except tk.TclError: pass
+        return editor
+    def _discard_placeholder(self, placeholder):
+        self._pending_tabs.pop(placeholder.filepath, None)
+        try: self.app.notebook.forget(placeholder)
+        except tk.TclError: pass
+        placeholder.destroy()
     def _create_editor(self, filepath, opened_by_debugger=False, go_to_line=None):
         if not self.root.winfo_exists() or not (hasattr(self.app, 'notebook') and self.app.notebook.winfo_exists()): return None
         try:
@@ -627,6 +669,8 @@ class MainApplication:
             if not os.path.exists(filepath) or not os.path.isfile(filepath): return None
             norm_filepath = os.path.normcase(os.path.abspath(filepath))
         except Exception as e: messagebox.showerror("Error", f"Invalid file path: {filepath}\n{e}", parent=self.root); return None
+        if norm_filepath in self._pending_tabs:
+            return self._materialize_tab(self._pending_tabs[norm_filepath], opened_by_debugger, go_to_line)
         if norm_filepath in self.open_tabs:
             existing_editor = self.open_tabs[norm_filepath]
             if existing_editor.winfo_exists():
@@ -665,12 +709,11 @@ class MainApplication:
         except tk.TclError: editor.destroy(); return None                                 
         self.open_tabs[norm_filepath] = editor
         editor.text.bind('<<Modified>>', lambda e, ed=editor: self._mark_dirty(ed), add='+')
-        for bp_path, ln in self.config.get('breakpoints', []):
-            try:
-                if os.path.normcase(os.path.abspath(str(bp_path))) == norm_filepath and isinstance(ln, int) and ln > 0:
-                     editor.toggle_breakpoint(ln)
+        for ln in self._stored_breakpoints(norm_filepath):
+            try: editor.toggle_breakpoint(ln)
             except Exception: pass
         if go_to_line is not None: editor.highlight_current_line(go_to_line)
+        self._schedule_config_save()
         if self.root.winfo_exists():
             self.root.after_idle(lambda ed=editor: self._apply_theme_to_editor(ed) if ed.winfo_exists() else None)
             self.root.after_idle(lambda ed=editor: self._apply_font_size_to_editor(ed) if ed.winfo_exists() else None)
@@ -746,7 +789,9 @@ class MainApplication:
                 save_method = self.save_file_as if closing_filepath is None else self.save_file
                 if save_method() == "break" or getattr(closing_editor_widget, 'dirty', False): return "break"
         try:
-            self.app.notebook.forget(current_tab_id)
+            # Un segnaposto non serve piu' a nessuno: va distrutto, non solo tolto dal notebook
+            if isinstance(closing_editor_widget, EditorPlaceholder): self._discard_placeholder(closing_editor_widget)
+            else: self.app.notebook.forget(current_tab_id)
             if self.app.notebook.winfo_exists():                                    
                  self.app.notebook.event_generate("<<NotebookTabClosed>>")
         except tk.TclError: pass
@@ -764,6 +809,9 @@ class MainApplication:
         closed_keys = [k for k, ed in list(self.open_tabs.items()) if not ed.winfo_exists() or ed not in current_tab_widgets]
         for key in closed_keys:
             if key in self.open_tabs: del self.open_tabs[key]
+        for key, placeholder in list(self._pending_tabs.items()):
+            if not placeholder.winfo_exists() or placeholder not in current_tab_widgets: self._discard_placeholder(placeholder)
+        self._schedule_config_save()
     def _update_ui_state(self):
         if not self.root.winfo_exists(): return
         is_debugging = self.is_running
@@ -800,10 +848,12 @@ class MainApplication:
     def _get_or_prompt_for_run_args(self, script_to_run):
         if not self.root.winfo_exists(): return None
         if script_to_run not in self.run_configs:
+            from gui.run_config_dialog import RunConfigDialog
             dialog = RunConfigDialog(self.root, script_to_run, current_args="")
             script_args_str = dialog.result_args
             if script_args_str is None: return None
             self.run_configs[script_to_run] = script_args_str
+            self._schedule_config_save()
             return script_args_str.split()
         else:
             return self.run_configs[script_to_run].split()
@@ -863,6 +913,7 @@ class MainApplication:
         if self.command_pending: messagebox.showwarning("Execute Code", "Debugger busy.", parent=self.root); return
         if self.debug_exec_window is None or not self.debug_exec_window.winfo_exists():
             dialog_settings_to_pass = self.debug_exec_dialog_config.copy()
+            from gui.debug_exec_dialog import DebugExecDialog
             self.debug_exec_window = DebugExecDialog(self.root, main_app_ref=self, config=dialog_settings_to_pass)
         else:
             self.debug_exec_window.lift(); self.debug_exec_window.focus_set()
@@ -876,8 +927,11 @@ class MainApplication:
         script_to_run = getattr(editor_widget, 'filepath', None)
         if not script_to_run: messagebox.showwarning("Configure Run", "Selected file has no path. Please save it first.", parent=self.root); return
         current_args = self.run_configs.get(script_to_run, "")
+        from gui.run_config_dialog import RunConfigDialog
         dialog = RunConfigDialog(self.root, script_to_run, current_args=current_args)
-        if dialog.result_args is not None: self.run_configs[script_to_run] = dialog.result_args
+        if dialog.result_args is not None:
+            self.run_configs[script_to_run] = dialog.result_args
+            self._schedule_config_save()
     def _create_menus(self):
         if not self.root.winfo_exists(): return
         m = tk.Menu(self.root)
@@ -900,6 +954,7 @@ class MainApplication:
         em.add_command(label="Paste", accelerator="Ctrl+V", command=self._dispatch_standard_edit("<<Paste>>"))
         em.add_separator(); em.add_command(label="Select All", accelerator="Ctrl+A", command=self._dispatch_edit_command("select_all"))
         em.add_separator(); em.add_command(label="Find...", accelerator="Ctrl+F", command=self._open_find_dialog)
+        em.add_command(label="Find in Project...", accelerator="Ctrl+Shift+F", command=self._open_project_search)
         m.add_cascade(label="Edit", menu=em)
         pm = tk.Menu(m, tearoff=0)
         pm.add_command(label="Run F5", accelerator="F5", command=self.toggle_run)
@@ -921,6 +976,11 @@ class MainApplication:
             "<Control-e>": self._open_debug_exec_dialog, "<Control-n>": self.new_file,
             "<Control-o>": self.open_file, "<Control-s>": self.save_file,
             "<Control-w>": self.close_file, "<Control-f>": self._open_find_dialog,
+            # Tk sceglie il pattern piu' specifico: con Shift la ricerca nel progetto,
+            # Ctrl+f con Caps Lock (keysym F senza Shift) resta la ricerca nel file
+            "<Control-Shift-KeyPress-F>": self._open_project_search,
+            "<Control-Shift-KeyPress-f>": self._open_project_search,
+            "<Control-F>": self._open_find_dialog,
             "<Control-z>": self._dispatch_edit_command("edit_undo"),
             "<Control-y>": self._dispatch_edit_command("edit_redo")
         }
@@ -960,6 +1020,18 @@ class MainApplication:
         if not active_editor: messagebox.showinfo("Find", "No active editor tab to search in.", parent=self.root); return
         from gui.search_dialog import SearchReplaceDialog
         SearchReplaceDialog(self.root, self)
+    def _open_project_search(self, event=None):
+        if not self.root.winfo_exists(): return
+        # Radice: cartella del target di debug, altrimenti del file attivo
+        path = self.current_debug_target_path
+        if not path:
+            try:
+                current_tab_id = self.app.notebook.select()
+                if current_tab_id: path = getattr(self.app.notebook.nametowidget(current_tab_id), 'filepath', None)
+            except (tk.TclError, AttributeError): pass
+        root_dir = os.path.dirname(path) if path else os.getcwd()
+        from gui.project_search import ProjectSearchWindow
+        ProjectSearchWindow(self.root, self, root_dir)
         
     def toggle_run(self):
         if self.command_pending or not self.root.winfo_exists(): return
@@ -1091,9 +1163,22 @@ class MainApplication:
             for fp_raw in fps:
                 try:
                     fp = os.path.abspath(fp_raw)
-                    if os.path.exists(fp) and os.path.isfile(fp): self._create_editor(fp)
+                    if os.path.exists(fp) and os.path.isfile(fp): self.open_path(fp)
                 except Exception: continue                                 
         return "break"
+    def open_path(self, filepath, line=None, col=0):
+        """
+        Apre filepath in una tab, oppure seleziona quella esistente (anche se non ancora caricata);
+        con line porta il cursore a line.col. Restituisce il CodeEditor, o None se non si apre.
+        """
+        editor = self._create_editor(filepath)
+        if editor is None or line is None: return editor
+        try:
+            editor.text.mark_set('insert', f'{line}.{col}')
+            editor.text.see('insert')
+            editor.text.focus_set()
+        except tk.TclError: pass
+        return editor
     def save_file_as(self, event=None):
         if not self.root.winfo_exists() or not (hasattr(self.app, 'notebook') and self.app.notebook.winfo_exists()): return "break"
         try:
@@ -1162,6 +1247,9 @@ class MainApplication:
                     if not self.app.notebook.winfo_exists(): break                
                     current_tabs_after_potential_close = self.app.notebook.tabs()
                     if tab_id not in current_tabs_after_potential_close : continue
+                    widget = self.app.notebook.nametowidget(tab_id)
+                    # Le tab mai aperte si chiudono senza caricare il file
+                    if isinstance(widget, EditorPlaceholder): self._discard_placeholder(widget); continue
                     self.app.notebook.select(tab_id)
                 except tk.TclError: continue                                                     
                 if self._on_tab_about_to_close() == "break":                                                   
@@ -1172,13 +1260,15 @@ class MainApplication:
             
     def notify_breakpoint_change(self, filepath: str, line_number: int, action: str):
             """
-            Chiamato dal CodeEditor quando toggli un breakpoint.
-            Deve inoltrare il comando al DebuggerApp *sul canale comandi* (dbg_conn).
+            Chiamato dal CodeEditor quando toggli un breakpoint: lo rende persistente e,
+            durante il debug, inoltra il comando al DebuggerApp *sul canale comandi* (dbg_conn).
             """
             try:
                 if not filepath or not isinstance(line_number, int):
                     return
 
+                self._schedule_config_save()
+
                 if not getattr(self, "is_running", False):
                     return
 
@@ -1197,6 +1287,7 @@ class MainApplication:
 
     def _open_ollama_config_dialog(self):
         if not self.root.winfo_exists(): return
+        from gui.ollama_config_dialog import OllamaConfigDialog
         OllamaConfigDialog(self.root, main_app_ref=self)
     def _open_ollama_chat_window(self):
         if not self.root.winfo_exists(): return
@@ -1215,6 +1306,8 @@ class MainApplication:
                 model_name = chat_cfg.get('selected_model')
                 if not api_url or not model_name:                         
                     return 
+            # pygments/markdown/tkinterweb vengono caricati solo qui
+            from gui.ollama_chat_window import OllamaChatWindow
             self.ollama_chat_window = OllamaChatWindow(self.root, main_app_ref=self)
         else:
             self.ollama_chat_window.lift()
@@ -1230,7 +1323,59 @@ class MainApplication:
             except tk.TclError:
                 pass
         return None
+STARTUP_BUDGET_MS = 2000   # --profile-startup fallisce oltre questo tempo al primo paint
+
+def _parse_importtime(stderr_text):
+    """Righe di -X importtime -> [(modulo, self_us, cumulativo_us, profondita')]."""
+    rows = []
+    for line in stderr_text.splitlines():
+        if not line.startswith('import time:') or line.endswith('imported package'): continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError: continue
+    return rows
+
+def _profile_startup(args):
+    """
+    --profile-startup [--budget-ms N]: runs the app in a child interpreter with -X importtime
+    up to the first paint, then prints the costliest imports and the time to first paint.
+    Exit status 1 if the first paint takes longer than the budget (usable as a CI check).
+    """
+    import subprocess
+    budget_ms = STARTUP_BUDGET_MS
+    if '--budget-ms' in args:
+        try: budget_ms = float(args[args.index('--budget-ms') + 1])
+        except (IndexError, ValueError): print("--budget-ms richiede un numero"); return 2
+    env = dict(os.environ, PYDBG_PROFILE_STARTUP='1')
+    started = time.time()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__)],
+                          env=env, capture_output=True, text=True, timeout=300)
+    values = dict(line.split('=', 1) for line in proc.stdout.splitlines() if line.startswith('first_paint_'))
+    if 'first_paint_epoch' not in values:
+        print("Startup failed:")
+        print('\n'.join(line for line in proc.stderr.splitlines() if not line.startswith('import time:'))[-2000:])
+        return 2
+    rows = _parse_importtime(proc.stderr)
+    print(f"{'self ms':>9} {'cumul. ms':>10}  top-level import (main.py and interpreter startup)")
+    for name, self_us, cumulative_us, depth in sorted((r for r in rows if r[3] == 0), key=lambda r: -r[2])[:20]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:10.1f}  {name}")
+    print(f"\n{'self ms':>9}  slowest modules by own time")
+    for name, self_us, cumulative_us, depth in sorted(rows, key=lambda r: -r[1])[:10]:
+        print(f"{self_us / 1000:9.1f}  {name}")
+    total_ms = sum(r[1] for r in rows) / 1000
+    paint_ms = (float(values['first_paint_epoch']) - started) * 1000
+    print(f"\nimports: {len(rows)} modules, {total_ms:.0f} ms")
+    print(f"first paint: {paint_ms:.0f} ms from launch ({float(values['first_paint_ms']):.0f} ms after main.py started), budget {budget_ms:.0f} ms")
+    if paint_ms > budget_ms:
+        print("STARTUP BUDGET EXCEEDED"); return 1
+    return 0
+
 if __name__ == "__main__":
+    profiling = os.environ.get('PYDBG_PROFILE_STARTUP') == '1'
+    if '--profile-startup' in sys.argv[1:] and not profiling:
+        sys.exit(_profile_startup(sys.argv[1:]))
     try:
         from multiprocessing import freeze_support
         freeze_support()
@@ -1238,4 +1383,10 @@ if __name__ == "__main__":
     root = tk.Tk()
     root.title("Python Debugger")
     main_app_instance = MainApplication(root)
-    root.mainloop()
\ No newline at end of file
+    if profiling:
+        root.update()   # mappa e disegna la finestra, callback idle compresi
+        print(f"first_paint_epoch={time.time()!r}")
+        print(f"first_paint_ms={(time.perf_counter() - STARTUP_T0) * 1000:.1f}", flush=True)
+        root.destroy()
+        sys.exit(0)
+    root.mainloop()
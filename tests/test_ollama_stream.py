@@ -0,0 +1,152 @@
+"""OllamaStream against a fake Ollama server: python -m unittest discover tests"""
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+from gui.ollama_stream import OllamaStream
+
+class FakeOllama(BaseHTTPRequestHandler):
+    """/api/chat in streaming: n pezzi NDJSON chunked, con ritardi ed errori configurabili."""
+    protocol_version = "HTTP/1.1"
+    mode = {}
+    requests = []
+    def log_message(self, *args): pass
+    def do_POST(self):
+        self.close_connection = True   # una richiesta per connessione, come OllamaStream
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        FakeOllama.requests.append((self.path, body))
+        mode = FakeOllama.mode
+        if mode.get('status'):
+            data = json.dumps({"error": "model 'x' not found"}).encode()
+            self.send_response(mode['status'])
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        def chunk(obj):
+            line = (json.dumps(obj) + "\n").encode()
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+        try:
+            time.sleep(mode.get('first', 0.0))
+            for i in range(mode.get('n', 5)):
+                chunk({"model": "x", "message": {"role": "assistant", "content": f"tok{i} "}, "done": False})
+                time.sleep(mode.get('delay', 0.0))
+            if mode.get('mid_error'): chunk({"error": "boom"})
+            chunk({"model": "x", "message": {"role": "assistant", "content": ""}, "done": True})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError): pass
+
+class OllamaStreamTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeOllama)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    def setUp(self):
+        FakeOllama.mode, FakeOllama.requests = {}, []
+    def _stream(self, history=None):
+        return OllamaStream(self.url, "x", history or [{"role": "user", "content": "hi"}], timeout=10).start()
+    def _drain(self, stream, until=None, timeout=10):
+        """Chiama poll() come il ciclo after() della chat: (testo, errore, secondi al primo testo)."""
+        text, first_at, deadline = "", None, time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            part, finished, error = stream.poll()
+            if part and first_at is None: first_at = time.perf_counter() - stream.started_at
+            text += part
+            if finished: return text, error, first_at
+            if until is not None and until(text): return text, None, first_at
+            time.sleep(0.005)
+        self.fail("stream did not finish")
+
+    def test_streams_all_chunks(self):
+        FakeOllama.mode = {'n': 5}
+        text, error, _ = self._drain(self._stream())
+        self.assertIsNone(error)
+        self.assertEqual(text, "tok0 tok1 tok2 tok3 tok4 ")
+        path, body = FakeOllama.requests[0]
+        self.assertEqual(path, "/api/chat")
+        self.assertTrue(body["stream"])
+
+    def test_first_token_arrives_before_the_reply_ends(self):
+        # 20 pezzi a 50 ms: il primo testo deve arrivare subito, non dopo ~1 s di generazione
+        FakeOllama.mode = {'n': 20, 'delay': 0.05}
+        stream = self._stream()
+        text, error, first_at = self._drain(stream)
+        self.assertIsNone(error)
+        self.assertEqual(text.count("tok"), 20)
+        self.assertLess(stream.first_token_s, 0.5)
+        self.assertLess(first_at, 0.5)
+
+    def test_cancel_mid_stream(self):
+        FakeOllama.mode = {'n': 200, 'delay': 0.02}
+        stream = self._stream()
+        text, _, _ = self._drain(stream, until=lambda t: "tok2 " in t)
+        cancelled_at = time.perf_counter()
+        stream.cancel()
+        rest, error, _ = self._drain(stream, timeout=2)
+        self.assertLess(time.perf_counter() - cancelled_at, 1.0)
+        self.assertTrue(stream.cancelled)
+        self.assertIsNone(error)
+        self.assertLess((text + rest).count("tok"), 200)
+
+    def test_cancel_before_first_byte(self):
+        # Il modello "pensa" 5 s prima di rispondere: cancel() deve svegliare la lettura bloccata
+        FakeOllama.mode = {'n': 3, 'first': 5.0}
+        stream = self._stream()
+        time.sleep(0.2)
+        cancelled_at = time.perf_counter()
+        stream.cancel()
+        text, error, _ = self._drain(stream, timeout=2)
+        self.assertLess(time.perf_counter() - cancelled_at, 1.0)
+        self.assertEqual(text, "")
+        self.assertIsNone(error)
+        self.assertIsNone(stream.first_token_s)
+
+    def test_http_error(self):
+        FakeOllama.mode = {'status': 404}
+        text, error, _ = self._drain(self._stream())
+        self.assertEqual(text, "")
+        self.assertIn("HTTP 404", error)
+        self.assertIn("model 'x' not found", error)
+
+    def test_error_object_mid_stream(self):
+        FakeOllama.mode = {'n': 3, 'mid_error': True}
+        text, error, _ = self._drain(self._stream())
+        self.assertEqual(text, "tok0 tok1 tok2 ")
+        self.assertIn("boom", error)
+
+    def test_connection_refused(self):
+        stream = OllamaStream("http://127.0.0.1:9", "x", [{"role": "user", "content": "hi"}], timeout=5).start()
+        text, error, _ = self._drain(stream)
+        self.assertEqual(text, "")
+        self.assertIn("API URL Err", error)
+
+    def test_display_only_roles_are_not_sent(self):
+        history = [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "partial"},
+                   {"role": "stopped", "content": "*[Generation stopped]*"},
+                   {"role": "error", "content": "[API Err]"}, {"role": "user", "content": "again"}]
+        self._drain(self._stream(history))
+        _, body = FakeOllama.requests[0]
+        self.assertEqual([m["role"] for m in body["messages"]], ["user", "assistant", "user"])
+        self.assertNotIn("Generation stopped", json.dumps(body))
+
+if __name__ == '__main__':
+    unittest.main()
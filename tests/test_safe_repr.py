@@ -0,0 +1,70 @@
+"""SafeRepr cost bounds: python -m unittest discover tests"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+from gui.safe_repr import SafeRepr
+
+def call_with_timeout(func, timeout):
+    # Come DebuggerBackend._call_with_timeout, senza la parte di tracing
+    result = []
+    t = threading.Thread(target=lambda: result.append((True, func())), daemon=True)
+    t.start()
+    t.join(timeout)
+    return result[0] if result else None
+
+class Slow:
+    calls = 0
+    def __repr__(self):
+        Slow.calls += 1
+        time.sleep(1.0)
+        return "Slow()"
+
+class Fine:
+    def __repr__(self): return "Fine()"
+
+class SafeReprTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = SafeRepr.from_config({"time_budget_ms": 100}, call_with_timeout=call_with_timeout)
+    def _summarize(self, value):
+        self.engine.start_budget()
+        started = time.perf_counter()
+        text, truncated = self.engine.summarize(value)
+        return text, truncated, time.perf_counter() - started
+
+    def test_large_dict_is_not_sorted(self):
+        text, truncated, elapsed = self._summarize({f"k{i}": i for i in range(500_000)})
+        self.assertTrue(text.startswith("{'k0': 0, 'k1': 1,"))
+        self.assertTrue(truncated)
+        self.assertLess(elapsed, 0.05)
+
+    def test_large_sets(self):
+        for value in (set(range(500_000)), frozenset(range(500_000))):
+            text, truncated, elapsed = self._summarize(value)
+            self.assertTrue(truncated)
+            self.assertLess(elapsed, 0.05)
+        self.assertEqual(self._summarize(frozenset())[0], "frozenset()")
+
+    def test_slow_user_repr_is_cut_at_the_budget(self):
+        Slow.calls = 0
+        text, truncated, elapsed = self._summarize([Fine(), Slow(), Fine()])
+        self.assertLess(elapsed, 0.5)
+        self.assertTrue(truncated)
+        # Budget esaurito: anche i valori dopo Slow sono solo tipo e id
+        self.assertRegex(text, r"^\[Fine\(\), <Slow object at 0x[0-9a-f]+>, <Fine object at 0x[0-9a-f]+>\]$")
+        # Il tipo lento non viene piu' chiamato
+        text, truncated, elapsed = self._summarize(Slow())
+        self.assertLess(elapsed, 0.05)
+        self.assertTrue(truncated)
+        self.assertEqual(Slow.calls, 1)
+
+    def test_fast_user_repr(self):
+        self.assertEqual(self._summarize({1: Fine()})[:2], ("{1: Fine()}", False))
+
+if __name__ == '__main__':
+    unittest.main()
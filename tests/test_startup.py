@@ -0,0 +1,50 @@
+"""Startup-time regression checks: python -m unittest discover tests"""
+import os
+import subprocess
+import sys
+import tkinter
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path: sys.path.insert(0, ROOT)
+
+import main
+
+# Caricati solo quando servono (chat, icone da rete, monitor): non devono entrare nell'avvio
+LAZY_MODULES = ('requests', 'cairosvg', 'PIL', 'screeninfo', 'pygments', 'markdown', 'bs4', 'tkinterweb',
+                'gui.ollama_chat_window', 'gui.ollama_config_dialog', 'gui.debug_exec_dialog', 'gui.run_config_dialog')
+
+def _has_display():
+    try: tkinter.Tk().destroy()
+    except tkinter.TclError: return False
+    return True
+
+def _import_main_rows():
+    """Righe di main._parse_importtime per 'import main' in un interprete nuovo (non serve un display)."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'],
+                          cwd=ROOT, capture_output=True, text=True, timeout=120)
+    return proc, main._parse_importtime(proc.stderr)
+
+class StartupTest(unittest.TestCase):
+    def test_import_does_not_load_lazy_modules(self):
+        proc, rows = _import_main_rows()
+        self.assertEqual(proc.returncode, 0, proc.stderr[-2000:])
+        loaded = {name for name, _, _, _ in rows}
+        eager = sorted(m for m in LAZY_MODULES if m in loaded or any(n.startswith(m + '.') for n in loaded))
+        self.assertEqual(eager, [], "imported at startup")
+
+    def test_import_phase_within_budget(self):
+        # La fase di import e' parte del primo paint: da sola deve gia' stare in STARTUP_BUDGET_MS
+        proc, rows = _import_main_rows()
+        self.assertEqual(proc.returncode, 0, proc.stderr[-2000:])
+        import_ms = sum(self_us for _, self_us, _, _ in rows) / 1000
+        slowest = ', '.join(f"{name} {self_us / 1000:.0f} ms" for name, self_us, _, _ in sorted(rows, key=lambda r: -r[1])[:5])
+        self.assertLess(import_ms, main.STARTUP_BUDGET_MS, f"import phase {import_ms:.0f} ms; slowest: {slowest}")
+
+    @unittest.skipUnless(_has_display(), "needs a display")
+    def test_first_paint_within_budget(self):
+        # Solo il primo paint vero richiede Tk; 0 = entro STARTUP_BUDGET_MS, 1 = budget superato, 2 = avvio fallito
+        self.assertEqual(main._profile_startup(['--profile-startup']), 0)
+
+if __name__ == '__main__':
+    unittest.main()